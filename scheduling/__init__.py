@@ -0,0 +1 @@
+"""Observation scheduling library for the Trinity demonstrator at Frisco Peak."""
@@ -0,0 +1,201 @@
+"""Target-of-opportunity queries: when does a new direction cross the band at night?
+
+    python -m scheduling.alerts --ra 02:42:40.7 --dec=-00:00:47.9
+    python -m scheduling.alerts --alerts alerts.csv -n 5 --json --almanac almanac.bin
+
+An alert is a ``sources.Source``, so an arbitrary RA/Dec is observed
+exactly like a catalog source: while it descends through its altitude band
+(``sources.observing_flags``), sampled on the night's grid. ``next_windows``
+returns each alert's next ``count`` band crossings intersected with the
+nights' observation windows (start to end time, as
+``masks.observing_window``), from the alert time on. ``--alerts`` takes a
+file in the catalog's CSV format, one alert per row.
+
+Only the nights' window times are needed, so no Sun or Moon series is
+computed: the windows come from the almanac when it covers the nights, else
+from ``night.compute_times`` (a few ms a night). The alerts are evaluated
+only on the samples inside those windows, every alert and night in one
+``ephemeris.fixed_altaz`` pass that computes only the samples where an
+alert is setting through its band (``setting_through``). Nights are searched in growing chunks until
+every alert has ``count`` windows or ``max_nights`` have been searched.
+With the almanac (by default the scheduling directory's) an alert takes
+10-50 ms and 300 alerts about 0.35 s; live, solving a month of nights'
+events adds about 0.2 s.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time as timer
+from datetime import datetime, time, timedelta, timezone
+
+import numpy as np
+
+from scheduling.ephemeris import fixed_altaz
+from scheduling.intervals import IntervalSet
+from scheduling.site import FRISCO_PEAK
+from scheduling.sources import BAND_HIGH_DEG, BAND_LOW_DEG, Source, load_catalog, observing_flags
+from scheduling.windows import POLICIES, SCHEDULERLILY, decide_windows_arrays
+
+DEFAULT_COUNT = 3
+MAX_NIGHTS = 30
+FIRST_CHUNK = 4  # nights searched first; doubled while alerts still lack windows
+
+
+def observing_windows(first_night, nights, site=FRISCO_PEAK, policy=SCHEDULERLILY, almanac=None,
+                      event_mode='solve'):
+    """``(start, end)`` (``datetime64[ms]``) of the observation window of ``nights`` nights from ``first_night``.
+
+    None for a night without a window.
+    """
+    from scheduling.night import NIGHT_HOURS, compute_times
+
+    last_night = first_night + timedelta(days=nights - 1)
+    if almanac is not None and almanac.covers(first_night, last_night, site, policy, event_mode, NIGHT_HOURS):
+        windows = decide_windows_arrays(almanac.event_arrays(policy, first_night, last_night), policy)
+        starts, ends = windows.start_time, windows.end_time
+    else:
+        windows = [compute_times(datetime.combine(first_night + timedelta(days=i), time()), site, policy,
+                                 event_mode).windows for i in range(nights)]
+        starts = np.array([np.datetime64('NaT') if w.start_time is None else w.start_time for w in windows],
+                          dtype='datetime64[ms]')
+        ends = np.array([np.datetime64('NaT') if w.end_time is None else w.end_time for w in windows],
+                        dtype='datetime64[ms]')
+    return [None if np.isnat(start) or np.isnat(end) else (start, end) for start, end in zip(starts, ends)]
+
+
+def band_crossings(sources, nights, site=FRISCO_PEAK, interval_minutes=1):
+    """Each source's band crossings inside each night's window, as ``(source, IntervalSet)`` pairs.
+
+    ``nights`` are ``(night, (start, end))`` pairs. Each window is sampled
+    on its night's grid (UTC midnight, every ``interval_minutes``), one
+    sample past either end.
+    """
+    if not sources or not nights:
+        return
+    step = np.timedelta64(interval_minutes * 60000, 'ms')
+    grids = []
+    for night, (start, end) in nights:
+        origin = np.datetime64(night, 'ms')
+        grids.append(origin + step * np.arange((start - origin) // step, -((origin - end) // step) + 1))
+    low = np.array([[source.band_low_deg] for source in sources])
+    high = np.array([[source.band_high_deg] for source in sources])
+    altitudes, _ = fixed_altaz([source.body() for source in sources], site, np.concatenate(grids),
+                               setting_through=(low, high))
+    offset = 0
+    for (night, (start, end)), grid in zip(nights, grids):
+        flags = observing_flags(altitudes[:, offset:offset + len(grid)], low, high)
+        offset += len(grid)
+        times = grid.astype(datetime).tolist()
+        window = (start.astype(datetime), end.astype(datetime))
+        for source, row in zip(sources, flags):
+            if row.any():
+                yield source, IntervalSet.from_flags(times, row).clip(*window)
+
+
+def next_windows(sources, after, count=DEFAULT_COUNT, site=FRISCO_PEAK, policy=SCHEDULERLILY, max_nights=MAX_NIGHTS,
+                 almanac=None, interval_minutes=1, event_mode='solve'):
+    """Each source's next ``count`` observable ``(start, end)`` windows from ``after`` (naive UTC) on, by name.
+
+    A window is the part of a band crossing inside a night's observation
+    window; one in progress at ``after`` starts at ``after``. A source gets
+    fewer than ``count`` when the ``max_nights`` nights searched hold fewer.
+    """
+    names = [source.name for source in sources]
+    if len(set(names)) != len(names):
+        raise ValueError("alert names must be unique")
+    found = {name: [] for name in names}
+    pending = list(sources)
+    first_night = after.date() - timedelta(days=1)  # a night's window may run past its UTC date
+    searched, chunk = 0, FIRST_CHUNK
+    while pending and searched < max_nights:
+        nights = min(chunk, max_nights - searched)
+        start = first_night + timedelta(days=searched)
+        windows = observing_windows(start, nights, site, policy, almanac, event_mode)
+        nights_left = [(start + timedelta(days=i), window) for i, window in enumerate(windows)
+                       if window is not None and window[1].astype(datetime) > after]
+        for source, crossings in band_crossings(pending, nights_left, site, interval_minutes):
+            found[source.name].extend(crossings.clip(after))
+        pending = [source for source in pending if len(found[source.name]) < count]
+        searched += nights
+        chunk *= 2
+    return {name: windows[:count] for name, windows in found.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Next band-crossing windows of alert directions inside the observation windows.')
+    alerts = parser.add_mutually_exclusive_group(required=True)
+    alerts.add_argument('--ra', help='right ascension, hours (02:42:40.7 or decimal); with --dec')
+    alerts.add_argument('--alerts', metavar='FILE', help='CSV of alerts in the catalog format (name, ra, dec, ...)')
+    parser.add_argument('--dec', help='declination, degrees (--dec=-00:00:47.9 or decimal)')
+    parser.add_argument('--name', default='alert', help='name of the --ra/--dec alert')
+    parser.add_argument('--epoch', default='2000', help='epoch of the --ra/--dec coordinates')
+    parser.add_argument('--band-low', type=float, default=BAND_LOW_DEG, help='lower edge of the band, degrees')
+    parser.add_argument('--band-high', type=float, default=BAND_HIGH_DEG, help='upper edge of the band, degrees')
+    parser.add_argument('--time', type=datetime.fromisoformat, default=None,
+                        help='alert time, ISO 8601 (naive means UTC; default: now)')
+    parser.add_argument('-n', '--count', type=int, default=DEFAULT_COUNT, help='windows per alert')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default=SCHEDULERLILY.name)
+    parser.add_argument('--max-nights', type=int, default=MAX_NIGHTS, help='nights to search at most')
+    parser.add_argument('--almanac', metavar='FILE',
+                        help='precomputed almanac (see scheduling.almanac; default: the scheduling directory\'s, '
+                             'if present)')
+    parser.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    args = parser.parse_args(argv)
+
+    started = timer.perf_counter()
+    if args.alerts:
+        try:
+            sources = load_catalog(args.alerts)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    else:
+        if args.dec is None:
+            parser.error('--ra needs --dec')
+        sources = [Source(args.name, args.ra, args.dec, args.epoch, band_low_deg=args.band_low,
+                          band_high_deg=args.band_high)]
+        try:
+            sources[0].body()
+        except ValueError as e:
+            parser.error(f"bad coordinates: {e}")
+    after = args.time or datetime.now(timezone.utc)
+    if after.tzinfo is not None:
+        after = after.astimezone(timezone.utc).replace(tzinfo=None)
+    from scheduling.cli import ALMANAC_FILE, DEFAULT_DIRECTORY
+
+    almanac = None
+    almanac_path = args.almanac or os.path.join(DEFAULT_DIRECTORY, ALMANAC_FILE)
+    if args.almanac or os.path.exists(almanac_path):
+        from scheduling.almanac import Almanac
+        try:
+            almanac = Almanac(almanac_path)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+
+    try:
+        found = next_windows(sources, after, args.count, policy=POLICIES[args.policy], max_nights=args.max_nights,
+                             almanac=almanac)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = timer.perf_counter() - started
+
+    if args.json:
+        from scheduling.artifact import json_periods
+
+        json.dump({name: json_periods(windows) for name, windows in found.items()}, sys.stdout, indent=2)
+        print()
+    else:
+        for name, windows in found.items():
+            if not windows:
+                print(f"{name}  no window within {args.max_nights} nights")
+            for start, end in windows:
+                print(f"{name}  {start:%Y-%m-%d %H:%M:%S} - {end:%H:%M:%S} UTC  "
+                      f"{(end - start).total_seconds() / 60:.0f} min")
+    print(f"{len(sources)} alerts in {elapsed * 1000:.0f} ms", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
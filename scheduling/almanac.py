@@ -0,0 +1,267 @@
+"""Precomputed almanac of nightly events.
+
+The events of a night at a fixed site never change, so they can be solved
+once for years ahead:
+
+    python -m scheduling.almanac build 2026-01-01 2035-12-31 -o almanac.bin
+    python -m scheduling.almanac show almanac.bin 2026-10-19
+
+The file is a short JSON header followed by one fixed-size record per night:
+sunrise, sunset, moonrise and the Moon's culmination, the Sun's rising and
+setting crossings of every crit threshold, the moonset for every moonset
+threshold (``datetime64[ms]``, NaT when the event doesn't happen) and the
+Moon's illumination. ``Almanac`` memory-maps the records, so a lookup is
+one index into the file and no ephemeris runs; nights outside the table,
+another site, other thresholds or 'scan' mode return None and the caller
+computes live.
+
+Events are solved exactly as ``events.night_events`` solves them, on the
+same coarse bracketing grid ``night.compute_night`` and ``compute_times``
+use in 'solve' mode, so a lookup returns the very times the live
+computation would (with ``evaluations=0``).
+``event_arrays`` hands out whole columns for ``windows.decide_windows_arrays``.
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from functools import partial
+
+import numpy as np
+
+from scheduling.events import NightEvents
+from scheduling.site import FRISCO_PEAK, Site
+from scheduling.windows import POLICIES
+
+MAGIC = b'SCHALM01'
+FORMAT_VERSION = 1
+_ALIGNMENT = 64
+_NAT = np.datetime64('NaT', 'ms')
+
+
+def _thresholds(policies):
+    sun_crit_degs = sorted({deg for policy in policies for deg in (policy.sunrise_crit_deg, policy.sunset_crit_deg)})
+    moonset_degs = sorted({policy.moonset_deg for policy in policies})
+    return sun_crit_degs, moonset_degs
+
+
+def record_dtype(sun_crit_degs, moonset_degs):
+    fields = [('sunrise', '<M8[ms]'), ('sunset', '<M8[ms]'), ('moonrise', '<M8[ms]'), ('moon_max', '<M8[ms]')]
+    for deg in sun_crit_degs:
+        fields += [(f'sun_rising{deg:+g}', '<M8[ms]'), (f'sun_setting{deg:+g}', '<M8[ms]')]
+    fields += [(f'moonset{deg:+g}', '<M8[ms]') for deg in moonset_degs]
+    fields.append(('illumination', '<i1'))
+    return np.dtype(fields)
+
+
+def _datetime(value):
+    return None if np.isnat(value) else value.astype(datetime)
+
+
+def night_record(night, site, sun_crit_degs, moonset_degs, hours):
+    """Solve one night's almanac entry; returns a tuple in ``record_dtype`` field order."""
+    from scheduling.ephemeris import moon_illumination
+    from scheduling.events import moon_events, night_series, sun_events
+
+    start_date = datetime.combine(night, time())
+    times, sun_altitudes, moon_altitudes, _ = night_series(site, start_date, hours)
+    sunrise = sunset = moonrise = moon_max = None
+    crossings, moonsets = [], []
+    for deg in sun_crit_degs:
+        sunrise, sunset, rising, setting, _ = sun_events(site, times, sun_altitudes, deg, deg)
+        crossings += [rising, setting]
+    for deg in moonset_degs:
+        moonrise, moonset, moon_max, _ = moon_events(site, times, moon_altitudes, deg)
+        moonsets.append(moonset)
+    events = [sunrise, sunset, moonrise, moon_max] + crossings + moonsets
+    return tuple(_NAT if t is None else np.datetime64(t, 'ms') for t in events) + (
+        moon_illumination(site, start_date),)
+
+
+class Almanac:
+    """A memory-mapped almanac file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            magic = file.read(len(MAGIC))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not an almanac file")
+            (length,) = struct.unpack('<I', file.read(4))
+            header = json.loads(file.read(length))
+        if header.get('version') != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported almanac version {header.get('version')!r}")
+        self.site = Site(*header['site'])
+        self.first_night = date.fromisoformat(header['first_night'])
+        self.nights = header['nights']
+        self.hours = header['hours']
+        self.mode = header['mode']
+        self.sun_crit_degs = header['sun_crit_degs']
+        self.moonset_degs = header['moonset_degs']
+        dtype = record_dtype(self.sun_crit_degs, self.moonset_degs)
+        offset = header['offset']
+        if os.path.getsize(path) != offset + self.nights * dtype.itemsize:
+            raise ValueError(f"{path}: truncated or corrupt almanac (size does not match its header)")
+        self.table = np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(self.nights,))
+
+    def __reduce__(self):
+        # Worker processes reopen the file rather than receiving its contents
+        return Almanac, (self.path,)
+
+    @property
+    def last_night(self):
+        return self.first_night + timedelta(days=self.nights - 1)
+
+    def record(self, night):
+        """The raw record of ``night`` (a date), or None outside the table."""
+        index = (night - self.first_night).days
+        if not 0 <= index < self.nights:
+            return None
+        return self.table[index]
+
+    def covers(self, first_night, last_night, site, policy, mode='solve', hours=None):
+        """Whether every night from ``first_night`` to ``last_night`` can be looked up for ``policy``."""
+        return (site == self.site and mode == self.mode and (hours is None or hours == self.hours)
+                and self.first_night <= first_night <= last_night <= self.last_night
+                and policy.sunrise_crit_deg in self.sun_crit_degs and policy.sunset_crit_deg in self.sun_crit_degs
+                and policy.moonset_deg in self.moonset_degs)
+
+    def lookup(self, start_date, site, policy, mode='solve', hours=None):
+        """``(NightEvents, illumination)`` of the night starting at ``start_date``, or None.
+
+        None means compute live: the night is outside the table, or the
+        table was built for another site, mode, grid length or thresholds.
+        """
+        if (site != self.site or mode != self.mode or (hours is not None and hours != self.hours)
+                or start_date != datetime.combine(start_date.date(), time())
+                or policy.sunrise_crit_deg not in self.sun_crit_degs
+                or policy.sunset_crit_deg not in self.sun_crit_degs
+                or policy.moonset_deg not in self.moonset_degs):
+            return None
+        record = self.record(start_date.date())
+        if record is None:
+            return None
+        events = NightEvents(
+            _datetime(record['sunrise']), _datetime(record['sunset']),
+            _datetime(record[f'sun_rising{policy.sunrise_crit_deg:+g}']),
+            _datetime(record[f'sun_setting{policy.sunset_crit_deg:+g}']),
+            _datetime(record['moonrise']), _datetime(record[f'moonset{policy.moonset_deg:+g}']),
+            _datetime(record['moon_max']), 0)
+        return events, int(record['illumination'])
+
+    def event_arrays(self, policy, first_night=None, last_night=None):
+        """Every night's events for ``policy``'s thresholds as ``datetime64`` arrays, keyed like ``NightEvents``.
+
+        Covers ``first_night`` to ``last_night`` inclusive (default: the
+        whole table); raises ValueError when the range or the thresholds
+        are not in the table.
+        """
+        first = (first_night or self.first_night) - self.first_night
+        last = (last_night or self.last_night) - self.first_night
+        if not 0 <= first.days <= last.days < self.nights:
+            raise ValueError(f"{self.path} covers {self.first_night} .. {self.last_night} only")
+        columns = {'sunrise_crit': f'sun_rising{policy.sunrise_crit_deg:+g}',
+                   'sunset_crit': f'sun_setting{policy.sunset_crit_deg:+g}',
+                   'moonset': f'moonset{policy.moonset_deg:+g}'}
+        missing = [column for column in columns.values() if column not in self.table.dtype.names]
+        if missing:
+            raise ValueError(f"{self.path} has no {', '.join(missing)} column; rebuild it for policy {policy.name!r}")
+        table = self.table[first.days:last.days + 1]
+        events = {name: np.asarray(table[name]) for name in ('sunrise', 'sunset', 'moonrise', 'moon_max')}
+        events.update((name, np.asarray(table[column])) for name, column in columns.items())
+        return events
+
+
+def build(path, first_night, last_night, site=FRISCO_PEAK, policies=tuple(POLICIES.values()), hours=None,
+          workers=None):
+    """Solve every night from ``first_night`` to ``last_night`` for ``policies``' thresholds and write ``path``.
+
+    Nights are spread over a process pool as in ``batch.plan_nights``. The
+    file is written next to ``path`` and renamed into place.
+    """
+    from scheduling.batch import night_range
+    from scheduling.night import NIGHT_HOURS
+
+    hours = hours or NIGHT_HOURS
+    sun_crit_degs, moonset_degs = _thresholds(policies)
+    dtype = record_dtype(sun_crit_degs, moonset_degs)
+    nights = night_range(first_night, last_night)
+    solve = partial(night_record, site=site, sun_crit_degs=sun_crit_degs, moonset_degs=moonset_degs, hours=hours)
+    if workers == 1 or len(nights) < 2:
+        records = [solve(night) for night in nights]
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            records = list(pool.map(solve, nights, chunksize=max(1, len(nights) // (4 * workers))))
+    table = np.array(records, dtype=dtype)
+
+    header = {
+        'version': FORMAT_VERSION,
+        'site': list(site),
+        'first_night': first_night.isoformat(),
+        'nights': len(nights),
+        'hours': hours,
+        'mode': 'solve',
+        'sun_crit_degs': sun_crit_degs,
+        'moonset_degs': moonset_degs,
+    }
+    # The offset is part of the header, so size the header with a placeholder first
+    prefix = len(MAGIC) + 4
+    length = len(json.dumps(dict(header, offset=0)).encode()) + 16
+    header['offset'] = -(-(prefix + length) // _ALIGNMENT) * _ALIGNMENT
+    encoded = json.dumps(header).encode().ljust(header['offset'] - prefix)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temporary = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            file.write(MAGIC + struct.pack('<I', len(encoded)) + encoded)
+            file.write(table.tobytes())
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+    return len(nights)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or inspect a precomputed almanac of nightly events.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build_parser = commands.add_parser('build', help='solve a range of nights into an almanac file')
+    build_parser.add_argument('first_night', type=date.fromisoformat, help='first night, YYYY-MM-DD')
+    build_parser.add_argument('last_night', type=date.fromisoformat, help='last night (inclusive), YYYY-MM-DD')
+    build_parser.add_argument('-o', '--output', required=True, help='almanac file to write')
+    build_parser.add_argument('-j', '--workers', type=int, default=None, help='processes (default: one per CPU)')
+    show_parser = commands.add_parser('show', help='print the entry of one night')
+    show_parser.add_argument('almanac', help='almanac file')
+    show_parser.add_argument('night', type=date.fromisoformat, help='night, YYYY-MM-DD')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        if args.last_night < args.first_night:
+            parser.error('last_night is before first_night')
+        started = timer.perf_counter()
+        count = build(args.output, args.first_night, args.last_night, workers=args.workers)
+        print(f"Solved {count} nights in {timer.perf_counter() - started:.1f} s", file=sys.stderr)
+        return 0
+
+    almanac = Almanac(args.almanac)
+    record = almanac.record(args.night)
+    if record is None:
+        print(f"{args.night} is outside {almanac.first_night} .. {almanac.last_night}", file=sys.stderr)
+        return 1
+    for name in record.dtype.names:
+        value = record[name]
+        print(f"{name}: {value if name == 'illumination' else _datetime(value)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
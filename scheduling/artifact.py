@@ -0,0 +1,219 @@
+"""Versioned, machine-readable schedule files.
+
+``eon_times.txt`` keeps its historical layout for trinity.py; everything
+else should read ``schedule.json`` instead, which the nightly run writes
+next to it::
+
+    from scheduling.artifact import load_schedule
+    schedule = load_schedule('/data/TrinityLabComputer/scheduling/schedule.json')
+    schedule.windows.start_time, schedule.door.open, schedule.source_windows['NGC 1068']
+
+A night's document holds the policy, every event time, the windows, the
+door open/closed periods, the Moon phase and each source's observing
+windows. Times are UTC ISO 8601 strings with a ``Z`` suffix (loaded back as
+naive UTC datetimes, like the rest of the package), absent events are
+null, and periods are ``[start, end]`` pairs. ``door`` is null when the
+night was computed without altitude series (``--times-only``).
+
+Batch ranges (``scheduling.batch -o FILE.json`` or ``FILE.parquet``) hold
+the events, windows and Moon phase of every night; Parquet needs pyarrow.
+
+Files carry ``schema`` and ``version``; loaders accept every version up to
+``SCHEMA_VERSION`` and refuse newer ones. All files are written to a
+temporary file and renamed into place, so readers never see a partial one.
+"""
+
+import json
+from datetime import date, datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+from scheduling.intervals import IntervalSet
+from scheduling.masks import DoorStates
+from scheduling.output import atomic_write
+from scheduling.site import Site
+from scheduling.windows import NightWindows, Policy
+
+SCHEMA = 'trinity-schedule'
+SCHEMA_VERSION = 1
+SCHEDULE_FILE = 'schedule.json'
+EVENT_NAMES = ('sunrise', 'sunset', 'sunrise_crit', 'sunset_crit', 'moonrise', 'moonset', 'moon_max')
+WINDOW_NAMES = NightWindows._fields[:-1]  # the times; too_short is a flag
+
+
+class Schedule(NamedTuple):
+    version: int
+    created: Optional[datetime]
+    night: date
+    site: Site
+    policy: Policy
+    events: Dict[str, Optional[datetime]]  # keyed by EVENT_NAMES
+    windows: NightWindows
+    illumination: int
+    door: Optional[DoorStates]  # None when the night has no altitude series
+    source_windows: Dict[str, IntervalSet]  # keyed by source name, empty for batch files
+
+
+def json_time(t):
+    return None if t is None else t.isoformat(timespec='milliseconds') + 'Z'
+
+
+def _parse_time(text):
+    return None if text is None else datetime.fromisoformat(text.rstrip('Z'))
+
+
+def json_periods(intervals):
+    return [[json_time(start), json_time(end)] for start, end in intervals]
+
+
+def _parse_periods(periods):
+    return IntervalSet((_parse_time(start), _parse_time(end)) for start, end in periods)
+
+
+def _header(kind, site, policy):
+    return {
+        'schema': SCHEMA,
+        'version': SCHEMA_VERSION,
+        'kind': kind,
+        'created': json_time(datetime.now(timezone.utc).replace(tzinfo=None)),
+        'site': site._asdict(),
+        'policy': policy._asdict(),
+    }
+
+
+def _night_fields(night, grid_start, events, windows, illumination):
+    return {
+        'night': night.isoformat(),
+        'grid_start': json_time(grid_start),
+        'events': {name: json_time(events[name]) for name in EVENT_NAMES},
+        'windows': dict({name: json_time(getattr(windows, name)) for name in WINDOW_NAMES},
+                        too_short=bool(windows.too_short)),
+        'illumination': int(illumination),
+    }
+
+
+def schedule_document(night, site):
+    """The JSON document (a dict) of one computed ``Night``."""
+    from scheduling.masks import door_states
+
+    document = _header('night', site, night.policy)
+    document.update(_night_fields(night.start_date.date(), night.start_date, night.events._asdict(), night.windows,
+                                  night.illumination))
+    door = door_states(night) if night.times else None
+    document['door'] = None if door is None else {'open': json_periods(door.open), 'closed': json_periods(door.closed)}
+    document['sources'] = [dict(source._asdict(), windows=json_periods(night.source_windows[source.name]))
+                           for source in night.sources]
+    return document
+
+
+def write_schedule(night, path, site):
+    """Write ``schedule_document(night, site)`` to ``path`` atomically."""
+    with atomic_write(path) as file:
+        json.dump(schedule_document(night, site), file, indent=2)
+        file.write('\n')
+
+
+def batch_document(rows, site, policy):
+    """The JSON document of ``batch.plan_nights`` rows."""
+    document = _header('batch', site, policy)
+    document['nights'] = [_night_fields(row['night'], datetime.combine(row['night'], datetime.min.time()), row,
+                                        NightWindows(*(row[name] for name in NightWindows._fields)),
+                                        row['illumination'])
+                          for row in rows]
+    return document
+
+
+def write_batch(rows, path, site, policy):
+    """Write batch rows to ``path`` atomically, as Parquet if it ends in ``.parquet``, else JSON."""
+    if path.endswith('.parquet'):
+        _write_parquet(rows, path, site, policy)
+        return
+    with atomic_write(path) as file:
+        json.dump(batch_document(rows, site, policy), file)
+        file.write('\n')
+
+
+def require_pyarrow():
+    """``(pyarrow, pyarrow.parquet)``; RuntimeError if pyarrow isn't installed."""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet schedule files need pyarrow (pip install pyarrow)") from None
+    return pyarrow, pyarrow.parquet
+
+
+def _write_parquet(rows, path, site, policy):
+    pa, pq = require_pyarrow()
+    columns = {'night': pa.array([row['night'] for row in rows], pa.date32())}
+    for name in EVENT_NAMES + WINDOW_NAMES:
+        columns[name] = pa.array([row[name] for row in rows], pa.timestamp('ms'))
+    columns['too_short'] = pa.array([bool(row['too_short']) for row in rows], pa.bool_())
+    columns['illumination'] = pa.array([row['illumination'] for row in rows], pa.int8())
+    header = _header('batch', site, policy)
+    table = pa.table(columns).replace_schema_metadata({key: json.dumps(value) for key, value in header.items()})
+    with atomic_write(path, 'wb') as file:
+        pq.write_table(table, file)
+
+
+def _check_header(header, path):
+    if header.get('schema') != SCHEMA:
+        raise ValueError(f"{path} is not a schedule file")
+    version = header.get('version')
+    if not isinstance(version, int) or version > SCHEMA_VERSION:
+        raise ValueError(f"{path}: schedule version {version!r} is newer than this reader ({SCHEMA_VERSION})")
+
+
+def _schedule(header, fields):
+    windows = fields['windows']
+    door = fields.get('door')
+    return Schedule(
+        version=header['version'],
+        created=_parse_time(header.get('created')),
+        night=date.fromisoformat(fields['night']),
+        site=Site(**header['site']),
+        policy=Policy(**header['policy']),
+        events={name: _parse_time(fields['events'].get(name)) for name in EVENT_NAMES},
+        windows=NightWindows(*(_parse_time(windows.get(name)) for name in WINDOW_NAMES), windows['too_short']),
+        illumination=fields['illumination'],
+        door=None if door is None else DoorStates(_parse_periods(door['open']), _parse_periods(door['closed'])),
+        source_windows={source['name']: _parse_periods(source['windows']) for source in fields.get('sources', ())},
+    )
+
+
+def load_schedule(path):
+    """The ``Schedule`` in a night's ``schedule.json``; ValueError if it isn't one this reader understands."""
+    with open(path) as file:
+        document = json.load(file)
+    _check_header(document, path)
+    if document.get('kind') != 'night':
+        raise ValueError(f"{path} holds a {document.get('kind')!r} schedule; use load_schedules")
+    return _schedule(document, document)
+
+
+def load_schedules(path):
+    """Every night's ``Schedule`` in a batch file (JSON or Parquet) or a night's ``schedule.json``."""
+    if path.endswith('.parquet'):
+        return _load_parquet(path)
+    with open(path) as file:
+        document = json.load(file)
+    _check_header(document, path)
+    if document.get('kind') == 'night':
+        return [_schedule(document, document)]
+    return [_schedule(document, fields) for fields in document['nights']]
+
+
+def _load_parquet(path) -> List[Schedule]:
+    _, pq = require_pyarrow()
+    table = pq.read_table(path)
+    header = {key.decode(): json.loads(value) for key, value in (table.schema.metadata or {}).items()}
+    _check_header(header, path)
+    schedules = []
+    for row in table.to_pylist():
+        fields = {
+            'night': row['night'].isoformat(),
+            'events': {name: json_time(row[name]) for name in EVENT_NAMES},
+            'windows': dict({name: json_time(row[name]) for name in WINDOW_NAMES}, too_short=row['too_short']),
+            'illumination': row['illumination'],
+        }
+        schedules.append(_schedule(header, fields))
+    return schedules
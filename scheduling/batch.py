@@ -0,0 +1,155 @@
+"""Multi-night planning.
+
+Plans every night in a date range and writes one consolidated CSV table.
+Nights are independent, so they are fanned out over a process pool::
+
+    python -m scheduling.batch 2026-11-01 2027-04-30 -o semester.csv
+
+An output ending in ``.json`` or ``.parquet`` is written as a versioned
+schedule file instead (see scheduling.artifact; Parquet needs pyarrow).
+
+With ``--almanac`` the nights it covers are looked up instead of solved;
+when it covers the whole range, the windows of all nights are decided in
+one vectorized pass (``windows.decide_windows_arrays``), so a decade takes
+well under a second.
+
+A night is labelled by the UTC date at whose midnight its 27-hour grid
+starts, i.e. the date the scripts put in the plot title.
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time as timer
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta
+from functools import partial
+
+import numpy as np
+
+from scheduling.ephemeris import EphemerisBuffer
+from scheduling.night import NIGHT_HOURS, compute_times
+from scheduling.site import FRISCO_PEAK
+from scheduling.windows import POLICIES, SCHEDULERLILY, decide_windows_arrays, unstack_windows
+
+EVENT_COLUMNS = ('sunrise', 'sunset', 'sunrise_crit', 'sunset_crit', 'moonrise', 'moonset', 'moon_max')
+WINDOW_COLUMNS = ('start_time', 'end_time', 'start_time_2', 'end_time_2', 'data_quality_start')
+COLUMNS = ('night',) + EVENT_COLUMNS + WINDOW_COLUMNS + ('too_short', 'illumination')
+
+
+def night_range(first_night, last_night):
+    """Every date from ``first_night`` to ``last_night`` inclusive."""
+    return [first_night + timedelta(days=i) for i in range((last_night - first_night).days + 1)]
+
+
+def plan_night(night, site=FRISCO_PEAK, policy=SCHEDULERLILY, almanac=None, buffer=None):
+    """Events, window and Moon phase for one night as a table row (dict)."""
+    planned = compute_times(datetime.combine(night, time()), site, policy, almanac=almanac, buffer=buffer)
+    row = {'night': night}
+    row.update((name, getattr(planned.events, name)) for name in EVENT_COLUMNS)
+    row.update(planned.windows._asdict())
+    row['illumination'] = planned.illumination
+    return row
+
+
+def plan_nights(first_night, last_night, site=FRISCO_PEAK, policy=SCHEDULERLILY, workers=None, almanac=None):
+    """Rows for every night in the range, in date order.
+
+    ``workers=1`` plans in-process; otherwise nights are spread over a
+    process pool of ``workers`` processes (default: one per CPU). Each
+    chunk of consecutive nights gets its own copy of an ``EphemerisBuffer``,
+    so the hours a night shares with the one before are not recomputed.
+    """
+    nights = night_range(first_night, last_night)
+    if _covers(almanac, first_night, last_night, site, policy):
+        return _plan_from_almanac(almanac, nights, policy)
+    plan = partial(plan_night, site=site, policy=policy, almanac=almanac, buffer=EphemerisBuffer(site))
+    if workers == 1 or len(nights) < 2:
+        return [plan(night) for night in nights]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(nights) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(plan, nights, chunksize=chunksize))
+
+
+def _covers(almanac, first_night, last_night, site, policy):
+    return almanac is not None and almanac.covers(first_night, last_night, site, policy, 'solve', NIGHT_HOURS)
+
+
+def _plan_from_almanac(almanac, nights, policy):
+    events = almanac.event_arrays(policy, nights[0], nights[-1])
+    windows = unstack_windows(decide_windows_arrays(events, policy))
+    illumination = almanac.table['illumination'][(nights[0] - almanac.first_night).days:][:len(nights)].tolist()
+    rows = []
+    for i, night in enumerate(nights):
+        row = {'night': night}
+        row.update((name, None if np.isnat(events[name][i]) else events[name][i].astype(datetime))
+                   for name in EVENT_COLUMNS)
+        row.update(windows[i]._asdict())
+        row['illumination'] = illumination[i]
+        rows.append(row)
+    return rows
+
+
+def _format(value):
+    if value is None:
+        return ''
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def write_table(rows, file):
+    """Write planned rows as CSV to an open text file."""
+    writer = csv.DictWriter(file, fieldnames=COLUMNS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({column: _format(row[column]) for column in COLUMNS})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Plan observation windows for a range of nights.')
+    parser.add_argument('first_night', type=date.fromisoformat, help='first night, YYYY-MM-DD')
+    parser.add_argument('last_night', type=date.fromisoformat, help='last night (inclusive), YYYY-MM-DD')
+    parser.add_argument('-p', '--policy', choices=sorted(POLICIES), default=SCHEDULERLILY.name)
+    parser.add_argument('-j', '--workers', type=int, default=None, help='processes (default: one per CPU)')
+    parser.add_argument('-o', '--output',
+                        help='file to write: CSV, or a schedule file if it ends in .json or .parquet (default: stdout)')
+    parser.add_argument('-a', '--almanac', help='precomputed almanac file (see scheduling.almanac)')
+    args = parser.parse_args(argv)
+
+    if args.last_night < args.first_night:
+        parser.error('last_night is before first_night')
+    schedule_file = bool(args.output) and args.output.endswith(('.json', '.parquet'))
+    if schedule_file:
+        from scheduling.artifact import require_pyarrow, write_batch
+
+        if args.output.endswith('.parquet'):
+            try:
+                require_pyarrow()
+            except RuntimeError as e:
+                parser.error(str(e))
+
+    almanac = None
+    if args.almanac:
+        from scheduling.almanac import Almanac
+        almanac = Almanac(args.almanac)
+
+    started = timer.perf_counter()
+    rows = plan_nights(args.first_night, args.last_night, policy=POLICIES[args.policy], workers=args.workers,
+                       almanac=almanac)
+    elapsed = timer.perf_counter() - started
+
+    if schedule_file:
+        write_batch(rows, args.output, FRISCO_PEAK, POLICIES[args.policy])
+    elif args.output:
+        with open(args.output, 'w', newline='') as file:
+            write_table(rows, file)
+    else:
+        write_table(rows, sys.stdout)
+    print(f"Planned {len(rows)} nights in {elapsed:.1f} s ({len(rows) / elapsed:.1f} nights/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
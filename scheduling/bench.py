@@ -0,0 +1,225 @@
+"""Benchmarks of the nightly run, stage by stage.
+
+    python -m scheduling.bench -o bench.json
+    python -m scheduling.bench --intervals 1 5 --nights 1 7 --compare bench.json
+
+Each stage is timed on its own for every combination of plotted sampling
+interval and number of consecutive nights:
+
+* ``sun_positions``, ``moon_positions``: the scripts' ``sun_position_over_time``
+  and ``moon_position_over_time`` (grid plus altitude/azimuth series)
+* ``source_positions``: the catalog sources over the 24-hour source grid
+* ``events``: rise/set, crit and culmination times
+* ``window_decision``: ``decide_windows``
+* ``render``, ``png``, ``pdf``: drawing the chart, then encoding the image and
+  the PDF in memory
+
+Nights start at a fixed date (``--first-night``) and nothing touches the
+network or the scheduling directory, so runs on any machine can be compared.
+Results are written as JSON: the environment, then one record per stage,
+interval and night count with the best and median of ``--repeats`` runs.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time as timer
+from datetime import date, datetime, time, timedelta, timezone
+
+from scheduling.windows import POLICIES, SCHEDULERLILY
+
+SCHEMA_VERSION = 1
+FIRST_NIGHT = date(2026, 10, 19)
+INTERVALS = (1, 5, 15)
+NIGHT_COUNTS = (1, 7)
+STAGES = ('sun_positions', 'moon_positions', 'source_positions', 'events', 'window_decision', 'render', 'png', 'pdf')
+_RENDER_STAGES = ('render', 'png', 'pdf')
+
+
+def _environment():
+    import ephem
+    import numpy
+    environment = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'ephem': ephem.__version__,
+    }
+    try:
+        import matplotlib
+        environment['matplotlib'] = matplotlib.__version__
+    except ImportError:
+        pass
+    return environment
+
+
+def _stage_functions(start_dates, site, policy, interval_minutes, stages=STAGES):
+    """Zero-argument callables for every stage, each covering all the nights.
+
+    Whatever a stage consumes (grids, events, nights, figures) is prepared
+    here, outside the timed calls.
+    """
+    from scheduling.ephemeris import compute_positions, time_grid
+    from scheduling.events import moon_events, sun_events
+    from scheduling.night import NIGHT_HOURS, SOURCE_HOURS, compute_night
+    from scheduling.sources import default_sources, source_altitudes
+    from scheduling.windows import decide_windows
+
+    sources = default_sources()
+    nights = [compute_night(start_date, site, policy, interval_minutes, sources=sources) for start_date in start_dates]
+
+    def positions(bodies, hours):
+        def run():
+            for start_date in start_dates:
+                compute_positions(site, time_grid(start_date, hours, interval_minutes), bodies)
+        return run
+
+    def catalog_positions():
+        for start_date in start_dates:
+            source_altitudes(site, time_grid(start_date, SOURCE_HOURS, interval_minutes), sources)
+
+    def events():
+        for night in nights:
+            sun_events(site, night.times, night.sun_altitudes, policy.sunrise_crit_deg, policy.sunset_crit_deg)
+            moon_events(site, night.times, night.moon_altitudes, policy.moonset_deg)
+
+    def window_decision():
+        for night in nights:
+            decide_windows(night.events, policy)
+
+    functions = {
+        'sun_positions': positions(('sun',), NIGHT_HOURS),
+        'moon_positions': positions(('moon',), NIGHT_HOURS),
+        'source_positions': catalog_positions,
+        'events': events,
+        'window_decision': window_decision,
+    }
+    if any(stage in _RENDER_STAGES for stage in stages):
+        functions.update(_render_functions(nights))
+    return functions
+
+
+def _render_functions(nights):
+    from scheduling.render import image_options, render
+
+    def draw():
+        for night in nights:
+            render(night)
+
+    def encode(options):
+        def run():
+            for fig, night in figures:
+                fig.savefig(io.BytesIO(), facecolor=fig.get_facecolor(), **options(night))
+        return run
+
+    figures = [(render(night), night) for night in nights]
+    return {'render': draw, 'png': encode(image_options), 'pdf': encode(lambda night: dict(format='pdf'))}
+
+
+def _time(function, repeats):
+    seconds = []
+    for _ in range(repeats):
+        started = timer.perf_counter()
+        function()
+        seconds.append(timer.perf_counter() - started)
+    return seconds
+
+
+def run_benchmarks(first_night=FIRST_NIGHT, intervals=INTERVALS, night_counts=NIGHT_COUNTS, stages=STAGES,
+                   policy=SCHEDULERLILY, repeats=3, site=None, progress=None):
+    """Time ``stages`` for every interval and night count; returns the JSON-ready results."""
+    from scheduling.site import FRISCO_PEAK
+    site = site or FRISCO_PEAK
+    records = []
+    for interval_minutes in intervals:
+        for count in night_counts:
+            start_dates = [datetime.combine(first_night + timedelta(days=i), time()) for i in range(count)]
+            functions = _stage_functions(start_dates, site, policy, interval_minutes, stages)
+            for stage in stages:
+                seconds = _time(functions[stage], repeats)
+                record = {
+                    'stage': stage,
+                    'interval_minutes': interval_minutes,
+                    'nights': count,
+                    'repeats': repeats,
+                    'best_seconds': min(seconds),
+                    'median_seconds': statistics.median(seconds),
+                    'best_seconds_per_night': min(seconds) / count,
+                }
+                records.append(record)
+                if progress:
+                    progress(record)
+
+    return {
+        'schema': SCHEMA_VERSION,
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'first_night': first_night.isoformat(),
+        'policy': policy.name,
+        'environment': _environment(),
+        'results': records,
+    }
+
+
+def _key(record):
+    return record['stage'], record['interval_minutes'], record['nights']
+
+
+def compare(baseline, current):
+    """(stage, interval, nights, baseline best, current best, ratio) for the records both runs have."""
+    old = {_key(record): record['best_seconds'] for record in baseline['results']}
+    rows = []
+    for record in current['results']:
+        if _key(record) in old:
+            before, after = old[_key(record)], record['best_seconds']
+            rows.append(_key(record) + (before, after, after / before if before else float('inf')))
+    return rows
+
+
+def _print_record(record):
+    print(f"{record['stage']:<17} {record['interval_minutes']:>4} min {record['nights']:>4} nights "
+          f"{record['best_seconds']:>10.4f} s  ({record['best_seconds_per_night']:.4f} s/night)", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time each stage of the nightly run.')
+    parser.add_argument('--first-night', type=date.fromisoformat, default=FIRST_NIGHT,
+                        help=f'first night, YYYY-MM-DD (default: {FIRST_NIGHT})')
+    parser.add_argument('--intervals', type=int, nargs='+', default=list(INTERVALS),
+                        help='sampling intervals to sweep, minutes')
+    parser.add_argument('--nights', type=int, nargs='+', default=list(NIGHT_COUNTS),
+                        help='numbers of consecutive nights to sweep')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('-p', '--policy', choices=sorted(POLICIES), default=SCHEDULERLILY.name)
+    parser.add_argument('-r', '--repeats', type=int, default=3)
+    parser.add_argument('-o', '--output', help='JSON file to write (default: stdout)')
+    parser.add_argument('--compare', metavar='BASELINE', help='JSON from an earlier run to compare against')
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.first_night, args.intervals, args.nights, args.stages, POLICIES[args.policy],
+                             args.repeats, progress=_print_record)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=1)
+    else:
+        json.dump(results, sys.stdout, indent=1)
+        print()
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print(f"{'stage':<17} {'min':>4} {'nights':>6} {'baseline':>10} {'current':>10} {'ratio':>6}", file=sys.stderr)
+        for stage, interval_minutes, count, before, after, ratio in compare(baseline, results):
+            print(f"{stage:<17} {interval_minutes:>4} {count:>6} {before:>10.4f} {after:>10.4f} {ratio:>6.2f}",
+                  file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Persistent on-disk cache of ephemeris results.
+
+    cache = EphemerisCache(os.path.join(directory, 'ephemeris_cache'))
+    night = compute_night(start_date, site, policy, cache=cache)
+
+Each body's altitude series (per site and time grid) and each night's
+events (per site, night and thresholds) are kept in a compressed NPZ file
+named by the SHA-256 of its key, so re-running or re-rendering a night
+does no ephemeris work. Series keys include the site, the grid itself
+(hashed, so the night and the sampling interval are both covered) and the
+body (for catalog sources its coordinates, so a catalog edit is a miss).
+Solved events are bracketed on ``events.night_series``' own grid, so their
+key has the night instead and a run at any sampling interval shares them;
+scanned events are the plotted grid's samples and keep the grid. Every key
+has ``CACHE_VERSION``, which changes whenever the engine's results would.
+
+Every entry stores its key and a checksum of its arrays; one that fails to
+load or to match is deleted and recomputed. Entries are written to a
+temporary file and renamed into place, so concurrent runs never read a
+partial one. Past ``max_bytes`` the least recently used entries (by mtime,
+which a hit refreshes) are evicted.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+
+from scheduling.ephemeris import NODE_MINUTES, as_datetime64, body_key, compute_positions
+from scheduling.events import NightEvents
+from scheduling.sources import source_altitudes
+
+CACHE_VERSION = 4
+DEFAULT_MAX_BYTES = 64 * 2**20
+_SUFFIX = '.npz'
+
+
+def _grid_fields(site, times):
+    times = as_datetime64(times)
+    return {
+        'version': CACHE_VERSION,
+        'node_minutes': NODE_MINUTES,
+        'site': list(site),
+        'start': str(times[0]) if len(times) else None,
+        'samples': len(times),
+        'grid': hashlib.sha256(times.astype('int64').tobytes()).hexdigest()[:16],
+    }
+
+
+def _body_fields(body):
+    if isinstance(body, str):
+        return body.lower()
+    # Catalog Source: only what moves the altitudes, not the colour or band
+    return {'name': body.name, 'ra': body.ra, 'dec': body.dec, 'epoch': body.epoch}
+
+
+def series_key(site, times, body):
+    """Key of one body's altitude series on a time grid."""
+    return dict(_grid_fields(site, times), kind='altitude', body=_body_fields(body))
+
+
+def events_key(site, start_date, policy, mode, times=None):
+    """Key of the night's events for the policy's thresholds; in 'scan' mode, of the grid ``times`` too."""
+    key = {'version': CACHE_VERSION, 'node_minutes': NODE_MINUTES, 'site': list(site),
+           'night': str(np.datetime64(start_date, 'ms')), 'kind': 'events', 'mode': mode,
+           'sunrise_crit_deg': policy.sunrise_crit_deg, 'sunset_crit_deg': policy.sunset_crit_deg,
+           'moonset_deg': policy.moonset_deg}
+    if mode == 'scan':
+        key['grid'] = _grid_fields(site, times)['grid']
+    return key
+
+
+def _checksum(arrays):
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        array = np.ascontiguousarray(arrays[name])
+        digest.update(name.encode())
+        digest.update(str(array.dtype).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+class EphemerisCache:
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key):
+        text = json.dumps(key, sort_keys=True)
+        return os.path.join(self.directory, hashlib.sha256(text.encode()).hexdigest() + _SUFFIX)
+
+    def load(self, key):
+        """The arrays stored under ``key``, or None (and the entry removed) if missing or damaged."""
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                arrays = {name: entry[name] for name in entry.files if name not in ('key', 'checksum')}
+                stored_key, checksum = str(entry['key']), str(entry['checksum'])
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile) as e:
+            logging.warning("Discarding unreadable ephemeris cache entry %s: %s", path, e)
+            self._remove(path)
+            self.misses += 1
+            return None
+        if stored_key != json.dumps(key, sort_keys=True) or checksum != _checksum(arrays):
+            logging.warning("Discarding ephemeris cache entry %s: key or checksum mismatch", path)
+            self._remove(path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return arrays
+
+    def store(self, key, arrays, evict=True):
+        """Write ``arrays`` (dict of name -> array) under ``key``, then evict if over the size limit."""
+        path = self.path(key)
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'wb') as file:
+                np.savez_compressed(file, key=np.array(json.dumps(key, sort_keys=True)),
+                                    checksum=np.array(_checksum(arrays)), **arrays)
+            os.replace(temporary, path)
+        except BaseException:
+            self._remove(temporary)
+            raise
+        if evict:
+            self.evict()
+
+    def size(self):
+        return sum(size for _, _, size in self._entries())
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in ``max_bytes``."""
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        for _, path, _ in self._entries():
+            self._remove(path)
+
+    def altitudes(self, site, times, body, compute=None):
+        """Altitude series of 'sun' or 'moon', cached; ``compute()`` (default: the engine) fills a miss."""
+        key = series_key(site, times, body)
+        cached = self.load(key)
+        if cached is not None:
+            return cached['altitude']
+        altitude = compute() if compute else compute_positions(site, times, (body,))[body_key(body)][0]
+        self.store(key, {'altitude': altitude})
+        return altitude
+
+    def source_altitudes(self, site, times, sources):
+        """``sources.source_altitudes`` with each catalog source cached on its own.
+
+        Only the sources missing from the cache are computed, still in one pass.
+        """
+        keys = [series_key(site, times, source) for source in sources]
+        rows = [self.load(key) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            computed = source_altitudes(site, times, [sources[i] for i in missing])
+            for i, altitude in zip(missing, computed):
+                self.store(keys[i], {'altitude': altitude}, evict=False)
+                rows[i] = {'altitude': altitude}
+            self.evict()
+        if not rows:
+            return np.empty((0, len(times)))
+        return np.stack([row['altitude'] for row in rows])
+
+    def events(self, site, start_date, policy, mode, compute, times=None):
+        """The ``NightEvents`` ``compute()`` returns, cached per night, thresholds and mode (see ``events_key``)."""
+        key = events_key(site, start_date, policy, mode, times)
+        cached = self.load(key)
+        if cached is not None:
+            return NightEvents(*[None if np.isnat(t) else t.astype(object) for t in cached['times']],
+                               int(cached['evaluations']))
+        events = compute()
+        event_times = np.array([np.datetime64('NaT') if t is None else t for t in events[:-1]], dtype='datetime64[ms]')
+        self.store(key, {'times': event_times, 'evaluations': np.array(events.evaluations)})
+        return events
+
+    def _entries(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            if name.endswith(_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
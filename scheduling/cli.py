@@ -0,0 +1,228 @@
+"""Nightly run: compute one night, write eon_times.txt and schedule.json, render and publish.
+
+    python -m scheduling --policy schedulerlily
+    python -m scheduling --policy scheduler --night 2026-10-19 --no-publish
+    python -m scheduling --times-only
+
+By default the night is tomorrow (UTC), so the website shows the next
+day's schedule.
+
+``python -m scheduling.daemon`` runs the same update (``update``, then
+publishing) from one long-running process instead of a cron job.
+
+Only the standard library is imported up front. ephem/NumPy are imported
+when the night is computed and matplotlib only when a chart is rendered,
+so ``--times-only`` — the path cron and trinity.py use when they just need
+eon_times.txt — never loads it. The time spent importing each group is
+logged.
+
+``schedule.json`` (see scheduling.artifact) carries the same night in a
+versioned JSON document for everything but trinity.py; both files are
+written to a temporary file and renamed into place.
+
+When ``<directory>/almanac.bin`` (see scheduling.almanac) covers the night,
+its events and Moon phase are looked up instead of solved; ``--times-only``
+then runs no ephemeris at all.
+
+The Sun and Moon samples of the last two days are kept in
+``<directory>/ephemeris_buffer.npz``, so the hours tonight's grid shares with
+yesterday's are not recomputed.
+
+``--interval-seconds`` samples the curves on a sub-minute grid (down to 1 s,
+97,200 samples per body) for trigger/DAQ timing; the chart is still drawn
+per minute, and the run takes about as long as a 1-minute one.
+
+``--sampling adaptive`` computes the Sun and Moon from three-hourly nodes
+and calls ephem exactly only next to the policy's thresholds and the
+curves' turning points; the ephemeris stage records log the calls saved.
+
+Ephemeris series and events are cached under ``<directory>/ephemeris_cache``
+(see scheduling.cache), so re-running a night skips the ephemeris work;
+``--no-cache`` turns that off.
+
+Publishing runs update_site.exp with a timeout and retries, and only when
+the image, PDF or eon_times.txt changed since the last upload (see
+scheduling.publish); ``--publish-command`` swaps in a stand-in script.
+
+Every stage (each body's ephemeris, events, window decision, chart, each
+saved format, eon_times.txt, schedule.json, publishing) logs a ``Stage timing:`` record to
+scheduler.log; ``--profile FILE`` also writes a cProfile dump of the run.
+"""
+
+import argparse
+import logging
+import os
+import shlex
+import sys
+import time as timer
+from datetime import date, datetime, time, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from scheduling.instrument import profiled, stage
+from scheduling.windows import POLICIES, SCHEDULERLILY
+
+DEFAULT_DIRECTORY = '/data/TrinityLabComputer/scheduling/'
+CACHE_DIRECTORY = 'ephemeris_cache'  # under the scheduling directory
+ALMANAC_FILE = 'almanac.bin'
+BUFFER_FILE = 'ephemeris_buffer.npz'  # Sun/Moon samples carried over to the next night's run
+EVENT_MODES = ('solve', 'scan')  # scheduling.events.MODES, listed here to keep ephem out of startup
+SAMPLING_MODES = ('nodes', 'adaptive')  # scheduling.ephemeris.SAMPLING_MODES, likewise
+
+
+def tomorrow_utc():
+    return datetime.now(timezone.utc).date() + timedelta(days=1)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Compute, render and publish the observation schedule for one night.')
+    parser.add_argument('--night', type=date.fromisoformat, default=None,
+                        help='UTC date the 27-hour grid starts on, YYYY-MM-DD (default: tomorrow)')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default=SCHEDULERLILY.name)
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY,
+                        help='scheduling directory holding scheduler.log, eon_times.txt and update_site.exp')
+    resolution = parser.add_mutually_exclusive_group()
+    resolution.add_argument('--interval-minutes', type=int, default=1, help='sampling interval of the plotted curves')
+    resolution.add_argument('--interval-seconds', type=float, default=None,
+                            help='sub-minute sampling interval (e.g. 10 or 1) instead of --interval-minutes')
+    parser.add_argument('--event-mode', choices=EVENT_MODES, default='solve')
+    parser.add_argument('--sampling', choices=SAMPLING_MODES, default='nodes',
+                        help="'adaptive': coarse Sun/Moon nodes, exact ephem only near thresholds and turning points")
+    parser.add_argument('--times-only', action='store_true',
+                        help='headless: only compute the times and write eon_times.txt (no chart, no publish)')
+    parser.add_argument('--no-render', action='store_true', help='skip the image and PDF')
+    parser.add_argument('--no-publish', action='store_true', help='do not run update_site.exp')
+    parser.add_argument('--force-publish', action='store_true', help='publish even if no file changed')
+    parser.add_argument('--publish-command', type=shlex.split, default=None, metavar='COMMAND',
+                        help='run COMMAND (e.g. a local stand-in script) instead of "sudo ./update_site.exp"')
+    parser.add_argument('--publish-timeout', type=float, default=None, metavar='SECONDS',
+                        help='kill an upload attempt after SECONDS (default: 300)')
+    parser.add_argument('--publish-retries', type=int, default=None, help='retries of a failed upload (default: 3)')
+    parser.add_argument('--almanac', metavar='FILE',
+                        help=f'precomputed almanac to look events up in (default: {ALMANAC_FILE} in the directory, '
+                             'if present)')
+    parser.add_argument('--no-cache', action='store_true', help='always recompute the ephemeris')
+    parser.add_argument('--cache-mb', type=float, default=64, help='size limit of the ephemeris cache, MB')
+    parser.add_argument('--profile', metavar='FILE', help='write a cProfile (pstats) dump of the whole run to FILE')
+    return parser.parse_args(argv)
+
+
+def _open_almanac(args):
+    path = args.almanac or os.path.join(args.directory, ALMANAC_FILE)
+    if not os.path.exists(path):
+        if args.almanac:
+            logging.warning("Almanac %s not found, computing events live", path)
+        return None
+    from scheduling.almanac import Almanac
+    try:
+        return Almanac(path)
+    except (OSError, ValueError) as e:
+        logging.warning("Ignoring almanac %s: %s", path, e)
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(filename=os.path.join(args.directory, 'scheduler.log'), level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    with profiled(args.profile), stage('run', policy=args.policy, times_only=args.times_only):
+        return _run(args)
+
+
+class Resources(NamedTuple):
+    """What a run opens from the scheduling directory; the daemon keeps it between runs."""
+    almanac: Optional[object]  # scheduling.almanac.Almanac
+    buffer: object  # scheduling.ephemeris.EphemerisBuffer
+    cache: Optional[object]  # scheduling.cache.EphemerisCache
+
+
+def open_resources(args):
+    from scheduling.ephemeris import EphemerisBuffer
+    from scheduling.site import FRISCO_PEAK
+
+    cache = None
+    if not (args.times_only or args.no_cache):
+        from scheduling.cache import EphemerisCache
+        cache = EphemerisCache(os.path.join(args.directory, CACHE_DIRECTORY), int(args.cache_mb * 2**20))
+    return Resources(_open_almanac(args), EphemerisBuffer.load(os.path.join(args.directory, BUFFER_FILE), FRISCO_PEAK),
+                     cache)
+
+
+def _run(args):
+    paths = update(args)
+    if not (args.times_only or args.no_publish):
+        from scheduling.publish import publish
+        with stage('publish') as record:
+            record['status'] = publish(args.directory, paths, force=args.force_publish, **publish_options(args))
+    return 0
+
+
+def publish_options(args):
+    """``publish.publish_files`` keywords set on the command line."""
+    return {name: value for name, value in (('command', args.publish_command), ('timeout', args.publish_timeout),
+                                            ('retries', args.publish_retries)) if value is not None}
+
+
+def update(args, resources=None, chart=None):
+    """Compute the night and write its files; returns the paths to publish.
+
+    ``resources`` (default: opened from ``args.directory``) are used and
+    left open, so a long-running caller can pass the same ones every time,
+    and likewise ``chart``, a ``render.ChartTemplate`` to draw on (default:
+    a new figure).
+    """
+    started = timer.perf_counter()
+    from scheduling.artifact import SCHEDULE_FILE, write_schedule
+    from scheduling.night import compute_night, compute_times
+    from scheduling.output import log_times, write_eon_times
+    from scheduling.site import FRISCO_PEAK
+    import_seconds = timer.perf_counter() - started
+    logging.info("Imported ephemeris modules in %.3f s", import_seconds)
+
+    almanac, buffer, cache = resources or open_resources(args)
+    if cache is not None:
+        hits, misses = cache.hits, cache.misses
+    samples_computed, samples_reused, ephem_calls = buffer.samples_computed, buffer.samples_reused, buffer.ephem_calls
+
+    started = timer.perf_counter()
+    start_date = datetime.combine(args.night or tomorrow_utc(), time())
+    policy = POLICIES[args.policy]
+    if args.times_only:
+        night = compute_times(start_date, FRISCO_PEAK, policy, args.event_mode, almanac, buffer)
+    else:
+        night = compute_night(start_date, FRISCO_PEAK, policy, args.interval_minutes, args.event_mode, cache=cache,
+                              almanac=almanac, buffer=buffer, sampling=args.sampling,
+                              interval_seconds=args.interval_seconds)
+        if cache is not None:
+            logging.info("Ephemeris cache: %d hits, %d misses", cache.hits - hits, cache.misses - misses)
+    compute_seconds = timer.perf_counter() - started
+    if buffer.samples_computed > samples_computed:
+        logging.info("Ephemeris buffer: %d samples computed, %d reused, %d ephem calls",
+                     buffer.samples_computed - samples_computed, buffer.samples_reused - samples_reused,
+                     buffer.ephem_calls - ephem_calls)
+        try:
+            buffer.save(os.path.join(args.directory, BUFFER_FILE))
+        except OSError as e:
+            logging.warning("Could not save the ephemeris buffer: %s", e)
+    if night.windows.too_short:
+        print("Observation window too short.")
+
+    log_times(night)
+    published = [os.path.join(args.directory, 'eon_times.txt')]
+    with stage('write_eon_times'):
+        write_eon_times(night, published[0])
+    print("Times have been written to eon_times.txt")
+    with stage('write_schedule'):
+        write_schedule(night, os.path.join(args.directory, SCHEDULE_FILE), FRISCO_PEAK)
+
+    if args.times_only:
+        print(f"imports {import_seconds:.3f} s, compute {compute_seconds:.3f} s", file=sys.stderr)
+        return published
+
+    if not args.no_render:
+        started = timer.perf_counter()
+        from scheduling.render import render, save_outputs
+        logging.info("Imported matplotlib in %.3f s", timer.perf_counter() - started)
+        with stage('render', variant=night.policy.variant, template=chart is not None):
+            fig = render(night) if chart is None else chart.render(night)
+        published += save_outputs(fig, night, args.directory)
+    return published
@@ -0,0 +1,106 @@
+"""Side-by-side comparison of scheduling policies on one night.
+
+The ephemeris is computed once and every policy is evaluated against it
+(``night.compute_nights``)::
+
+    python -m scheduling.compare --night 2026-10-19
+    python -m scheduling.compare --night 2026-10-19 --csv comparison.csv --plot comparison.png
+
+The table has one column per policy: the thresholds, the events they
+select, the windows and the door open/closed hours.
+"""
+
+import argparse
+import csv
+import sys
+from datetime import date, datetime, time
+
+from scheduling.windows import POLICIES
+
+ROWS = ('sunrise_crit_deg', 'sunset_crit_deg', 'moonset_deg', 'sunset_crit', 'sunrise_crit', 'moonset', 'moon_max',
+        'start_time', 'end_time', 'start_time_2', 'end_time_2', 'data_quality_start', 'too_short', 'window_hours',
+        'door_open_hours', 'door_closed_hours', 'evaluations')
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 2)
+
+
+def comparison(nights):
+    """``{row: [value per night]}`` for ``nights`` (one ``Night`` per policy), rows in ``ROWS`` order."""
+    from scheduling.masks import door_states
+
+    columns = []
+    for night in nights:
+        policy, events, windows = night.policy, night.events, night.windows
+        door = door_states(night)
+        column = {
+            'sunrise_crit_deg': policy.sunrise_crit_deg,
+            'sunset_crit_deg': policy.sunset_crit_deg,
+            'moonset_deg': policy.moonset_deg,
+            'window_hours': (_hours(windows.end_time - windows.start_time)
+                             if windows.start_time is not None and windows.end_time is not None else None),
+            'door_open_hours': _hours(door.open.duration()),
+            'door_closed_hours': _hours(door.closed.duration()),
+            'evaluations': events.evaluations,
+        }
+        column.update(events._asdict())
+        column.update(windows._asdict())
+        columns.append(column)
+    return {row: [column[row] for column in columns] for row in ROWS}
+
+
+def _text(value):
+    if value is None:
+        return '-'
+    if isinstance(value, datetime):
+        return value.strftime('%m-%d %H:%M:%S')
+    return str(value)
+
+
+def write_text(names, table, file):
+    """The comparison as an aligned text table."""
+    rows = [[''] + list(names)] + [[row] + [_text(value) for value in values] for row, values in table.items()]
+    widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print('  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip(), file=file)
+
+
+def write_csv(names, table, file):
+    writer = csv.writer(file)
+    writer.writerow(['row'] + list(names))
+    for row, values in table.items():
+        writer.writerow([row] + ['' if value is None else value.isoformat() if isinstance(value, datetime) else value
+                                 for value in values])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare scheduling policies on one night, computing it once.')
+    parser.add_argument('--night', type=date.fromisoformat, required=True,
+                        help='UTC date the 27-hour grid starts on, YYYY-MM-DD')
+    parser.add_argument('--policies', nargs='+', choices=sorted(POLICIES), default=list(POLICIES),
+                        help='policies to compare (default: all)')
+    parser.add_argument('--event-mode', choices=('solve', 'scan'), default='solve')
+    parser.add_argument('--csv', metavar='FILE', help='also write the table as CSV')
+    parser.add_argument('--plot', metavar='FILE', help='write a chart with the policies overlaid (format from suffix)')
+    args = parser.parse_args(argv)
+
+    from scheduling.night import compute_nights
+    from scheduling.site import FRISCO_PEAK
+
+    policies = [POLICIES[name] for name in dict.fromkeys(args.policies)]
+    nights = compute_nights(datetime.combine(args.night, time()), FRISCO_PEAK, policies, event_mode=args.event_mode)
+    table = comparison(nights.values())
+    write_text(nights, table, sys.stdout)
+    if args.csv:
+        with open(args.csv, 'w', newline='') as file:
+            write_csv(nights, table, file)
+    if args.plot:
+        from scheduling.render import render_comparison
+
+        render_comparison(nights.values()).savefig(args.plot, dpi=200)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
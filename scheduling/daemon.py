@@ -0,0 +1,228 @@
+"""Long-running scheduler: the nightly run without the cold start.
+
+    python -m scheduling.daemon --at 12:00 --config /data/TrinityLabComputer/scheduling/scheduler.json
+    python -m scheduling.daemon --every 6 -- --policy scheduler --no-publish
+
+Instead of cron starting a fresh interpreter each day, the daemon imports
+ephem, NumPy and matplotlib once, keeps the almanac, the ephemeris buffer
+and cache open, redraws one chart (``render.ChartTemplate``) instead of
+building a figure per update, and updates the schedule (``cli.update``, then
+``publish.publish_files``) for the next night:
+
+- at startup,
+- every ``--every`` hours, starting from ``--at`` (UTC),
+- on SIGHUP, which also re-reads ``--config``,
+- on SIGUSR1,
+- when ``--config`` changes (its mtime is polled every ``--poll`` seconds).
+
+SIGTERM and SIGINT stop it once the running update finishes. Arguments
+after ``--`` and the config file are the nightly run's options (see
+``python -m scheduling --help``); the config is a JSON object of them,
+e.g. ``{"policy": "scheduler", "interval-seconds": 10, "no-publish": true}``,
+and wins over the command line. A config that doesn't parse is logged and
+the previous one kept.
+
+Computing and rendering run in one worker thread and publishing is awaited
+on the event loop, so signals and the timer are handled throughout; updates
+never overlap. Each one logs an ``update`` stage record with its reason.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time, timedelta, timezone
+
+from scheduling import cli
+from scheduling.instrument import stage
+
+DEFAULT_AT = time(12)
+DEFAULT_EVERY_HOURS = 24.0
+DEFAULT_POLL_SECONDS = 5.0
+
+
+def config_argv(config):
+    """A config object (``{"option": value}``) as nightly-run arguments."""
+    argv = []
+    for key, value in config.items():
+        flag = '--' + key.replace('_', '-')
+        if value is True:
+            argv.append(flag)
+        elif isinstance(value, list):
+            argv += [flag] + [str(item) for item in value]
+        elif value is not None and value is not False:
+            argv += [flag, str(value)]
+    return argv
+
+
+def next_run(now, at, every):
+    """The first time after ``now`` of the series ``at`` (today), ``at`` + ``every``, ..."""
+    run = datetime.combine(now.date(), at)
+    while run - every > now:
+        run -= every
+    while run <= now:
+        run += every
+    return run
+
+
+def _now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Daemon:
+    def __init__(self, argv=(), config=None, at=DEFAULT_AT, every=timedelta(hours=DEFAULT_EVERY_HOURS),
+                 poll=DEFAULT_POLL_SECONDS):
+        self.argv = list(argv)
+        self.config = config
+        self.at = at
+        self.every = every
+        self.poll = poll
+        self.config_mtime = None
+        self.args = None
+        self.resources = None
+        self.chart = None  # render.ChartTemplate, made on the first update that renders
+        self.updates = 0
+        self._reasons = []
+        self._requested = None
+        self._stopping = False
+        # One thread: updates never overlap, and the chart template is only drawn on from it
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='update')
+
+    def options(self):
+        """The nightly-run arguments of the command line and the config, or None if the config is invalid."""
+        config = {}
+        if self.config:
+            try:
+                self.config_mtime = os.stat(self.config).st_mtime
+                with open(self.config) as file:
+                    config = json.load(file)
+                if not isinstance(config, dict):
+                    raise ValueError("not a JSON object")
+            except (OSError, ValueError) as e:
+                logging.error("Ignoring config %s: %s", self.config, e)
+                return None
+        try:
+            return cli.parse_args(self.argv + config_argv(config))
+        except SystemExit:  # argparse has printed why
+            logging.error("Ignoring config %s: invalid options", self.config)
+            return None
+
+    def load(self):
+        """(Re)read the config and open the resources; False, keeping the old ones, if it is invalid."""
+        args = self.options()
+        if args is None:
+            return False
+        if args != self.args:
+            self.args = args
+            self.resources = cli.open_resources(args)
+        return True
+
+    def request(self, reason):
+        """Ask for an update (thread-safe only from the event loop, e.g. a signal handler)."""
+        self._reasons.append(reason)
+        self._requested.set()
+
+    def stop(self):
+        self._stopping = True
+        self._requested.set()
+
+    def _config_changed(self):
+        if not self.config:
+            return False
+        try:
+            return os.stat(self.config).st_mtime != self.config_mtime
+        except FileNotFoundError:
+            return False
+
+    async def update(self, reason):
+        """Compute, write and publish the next night; errors are logged and the daemon carries on."""
+        args = self.args
+        with stage('update', reason=reason, policy=args.policy) as record:
+            try:
+                if self.chart is None and not (args.times_only or args.no_render):
+                    from scheduling.render import ChartTemplate
+                    self.chart = ChartTemplate()
+                paths = await asyncio.get_running_loop().run_in_executor(self._worker, cli.update, args,
+                                                                         self.resources, self.chart)
+                if not (args.times_only or args.no_publish):
+                    from scheduling.publish import publish_files
+                    record['publish'] = await publish_files(args.directory, paths, force=args.force_publish,
+                                                            **cli.publish_options(args))
+            except Exception:
+                record['failed'] = True
+                logging.exception("Update (%s) failed", reason)
+        self.updates += 1
+
+    async def run(self):
+        """Serve until SIGTERM/SIGINT (or ``stop()``)."""
+        loop = asyncio.get_running_loop()
+        self._requested = asyncio.Event()
+        for signum, handler in ((signal.SIGHUP, lambda: self.request('reload')),
+                                (signal.SIGUSR1, lambda: self.request('signal')),
+                                (signal.SIGTERM, self.stop), (signal.SIGINT, self.stop)):
+            loop.add_signal_handler(signum, handler)
+        if self.args is None and not self.load():
+            raise SystemExit(f"No valid configuration in {self.config}")
+        reason = 'startup'
+        due = next_run(_now(), self.at, self.every)
+        while not self._stopping:
+            await self.update(reason)
+            logging.info("Next update at %s UTC", due)
+            reason = None
+            while reason is None and not self._stopping:
+                timeout = min(self.poll, max(0.0, (due - _now()).total_seconds()))
+                try:
+                    await asyncio.wait_for(self._requested.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                self._requested.clear()
+                if self._reasons:
+                    reason = self._reasons[0]
+                    self._reasons.clear()
+                    if reason == 'reload' and not self.load():
+                        reason = None
+                elif self._config_changed():
+                    reason = 'config' if self.load() else None
+                elif _now() >= due:
+                    reason = 'timer'
+                    due = next_run(_now(), self.at, self.every)
+        self._worker.shutdown()
+        logging.info("Scheduler daemon stopped after %d updates", self.updates)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Keep the schedule up to date from one long-running process.',
+                                     epilog='Options after -- are passed to the nightly run (python -m scheduling).')
+    parser.add_argument('--config', metavar='FILE', help='JSON object of nightly-run options, re-read when it changes')
+    parser.add_argument('--at', type=time.fromisoformat, default=DEFAULT_AT,
+                        help='UTC time of day of the scheduled updates, HH:MM (default: %(default)s)')
+    parser.add_argument('--every', type=float, default=DEFAULT_EVERY_HOURS, metavar='HOURS',
+                        help='hours between scheduled updates (default: %(default)s)')
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_SECONDS, metavar='SECONDS',
+                        help='how often to check the config for changes (default: %(default)s)')
+    parser.add_argument('nightly', nargs=argparse.REMAINDER, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.every <= 0:
+        parser.error('--every must be positive')
+    nightly = args.nightly[1:] if args.nightly[:1] == ['--'] else args.nightly
+
+    daemon = Daemon(nightly, args.config, args.at, timedelta(hours=args.every), args.poll)
+    options = daemon.options()
+    if options is None:
+        parser.error(f"no valid configuration in {args.config}")
+    # Before anything logs: the first message without a handler would set up stderr logging instead
+    logging.basicConfig(filename=os.path.join(options.directory, 'scheduler.log'), level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.info("Scheduler daemon started (pid %d)", os.getpid())
+    if not daemon.load():
+        parser.error(f"no valid configuration in {args.config}")
+    asyncio.run(daemon.run())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
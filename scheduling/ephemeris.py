@@ -0,0 +1,494 @@
+"""Batch ephemeris engine.
+
+The scripts used to build a fresh ``ephem.Sun``/``ephem.Moon`` for every
+minute of the night. Here ephem is only evaluated on a coarse grid of nodes
+(every ``NODE_MINUTES``); the topocentric hour angle and declination are
+interpolated onto the requested time grid with a four-point Lagrange
+polynomial and turned into altitude/azimuth with NumPy, applying the same
+refraction model libastro uses.
+
+Against a per-sample ``body.compute(observer)`` the altitudes and azimuths
+agree to better than ``ALTITUDE_TOLERANCE`` degrees for the Sun and the Moon
+(see ``compare_with_ephem``).
+
+Fixed sources take a shorter path (``fixed_altaz``): their apparent RA/Dec
+is computed once per night, the hour angle comes from the local sidereal
+time, and only the sidereal time is evaluated on the nodes. What that
+ignores, the drift of aberration, precession and nutation over half a
+night, stays below ``FIXED_TOLERANCE`` (see ``compare_fixed_with_ephem``).
+
+Times are handled as ``datetime64[ms]`` arrays (naive UTC, like the rest of
+the scheduler) and converted to ephem day numbers internally.
+"""
+
+import math
+import os
+
+import ephem
+import numpy as np
+
+NODE_MINUTES = 60
+ALTITUDE_TOLERANCE = 1e-3  # degrees
+FIXED_TOLERANCE = 3e-4  # degrees, fixed sources; about 0.5 arcsec measured over a year of nights
+APPARENT_DAYS = 1.0  # fixed sources: apparent coordinates are recomputed once per this span
+SETTING_MARGIN_DEG = 1.0  # fixed_altaz(setting_through=...): covers refraction at the horizon (~0.6 degrees)
+
+_EPHEM_EPOCH = np.datetime64('1899-12-31T12:00:00', 'ms')
+_MS_PER_DAY = 86400000
+_REFRACTION_ITERATIONS = 8
+_REFRACTION_TOLERANCE = 1e-10  # radians, Newton converges in about six steps
+
+SAMPLING_MODES = ('nodes', 'adaptive')
+COARSE_NODE_MINUTES = 180  # adaptive sampling: Sun within 1e-4, Moon within 0.015 degrees
+REFINE_MARGIN_DEG = 0.05  # adaptive sampling: samples this close to a threshold are evaluated exactly
+REFINE_SAMPLES = 2  # adaptive sampling: exact samples on either side of a crossing or maximum
+
+
+def make_observer(site, date=None):
+    observer = ephem.Observer()
+    observer.lat = str(site.latitude)
+    observer.lon = str(site.longitude)
+    observer.elevation = site.elevation
+    if date is not None:
+        observer.date = date
+    return observer
+
+
+def as_datetime64(times):
+    return np.asarray(times, dtype='datetime64[ms]')
+
+
+def ephem_days(times):
+    """Convert naive UTC times to ephem day numbers (float array)."""
+    return (as_datetime64(times) - _EPHEM_EPOCH).astype('int64') / _MS_PER_DAY
+
+
+def from_ephem_days(days):
+    """Inverse of ``ephem_days``, rounded to the millisecond."""
+    ms = np.rint(np.asarray(days, dtype=float) * _MS_PER_DAY).astype('int64')
+    return _EPHEM_EPOCH + ms.astype('timedelta64[ms]')
+
+
+def time_grid(start_date, hours=27, interval_minutes=1, interval_seconds=None):
+    """Sample times laid out exactly like the scripts' hour/minute loops.
+
+    ``interval_seconds`` (fractional down to a millisecond) replaces
+    ``interval_minutes`` for sub-minute grids; like the minute loops, the
+    samples restart at the top of every hour.
+    """
+    step = round(interval_seconds * 1000) if interval_seconds is not None else interval_minutes * 60000
+    if step <= 0:
+        raise ValueError("Sampling interval must be at least a millisecond")
+    offsets = np.arange(hours)[:, np.newaxis] * 3600000 + np.arange(0, 3600000, step)
+    return np.datetime64(start_date, 'ms') + offsets.ravel().astype('timedelta64[ms]')
+
+
+def resolve_body(body):
+    """Accept 'sun', 'moon' or any ephem body and return an ephem body."""
+    if isinstance(body, str):
+        bodies = {'sun': ephem.Sun, 'moon': ephem.Moon}
+        try:
+            return bodies[body.lower()]()
+        except KeyError:
+            raise ValueError(f"Unknown body {body!r}; pass 'sun', 'moon' or an ephem body") from None
+    return body
+
+
+def body_key(body):
+    return body.lower() if isinstance(body, str) else body.name
+
+
+def node_days(days, node_minutes=NODE_MINUTES):
+    """Node grid aligned to multiples of ``node_minutes`` and padded for interpolation."""
+    step = node_minutes / 1440.0
+    first = math.floor(np.min(days) / step) - 1
+    last = math.ceil(np.max(days) / step) + 2
+    return np.arange(first, last + 1) * step
+
+
+def hour_angle_declination(body, site, days):
+    """Topocentric apparent hour angle (unwrapped) and declination in radians.
+
+    This is the only place ephem is evaluated; one call per entry of ``days``.
+    """
+    observer = make_observer(site)
+    body = resolve_body(body)
+    ha = np.empty(len(days))
+    dec = np.empty(len(days))
+    for i, day in enumerate(days):
+        observer.date = day
+        body.compute(observer)
+        ha[i] = observer.sidereal_time() - body.ra
+        dec[i] = body.dec
+    return np.unwrap(ha), dec
+
+
+def apparent_coordinates(bodies, site, days):
+    """Topocentric apparent RA and Dec (radians) of ``bodies`` at each of ``days``.
+
+    Both arrays have shape ``(len(bodies), len(days))``.
+    """
+    observer = make_observer(site)
+    ra = np.empty((len(bodies), len(days)))
+    dec = np.empty((len(bodies), len(days)))
+    for j, day in enumerate(days):
+        observer.date = day
+        for i, body in enumerate(bodies):
+            body.compute(observer)
+            ra[i, j] = body.ra
+            dec[i, j] = body.dec
+    return ra, dec
+
+
+def sidereal_time(site, days, node_minutes=NODE_MINUTES):
+    """Local apparent sidereal time (radians, unwrapped) over ``days``; ephem runs on the nodes only."""
+    nodes = node_days(days, node_minutes)
+    observer = make_observer(site)
+    lst = np.empty(len(nodes))
+    for j, day in enumerate(nodes):
+        observer.date = day
+        lst[j] = observer.sidereal_time()
+    return interpolate(nodes, np.unwrap(lst), days)
+
+
+def interpolate(nodes, values, days):
+    """Four-point Lagrange interpolation on an evenly spaced node grid (along the last axis of ``values``)."""
+    step = nodes[1] - nodes[0]
+    x = (np.asarray(days, dtype=float) - nodes[0]) / step
+    i = np.clip(np.floor(x).astype(int), 1, len(nodes) - 3)
+    u = x - i
+    return (-u * (u - 1) * (u - 2) / 6 * values[..., i - 1]
+            + (u + 1) * (u - 1) * (u - 2) / 2 * values[..., i]
+            - (u + 1) * u * (u - 2) / 2 * values[..., i + 1]
+            + (u + 1) * u * (u - 1) / 6 * values[..., i + 2])
+
+
+def _unrefract(apparent, pressure, temperature):
+    # libastro's unrefract(): apparent -> true altitude, radians.
+    aadeg = np.degrees(apparent)
+    a = ((2e-5 * aadeg + 1.96e-2) * aadeg + 0.1594) * pressure
+    b = (273 + temperature) * ((8.45e-2 * aadeg + 5.05e-1) * aadeg + 1)
+    r = np.radians(a / b)
+    low = np.where((apparent < 0) & (r < 0), apparent, apparent - r)
+    with np.errstate(divide='ignore'):
+        high = apparent - 7.888888e-5 * pressure / ((273 + temperature) * np.tan(apparent))
+    blend = np.clip((aadeg - 14.5) / (15.5 - 14.5), 0.0, 1.0)
+    return low + blend * (high - low)
+
+
+def refract(true_alt, pressure=1010.0, temperature=15.0):
+    """True -> apparent altitude (radians), inverting libastro's model with Newton steps."""
+    if pressure <= 0:
+        return true_alt
+    true_alt = np.asarray(true_alt, dtype=float)
+    apparent = true_alt.copy()
+    flat_true, flat = true_alt.reshape(-1), apparent.reshape(-1)
+    # Only samples still moving are stepped: far from the horizon that is two or three steps
+    active = np.arange(flat.size)
+    for _ in range(_REFRACTION_ITERATIONS):
+        current = flat[active]
+        guess = _unrefract(current, pressure, temperature)
+        slope = (_unrefract(current + 1e-7, pressure, temperature) - guess) / 1e-7
+        step = (guess - flat_true[active]) / np.where(slope > 0.05, slope, 1.0)
+        flat[active] = current - step
+        active = active[np.abs(step) >= _REFRACTION_TOLERANCE]
+        if not active.size:
+            break
+    return apparent
+
+
+def altaz(ha, dec, site, pressure=1010.0, temperature=15.0):
+    """Apparent altitude and azimuth in degrees from hour angle/declination in radians."""
+    lat = math.radians(site.latitude)
+    sin_alt = math.sin(lat) * np.sin(dec) + math.cos(lat) * np.cos(dec) * np.cos(ha)
+    alt = np.arcsin(np.clip(sin_alt, -1.0, 1.0))
+    az = np.arctan2(-np.cos(dec) * np.sin(ha),
+                    np.sin(dec) * math.cos(lat) - np.cos(dec) * np.cos(ha) * math.sin(lat))
+    alt = refract(alt, pressure, temperature)
+    return np.degrees(alt), np.degrees(az) % 360.0
+
+
+def body_altaz(body, site, times, node_minutes=NODE_MINUTES):
+    """Altitude and azimuth arrays (degrees) of one body over ``times``."""
+    days = ephem_days(times)
+    nodes = node_days(days, node_minutes)
+    ha, dec = hour_angle_declination(body, site, nodes)
+    observer = make_observer(site)
+    return altaz(interpolate(nodes, ha, days), interpolate(nodes, dec, days), site,
+                 observer.pressure, observer.temperature)
+
+
+def fixed_altaz(bodies, site, times, node_minutes=NODE_MINUTES, setting_through=None):
+    """Altitude and azimuth arrays (degrees), shape ``(len(bodies), len(times))``, of fixed bodies.
+
+    Each body is computed by ephem once per ``APPARENT_DAYS`` of grid (at
+    the middle of it, once for a night); the grid itself is hour angle =
+    sidereal time - RA and vectorized trigonometry across all bodies.
+    Within ``FIXED_TOLERANCE`` of per-sample ephem.
+
+    ``setting_through=(low, high)`` (degrees, scalars or one per body)
+    computes only the samples where a body sets through that band, found
+    from its hour angle, plus one sample either side; the rest are NaN.
+    """
+    days = ephem_days(times)
+    if not bodies:
+        return np.empty((0, len(days))), np.empty((0, len(days)))
+    first, span = np.min(days), np.ptp(days)
+    chunks = max(1, math.ceil(span / APPARENT_DAYS))
+    width = span / chunks or 1.0
+    chunk = np.minimum(((days - first) / width).astype(int), chunks - 1)
+    ra, dec = apparent_coordinates(bodies, site, first + (np.arange(chunks) + 0.5) * width)
+    observer = make_observer(site)
+    ha = sidereal_time(site, days, node_minutes) - ra[:, chunk]
+    if setting_through is None:
+        return altaz(ha, dec[:, chunk], site, observer.pressure, observer.temperature)
+
+    where = _setting(ha, dec, chunk, site, *setting_through)
+    altitudes, azimuths = np.full(ha.shape, np.nan), np.full(ha.shape, np.nan)
+    altitudes[where], azimuths[where] = altaz(ha[where], dec[:, chunk][where], site, observer.pressure,
+                                              observer.temperature)
+    return altitudes, azimuths
+
+
+def _setting(ha, dec, chunk, site, low, high):
+    # Western hour angles at which the geometric altitude passes high + margin, then low - margin;
+    # clipping to [0, pi] makes the span empty when the body never enters the band
+    lat = math.radians(site.latitude)
+
+    def hour_angle(altitude):
+        altitude = np.radians(np.reshape(altitude, (-1, 1)))
+        cos_ha = (np.sin(altitude) - math.sin(lat) * np.sin(dec)) / (math.cos(lat) * np.cos(dec))
+        return np.arccos(np.clip(cos_ha, -1.0, 1.0))
+
+    enters = hour_angle(np.add(high, SETTING_MARGIN_DEG))
+    leaves = hour_angle(np.subtract(low, SETTING_MARGIN_DEG))
+    where = np.mod(ha - enters[:, chunk], 2 * math.pi) <= (leaves - enters)[:, chunk]
+    where[:, 1:] |= where[:, :-1].copy()
+    where[:, :-1] |= where[:, 1:].copy()
+    return where
+
+
+def compute_positions(site, times, bodies=('sun', 'moon'), node_minutes=NODE_MINUTES):
+    """Positions of several bodies over one time grid.
+
+    Returns a dict mapping each body's key ('sun', 'moon' or the FixedBody
+    name) to an ``(altitude, azimuth)`` pair of NumPy arrays in degrees.
+    """
+    times = as_datetime64(times)
+    return {body_key(body): body_altaz(body, site, times, node_minutes) for body in bodies}
+
+
+class EphemerisBuffer:
+    """Sliding window of Sun and Moon positions, reused across overlapping requests.
+
+    Consecutive nights overlap (27-hour grids a day apart share 3 hours) and
+    nodes sit on multiples of ``node_minutes`` whatever the request, so the
+    buffer keeps the node values and the sample positions it has computed
+    for the last ``window_hours`` and only evaluates what a new request
+    adds: a run over consecutive nights costs in proportion to the new time
+    it covers. Counters: ``ephem_calls`` made, ``samples_computed`` and
+    ``samples_reused``.
+
+    ``save``/``load`` carry the buffer from one day's run to the next.
+    """
+
+    BODIES = ('sun', 'moon')
+    VERSION = 1
+
+    def __init__(self, site, node_minutes=NODE_MINUTES, window_hours=48):
+        self.site = site
+        self.node_minutes = node_minutes
+        self.window_hours = window_hours
+        self._nodes = {}  # body -> (index of the first node, hour angles, declinations)
+        self._samples = {}  # body -> (times as int64 ms, altitudes, azimuths), sorted by time
+        self.ephem_calls = 0
+        self.samples_computed = 0
+        self.samples_reused = 0
+        observer = make_observer(site)
+        self._pressure, self._temperature = observer.pressure, observer.temperature
+
+    def _check(self, body):
+        if body not in self.BODIES:
+            raise ValueError(f"EphemerisBuffer holds {self.BODIES}, not {body!r}")
+
+    def altaz(self, body, times):
+        """Altitude and azimuth arrays (degrees) of 'sun' or 'moon' over ``times``, like ``body_altaz``."""
+        self._check(body)
+        ms = as_datetime64(times).astype('int64')
+        alt, az = np.empty(len(ms)), np.empty(len(ms))
+        known_ms, known_alt, known_az = self._samples.get(body, (np.empty(0, 'int64'), np.empty(0), np.empty(0)))
+        index = np.minimum(np.searchsorted(known_ms, ms), max(len(known_ms) - 1, 0))
+        hit = known_ms[index] == ms if len(known_ms) else np.zeros(len(ms), dtype=bool)
+        alt[hit], az[hit] = known_alt[index[hit]], known_az[index[hit]]
+        new = ~hit
+        if new.any():
+            days = ephem_days(ms[new].astype('datetime64[ms]'))
+            nodes, ha, dec = self._node_values(body, days)
+            alt[new], az[new] = altaz(interpolate(nodes, ha, days), interpolate(nodes, dec, days), self.site,
+                                      self._pressure, self._temperature)
+            self._remember(body, ms[new], alt[new], az[new])
+        self.samples_reused += int(hit.sum())
+        self.samples_computed += int(new.sum())
+        return alt, az
+
+    def _node_values(self, body, days):
+        step = self.node_minutes / 1440.0
+        first = math.floor(np.min(days) / step) - 1
+        last = math.ceil(np.max(days) / step) + 2
+        start, ha, dec = self._nodes.get(body, (None, np.empty(0), np.empty(0)))
+        end = None if start is None else start + len(ha) - 1
+        if start is None or last < start - 1 or first > end + 1:
+            start, ha, dec = first, *self._evaluate(body, first, last)
+        else:
+            if first < start:
+                left_ha, left_dec = self._evaluate(body, first, start - 1)
+                ha, dec, start = np.concatenate((left_ha, ha)), np.concatenate((left_dec, dec)), first
+            if last > end:
+                right_ha, right_dec = self._evaluate(body, end + 1, last)
+                ha, dec = np.concatenate((ha, right_ha)), np.concatenate((dec, right_dec))
+        selected = slice(first - start, last - start + 1)
+        values = np.arange(first, last + 1) * step, np.unwrap(ha[selected]), dec[selected]
+        self._nodes[body] = self._trim_nodes(start, ha, dec)
+        return values
+
+    def _evaluate(self, body, first, last):
+        step = self.node_minutes / 1440.0
+        self.ephem_calls += last - first + 1
+        return hour_angle_declination(body, self.site, np.arange(first, last + 1) * step)
+
+    def _trim_nodes(self, start, ha, dec):
+        keep = int(self.window_hours * 60 / self.node_minutes) + 4
+        if len(ha) <= keep:
+            return start, ha, dec
+        drop = len(ha) - keep
+        return start + drop, ha[drop:], dec[drop:]
+
+    def _remember(self, body, ms, alt, az):
+        known_ms, known_alt, known_az = self._samples.get(body, (np.empty(0, 'int64'), np.empty(0), np.empty(0)))
+        ms, unique = np.unique(np.concatenate((known_ms, ms)), return_index=True)
+        alt, az = np.concatenate((known_alt, alt))[unique], np.concatenate((known_az, az))[unique]
+        keep = ms >= ms[-1] - int(self.window_hours * 3600 * 1000)
+        self._samples[body] = ms[keep], alt[keep], az[keep]
+
+    def save(self, path):
+        """Write the buffer to ``path`` (NPZ) so the next run can ``load`` it."""
+        arrays = {'version': np.array(self.VERSION), 'site': np.array(self.site, dtype=float),
+                  'node_minutes': np.array(self.node_minutes)}
+        for body, (start, ha, dec) in self._nodes.items():
+            arrays.update({f'{body}_node_start': np.array(start), f'{body}_ha': ha, f'{body}_dec': dec})
+        for body, (ms, alt, az) in self._samples.items():
+            arrays.update({f'{body}_ms': ms, f'{body}_alt': alt, f'{body}_az': az})
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as file:
+            np.savez(file, **arrays)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, site, node_minutes=NODE_MINUTES, window_hours=48):
+        """A buffer restored from ``path``; empty if the file is missing or was saved for another site."""
+        buffer = cls(site, node_minutes, window_hours)
+        try:
+            with np.load(path) as saved:
+                if (int(saved['version']) != cls.VERSION or int(saved['node_minutes']) != node_minutes
+                        or tuple(saved['site']) != tuple(float(value) for value in site)):
+                    return buffer
+                for body in cls.BODIES:
+                    if f'{body}_ha' in saved.files:
+                        buffer._nodes[body] = (int(saved[f'{body}_node_start']), saved[f'{body}_ha'],
+                                               saved[f'{body}_dec'])
+                    if f'{body}_ms' in saved.files:
+                        buffer._samples[body] = saved[f'{body}_ms'], saved[f'{body}_alt'], saved[f'{body}_az']
+        except (OSError, ValueError, KeyError):
+            return cls(site, node_minutes, window_hours)
+        return buffer
+
+
+def refine_mask(altitudes, thresholds, margin=REFINE_MARGIN_DEG, samples=REFINE_SAMPLES):
+    """Samples where the series decides something: near a threshold crossing or a turning point."""
+    altitudes = np.asarray(altitudes, dtype=float)
+    marked = np.zeros(len(altitudes), dtype=bool)
+    if len(altitudes) < 2:
+        return marked | True
+    events = np.zeros(len(altitudes), dtype=bool)
+    for threshold in thresholds:
+        above = altitudes > threshold
+        events[:-1] |= above[:-1] != above[1:]
+        marked |= np.abs(altitudes - threshold) < margin
+    rising = np.diff(altitudes) > 0
+    events[1:-1] |= rising[:-1] != rising[1:]
+    for offset in range(-samples, samples + 2):
+        shifted = np.roll(events, offset)
+        if offset > 0:
+            shifted[:offset] = False
+        elif offset < 0:
+            shifted[offset:] = False
+        marked |= shifted
+    return marked
+
+
+def adaptive_altaz(body, site, times, thresholds=(), coarse_minutes=COARSE_NODE_MINUTES):
+    """``body_altaz`` with ephem spent where it matters; returns ``(altitude, azimuth, ephem calls)``.
+
+    The series is first interpolated from nodes every ``coarse_minutes``;
+    then the samples next to a crossing of one of ``thresholds``, next to
+    a local maximum, or within ``REFINE_MARGIN_DEG`` of a threshold are
+    evaluated exactly with ephem. Elsewhere the curve is only plotted, and
+    the coarse nodes are more than accurate enough for that.
+    """
+    days = ephem_days(times)
+    nodes = node_days(days, coarse_minutes)
+    ha, dec = hour_angle_declination(body, site, nodes)
+    observer = make_observer(site)
+    alt, az = altaz(interpolate(nodes, ha, days), interpolate(nodes, dec, days), site,
+                    observer.pressure, observer.temperature)
+    target = resolve_body(body)
+    exact = np.zeros(len(days), dtype=bool)
+    # Exact values can move a crossing or turning point off the refined stretch: repeat until it settles
+    while True:
+        refine = np.flatnonzero(refine_mask(alt, thresholds) & ~exact)
+        if not len(refine):
+            break
+        for i in refine:
+            observer.date = days[i]
+            target.compute(observer)
+            alt[i], az[i] = math.degrees(target.alt), math.degrees(target.az)
+        exact[refine] = True
+    return alt, az, len(nodes) + int(exact.sum())
+
+
+def moon_illumination(site, date):
+    """Moon phase at ``date`` in whole percent."""
+    moon = ephem.Moon()
+    moon.compute(make_observer(site, date))
+    return round(moon.moon_phase * 100)
+
+
+def compare_with_ephem(site, times, bodies=('sun', 'moon'), node_minutes=NODE_MINUTES):
+    """Largest |engine - ephem| altitude and azimuth difference per body, in degrees."""
+    times = as_datetime64(times)
+    return _ephem_errors(site, times, bodies, compute_positions(site, times, bodies, node_minutes))
+
+
+def compare_fixed_with_ephem(site, times, bodies, node_minutes=NODE_MINUTES):
+    """``compare_with_ephem`` for the fixed-body path (``fixed_altaz``); bodies are ephem FixedBodys."""
+    times = as_datetime64(times)
+    alt, az = fixed_altaz(bodies, site, times, node_minutes)
+    return _ephem_errors(site, times, bodies, {body.name: (alt[i], az[i]) for i, body in enumerate(bodies)})
+
+
+def _ephem_errors(site, times, bodies, positions):
+    observer = make_observer(site)
+    errors = {}
+    for body in bodies:
+        alt, az = positions[body_key(body)]
+        target = resolve_body(body)
+        ref_alt = np.empty(len(times))
+        ref_az = np.empty(len(times))
+        for i, day in enumerate(ephem_days(times)):
+            observer.date = day
+            target.compute(observer)
+            ref_alt[i] = math.degrees(target.alt)
+            ref_az[i] = math.degrees(target.az)
+        daz = (az - ref_az + 180.0) % 360.0 - 180.0
+        errors[body_key(body)] = (float(np.max(np.abs(alt - ref_alt))), float(np.max(np.abs(daz))))
+    return errors
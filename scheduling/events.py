@@ -0,0 +1,273 @@
+"""Rise/set, twilight-threshold and culmination times.
+
+Two modes are available:
+
+* ``'solve'`` (default): crossings are bracketed on a sampled altitude series
+  and then refined with Brent's method on direct ephem evaluations, the Moon
+  maximum with a golden-section search. Event times are good to
+  ``EVENT_TOLERANCE_SECONDS`` whatever the sampling interval, and a night
+  costs a few dozen ephem calls.
+* ``'scan'``: the original linear scan over the sampled series, returning the
+  first sample past each crossing. Kept as a reference for comparison.
+
+A crossing is always the first one inside the sampled span; events that do
+not happen within it are ``None``, exactly as with the scan.
+"""
+
+import math
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from scheduling.ephemeris import (body_altaz, ephem_days, from_ephem_days, make_observer, node_days,
+                                  resolve_body, time_grid)
+
+EVENT_TOLERANCE_SECONDS = 0.1
+BRACKET_MINUTES = 10
+MODES = ('solve', 'scan')
+
+_GOLDEN = (math.sqrt(5) - 1) / 2
+
+
+class NightEvents(NamedTuple):
+    sunrise: Optional[datetime]
+    sunset: Optional[datetime]
+    sunrise_crit: Optional[datetime]
+    sunset_crit: Optional[datetime]
+    moonrise: Optional[datetime]
+    moonset: Optional[datetime]
+    moon_max: Optional[datetime]
+    evaluations: int = 0  # ephem calls spent on this night
+
+
+class AltitudeFunction:
+    """Apparent altitude of one body in degrees as a function of ephem day, counting calls."""
+
+    def __init__(self, body, site):
+        self.body = resolve_body(body)
+        self.observer = make_observer(site)
+        self.calls = 0
+
+    def __call__(self, day):
+        self.calls += 1
+        self.observer.date = day
+        self.body.compute(self.observer)
+        return math.degrees(self.body.alt)
+
+
+def _first_crossing(altitudes, threshold, rising):
+    before, after = altitudes[:-1], altitudes[1:]
+    if rising:
+        crossed = (after > threshold) & (before <= threshold)
+    else:
+        crossed = (after < threshold) & (before >= threshold)
+    indices = np.flatnonzero(crossed)
+    return int(indices[0]) + 1 if len(indices) else None
+
+
+def scan_crossing(times, altitudes, threshold, rising):
+    """First sample past a crossing of ``threshold`` (the scripts' original scan)."""
+    index = _first_crossing(altitudes, threshold, rising)
+    return times[index] if index is not None else None
+
+
+def scan_maximum(times, altitudes):
+    return times[int(np.argmax(altitudes))]
+
+
+def brent(f, a, b, fa, fb, xtol):
+    """Root of ``f`` in [a, b] with f(a), f(b) of opposite sign (port of scipy's brentq)."""
+    xpre, xcur, fpre, fcur = a, b, fa, fb
+    xblk = fblk = spre = scur = 0.0
+    if fpre == 0:
+        return xpre
+    if fcur == 0:
+        return xcur
+    for _ in range(100):
+        if fpre != 0 and fcur != 0 and (fpre < 0) != (fcur < 0):
+            xblk, fblk = xpre, fpre
+            spre = scur = xcur - xpre
+        if abs(fblk) < abs(fcur):
+            xpre, xcur, xblk = xcur, xblk, xcur
+            fpre, fcur, fblk = fcur, fblk, fcur
+        delta = xtol / 2
+        sbis = (xblk - xcur) / 2
+        if fcur == 0 or abs(sbis) < delta:
+            return xcur
+        if abs(spre) > delta and abs(fcur) < abs(fpre):
+            if xpre == xblk:
+                stry = -fcur * (xcur - xpre) / (fcur - fpre)
+            else:
+                dpre = (fpre - fcur) / (xpre - xcur)
+                dblk = (fblk - fcur) / (xblk - xcur)
+                stry = -fcur * (fblk * dblk - fpre * dpre) / (dblk * dpre * (fblk - fpre))
+            if 2 * abs(stry) < min(abs(spre), 3 * abs(sbis) - delta):
+                spre, scur = scur, stry
+            else:
+                spre = scur = sbis
+        else:
+            spre = scur = sbis
+        xpre, fpre = xcur, fcur
+        xcur += scur if abs(scur) > delta else (delta if sbis > 0 else -delta)
+        fcur = f(xcur)
+    return xcur
+
+
+def golden_maximum(f, a, b, xtol):
+    """Maximum of a unimodal ``f`` on [a, b] by golden-section search."""
+    c = b - _GOLDEN * (b - a)
+    d = a + _GOLDEN * (b - a)
+    fc, fd = f(c), f(d)
+    while b - a > xtol:
+        if fc > fd:
+            b, d, fd = d, c, fc
+            c = b - _GOLDEN * (b - a)
+            fc = f(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + _GOLDEN * (b - a)
+            fd = f(d)
+    return (a + b) / 2
+
+
+def solve_crossing(f, times, altitudes, threshold, rising):
+    """Crossing of ``threshold`` bracketed on the sampled series and refined on ``f``."""
+    index = _first_crossing(altitudes, threshold, rising)
+    if index is None:
+        return None
+    a, b = ephem_days(times[index - 1:index + 1])
+    fa, fb = f(a) - threshold, f(b) - threshold
+    if (fa < 0) == (fb < 0):
+        # The sampled series and ephem disagree on which side of the bracket the
+        # crossing is; that only happens within the engine tolerance of a sample.
+        return times[index]
+    root = brent(lambda day: f(day) - threshold, a, b, fa, fb, EVENT_TOLERANCE_SECONDS / 86400)
+    return from_ephem_days(root).item()
+
+
+def solve_maximum(f, times, altitudes):
+    index = int(np.argmax(altitudes))
+    if index == 0 or index == len(altitudes) - 1:
+        return times[index]
+    a, b = ephem_days([times[index - 1], times[index + 1]])
+    return from_ephem_days(golden_maximum(f, a, b, EVENT_TOLERANCE_SECONDS / 86400)).item()
+
+
+def _check_mode(mode):
+    if mode not in MODES:
+        raise ValueError(f"Unknown event mode {mode!r}; expected one of {MODES}")
+
+
+def sun_events(site, times, altitudes, sunrise_crit_deg=-18, sunset_crit_deg=-18, mode='solve'):
+    """Return (sunrise, sunset, sunrise_crit, sunset_crit, ephem calls) for a sampled Sun series."""
+    _check_mode(mode)
+    times = list(times)
+    altitudes = np.asarray(altitudes, dtype=float)
+    if mode == 'scan':
+        return (scan_crossing(times, altitudes, 0, True), scan_crossing(times, altitudes, 0, False),
+                scan_crossing(times, altitudes, sunrise_crit_deg, True),
+                scan_crossing(times, altitudes, sunset_crit_deg, False), 0)
+    f = AltitudeFunction('sun', site)
+    return (solve_crossing(f, times, altitudes, 0, True), solve_crossing(f, times, altitudes, 0, False),
+            solve_crossing(f, times, altitudes, sunrise_crit_deg, True),
+            solve_crossing(f, times, altitudes, sunset_crit_deg, False), f.calls)
+
+
+def moon_events(site, times, altitudes, moonset_deg=-3, mode='solve'):
+    """Return (moonrise, moonset, moon_max, ephem calls) for a sampled Moon series."""
+    _check_mode(mode)
+    times = list(times)
+    altitudes = np.asarray(altitudes, dtype=float)
+    if mode == 'scan':
+        return (scan_crossing(times, altitudes, 0, True), scan_crossing(times, altitudes, moonset_deg, False),
+                scan_maximum(times, altitudes), 0)
+    f = AltitudeFunction('moon', site)
+    return (solve_crossing(f, times, altitudes, 0, True), solve_crossing(f, times, altitudes, moonset_deg, False),
+            solve_maximum(f, times, altitudes), f.calls)
+
+
+class EventSolver:
+    """Events of one sampled night for several sets of thresholds, each crossing solved once.
+
+    ``events(...)`` returns what ``sun_events`` and ``moon_events`` would;
+    sunrise, sunset, moonrise, the Moon's culmination and any threshold
+    two policies share are only solved on the first call that needs them.
+    """
+
+    def __init__(self, site, times, sun_altitudes, moon_altitudes, mode='solve'):
+        _check_mode(mode)
+        self.times = list(times)
+        self.mode = mode
+        self._altitudes = {'sun': np.asarray(sun_altitudes, dtype=float),
+                           'moon': np.asarray(moon_altitudes, dtype=float)}
+        self._functions = {body: AltitudeFunction(body, site) for body in self._altitudes}
+        self._solved = {}
+
+    @property
+    def calls(self):
+        """Ephem calls spent so far."""
+        return sum(f.calls for f in self._functions.values())
+
+    def crossing(self, body, threshold, rising):
+        key = (body, threshold, rising)
+        if key not in self._solved:
+            if self.mode == 'scan':
+                self._solved[key] = scan_crossing(self.times, self._altitudes[body], threshold, rising)
+            else:
+                self._solved[key] = solve_crossing(self._functions[body], self.times, self._altitudes[body],
+                                                   threshold, rising)
+        return self._solved[key]
+
+    def moon_max(self):
+        if 'moon_max' not in self._solved:
+            if self.mode == 'scan':
+                self._solved['moon_max'] = scan_maximum(self.times, self._altitudes['moon'])
+            else:
+                self._solved['moon_max'] = solve_maximum(self._functions['moon'], self.times,
+                                                         self._altitudes['moon'])
+        return self._solved['moon_max']
+
+    def events(self, sunrise_crit_deg=-18, sunset_crit_deg=-18, moonset_deg=-3):
+        """``NightEvents`` for one set of thresholds; ``evaluations`` counts only the calls this one added."""
+        calls = self.calls
+        return NightEvents(self.crossing('sun', 0, True), self.crossing('sun', 0, False),
+                           self.crossing('sun', sunrise_crit_deg, True), self.crossing('sun', sunset_crit_deg, False),
+                           self.crossing('moon', 0, True), self.crossing('moon', moonset_deg, False),
+                           self.moon_max(), self.calls - calls)
+
+
+def night_series(site, start_date, hours=27, mode='solve', interval_minutes=1, buffer=None, interval_seconds=None):
+    """Times, Sun and Moon altitudes ``night_events`` solves on, and the ephem calls they took.
+
+    In 'solve' mode the series is only sampled every ``BRACKET_MINUTES`` for
+    bracketing; in 'scan' mode it is sampled every ``interval_minutes`` (or
+    ``interval_seconds``). An
+    ``EphemerisBuffer`` supplies whatever it already holds.
+    """
+    _check_mode(mode)
+    times = time_grid(start_date, hours, interval_minutes, interval_seconds)
+    if mode == 'solve':
+        # Same span as the scan, so events at the very end of it agree.
+        times = np.append(time_grid(start_date, hours, BRACKET_MINUTES)[:-1], times[-1])
+    if buffer is not None:
+        calls = buffer.ephem_calls
+        sun_alt, _ = buffer.altaz('sun', times)
+        moon_alt, _ = buffer.altaz('moon', times)
+        return times.tolist(), sun_alt, moon_alt, buffer.ephem_calls - calls
+    node_calls = 2 * len(node_days(ephem_days(times)))
+    sun_alt, _ = body_altaz('sun', site, times)
+    moon_alt, _ = body_altaz('moon', site, times)
+    return times.tolist(), sun_alt, moon_alt, node_calls
+
+
+def night_events(site, start_date, hours=27, sunrise_crit_deg=-18, sunset_crit_deg=-18, moonset_deg=-3,
+                 mode='solve', interval_minutes=1, buffer=None, interval_seconds=None):
+    """All events of the night starting at ``start_date``, solved on ``night_series``."""
+    times, sun_alt, moon_alt, node_calls = night_series(site, start_date, hours, mode, interval_minutes, buffer,
+                                                        interval_seconds)
+    sunrise, sunset, sunrise_crit, sunset_crit, sun_calls = sun_events(
+        site, times, sun_alt, sunrise_crit_deg, sunset_crit_deg, mode)
+    moonrise, moonset, moon_max, moon_calls = moon_events(site, times, moon_alt, moonset_deg, mode)
+    return NightEvents(sunrise, sunset, sunrise_crit, sunset_crit, moonrise, moonset, moon_max,
+                       node_calls + sun_calls + moon_calls)
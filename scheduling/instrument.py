@@ -0,0 +1,79 @@
+"""Per-stage timing of the nightly run.
+
+    with stage('render'):
+        fig = render(night)
+
+logs one record per stage when it ends, with its wall and CPU time and
+the process's memory high-water mark (``peak_rss_mb``) and how much the
+stage raised it (``peak_rss_growth_mb``). The message is the record as JSON
+after ``Stage timing:``, so scheduler.log can be grepped and parsed, and
+the same dict is attached to the log record as ``timing`` for handlers.
+
+Measuring costs a few microseconds, so stages are always timed; profiling
+the whole run is opt-in (``profiled``).
+"""
+
+import cProfile
+import json
+import logging
+import sys
+import time as timer
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not on Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """High-water mark of the process's resident memory, in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10  # bytes on macOS, KiB elsewhere
+
+
+@contextmanager
+def stage(name, logger=logging, **fields):
+    """Time the block as stage ``name``; ``fields`` (body, format, ...) are added to the record.
+
+    Yields the record, which is filled in when the block ends. A block that
+    raises is logged too, with ``failed`` set.
+    """
+    record = dict(stage=name, **fields)
+    peak_before = peak_rss_mb()
+    wall_started, cpu_started = timer.perf_counter(), timer.process_time()
+    try:
+        yield record
+    except BaseException:
+        record['failed'] = True
+        raise
+    finally:
+        record['wall_seconds'] = round(timer.perf_counter() - wall_started, 6)
+        record['cpu_seconds'] = round(timer.process_time() - cpu_started, 6)
+        peak_after = peak_rss_mb()
+        if peak_after is not None:
+            record['peak_rss_mb'] = round(peak_after, 1)
+            record['peak_rss_growth_mb'] = round(peak_after - peak_before, 1)
+        logger.info("Stage timing: %s", json.dumps(record, default=str), extra={'timing': record})
+
+
+@contextmanager
+def profiled(path):
+    """Profile the block with cProfile and write the stats to ``path`` (no-op when ``path`` is None).
+
+    The file is in ``pstats`` format, which snakeviz, gprof2dot and
+    flameprof turn into call graphs and flame graphs.
+    """
+    if path is None:
+        yield None
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        profile.dump_stats(path)
+        logging.info("Profile written to %s", path)
@@ -0,0 +1,140 @@
+"""Sorted sets of half-open time intervals.
+
+An ``IntervalSet`` holds disjoint, non-touching ``[start, end)`` intervals in
+time order. Masks sampled on a time grid (``from_flags``) and windows bounded
+by event times (``IntervalSet([(start, end)])``) combine with ``|``, ``&`` and
+``-`` in one sweep over both sets, and a membership test is a binary search,
+so the schedule logic no longer probes lists of timestamps sample by sample.
+
+Bounds only need to be ordered and subtractable: datetimes in practice, but
+numbers work as well.
+"""
+
+from bisect import bisect_right
+from datetime import timedelta
+
+import numpy as np
+
+
+class IntervalSet:
+    __slots__ = ('_intervals',)
+
+    def __init__(self, intervals=()):
+        """Normalise ``(start, end)`` pairs: empty ones dropped, overlapping and touching ones merged."""
+        merged = []
+        for start, end in sorted((start, end) for start, end in intervals if start < end):
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+            else:
+                merged.append([start, end])
+        self._intervals = tuple((start, end) for start, end in merged)
+
+    @classmethod
+    def _from_normalised(cls, intervals):
+        interval_set = cls.__new__(cls)
+        interval_set._intervals = tuple(intervals)
+        return interval_set
+
+    @classmethod
+    def from_flags(cls, times, flags):
+        """Runs of flagged samples, where ``flags[i]`` covers ``[times[i], times[i + 1])``.
+
+        ``times`` needs one more entry than ``flags``.
+        """
+        edges = np.diff(np.concatenate(([0], np.asarray(flags, dtype=np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        return cls._from_normalised((times[start], times[end]) for start, end in zip(starts.tolist(), ends.tolist()))
+
+    def __iter__(self):
+        return iter(self._intervals)
+
+    def __len__(self):
+        return len(self._intervals)
+
+    def __bool__(self):
+        return bool(self._intervals)
+
+    def __eq__(self, other):
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self._intervals == other._intervals
+
+    def __hash__(self):
+        return hash(self._intervals)
+
+    def __repr__(self):
+        return f"IntervalSet({list(self._intervals)!r})"
+
+    def __contains__(self, t):
+        i = bisect_right(self._intervals, (t,)) - 1
+        if i + 1 < len(self._intervals) and self._intervals[i + 1][0] == t:
+            return True
+        return i >= 0 and t < self._intervals[i][1]
+
+    @property
+    def start(self):
+        """Start of the first interval, None when empty."""
+        return self._intervals[0][0] if self._intervals else None
+
+    @property
+    def end(self):
+        """End of the last interval, None when empty."""
+        return self._intervals[-1][1] if self._intervals else None
+
+    def duration(self):
+        """Total length of the intervals (``timedelta(0)`` when empty)."""
+        if not self._intervals:
+            return timedelta(0)
+        lengths = [end - start for start, end in self._intervals]
+        return sum(lengths[1:], lengths[0])
+
+    def union(self, other):
+        return IntervalSet(self._intervals + tuple(other))
+
+    def intersection(self, other):
+        other = _as_interval_set(other)._intervals
+        intervals = []
+        i = j = 0
+        while i < len(self._intervals) and j < len(other):
+            start = max(self._intervals[i][0], other[j][0])
+            end = min(self._intervals[i][1], other[j][1])
+            if start < end:
+                intervals.append((start, end))
+            if self._intervals[i][1] < other[j][1]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet._from_normalised(intervals)
+
+    def difference(self, other):
+        other = _as_interval_set(other)._intervals
+        intervals = []
+        j = 0
+        for start, end in self._intervals:
+            while j < len(other) and other[j][1] <= start:
+                j += 1
+            k = j
+            while k < len(other) and other[k][0] < end:
+                if other[k][0] > start:
+                    intervals.append((start, other[k][0]))
+                start = max(start, other[k][1])
+                k += 1
+            if start < end:
+                intervals.append((start, end))
+        return IntervalSet._from_normalised(intervals)
+
+    def clip(self, start=None, end=None):
+        """The part of the set from ``start`` to ``end`` (either may be None for unbounded)."""
+        if not self._intervals:
+            return self
+        bounds = (self.start if start is None else start, self.end if end is None else end)
+        return self.intersection(IntervalSet([bounds]))
+
+    __or__ = union
+    __and__ = intersection
+    __sub__ = difference
+
+
+def _as_interval_set(intervals):
+    return intervals if isinstance(intervals, IntervalSet) else IntervalSet(intervals)
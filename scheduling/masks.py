@@ -0,0 +1,101 @@
+"""Light-safety masks and door states of a night, as ``IntervalSet``s.
+
+The altitude masks are sampled: sample ``i`` of the plotted grid stands for
+``[times[i], times[i + 1])``, as the scripts' shading did. The observing
+window and the door states are bounded by the event times themselves.
+All of them need the altitude series, so they are empty for a ``Night``
+from ``compute_times``.
+"""
+
+from typing import NamedTuple
+
+from scheduling.intervals import IntervalSet
+
+
+class DoorStates(NamedTuple):
+    open: IntervalSet  # observing with the door open (shaded on the charts)
+    closed: IntervalSet  # observing with the door closed (hatched)
+
+
+def _samples(night):
+    # The scripts' loops stop one sample short of the grid
+    return range(len(night.times) - 1)
+
+
+def moon_descending(night):
+    """The Moon above the moonset threshold and setting.
+
+    As in the scripts, the first sample compares against the last one.
+    """
+    moon, threshold = night.moon_altitudes, night.policy.moonset_deg
+    return IntervalSet.from_flags(night.times, [moon[i] < moon[i - 1] and moon[i] > threshold
+                                                for i in _samples(night)])
+
+
+def sun_above(night):
+    """The Sun above the sunset crit threshold."""
+    sun, threshold = night.sun_altitudes, night.policy.sunset_crit_deg
+    return IntervalSet.from_flags(night.times, [sun[i] > threshold for i in _samples(night)])
+
+
+def grid(night):
+    """The whole sampled grid."""
+    if len(night.times) < 2:
+        return IntervalSet()
+    return IntervalSet([(night.times[0], night.times[-1])])
+
+
+def unsafe(night):
+    """Dangerous light levels (the scripts' ``time_list``).
+
+    The scripts left out Sun samples already masked by the descending Moon
+    before the sunset crit; in the union that exclusion changes nothing.
+    """
+    return moon_descending(night) | sun_above(night)
+
+
+def safe(night):
+    return grid(night) - unsafe(night)
+
+
+def observing_window(night):
+    """From the start to the end of the observation window."""
+    windows = night.windows
+    if windows.start_time is None or windows.end_time is None:
+        return IntervalSet()
+    return IntervalSet([(windows.start_time, windows.end_time)])
+
+
+def door_states(night):
+    """When the door is open and when it is closed during observing.
+
+    'transition' policies: closed from the data quality start to the start,
+    and through the transition window (until it starts, or after the Moon's
+    peak when the Moon sets after the sunrise crit); open whenever it is safe
+    from the door opening to the end time, outside the closed periods.
+    'moonset' policies have no door schedule: open is every safe sample of
+    the observation window and closed is empty. (scheduler.py's chart shades
+    every safe sample of the grid instead, window or not; see ``safe``.)
+
+    Open is always inside ``observing_window`` and disjoint from closed.
+    """
+    safe_observing = safe(night) & observing_window(night)
+    if night.policy.variant == 'moonset':
+        return DoorStates(safe_observing, IntervalSet())
+
+    start_time, end_time, start_time_2, end_time_2, data_quality_start, _ = night.windows
+    has_transition = not (start_time_2 is None and end_time_2 is None)
+    transition_is_window = has_transition and start_time == start_time_2 and end_time == end_time_2
+
+    closed = [(data_quality_start, start_time)]
+    if has_transition and not transition_is_window:
+        closed.append((start_time, start_time_2))
+    if has_transition and start_time_2 == start_time:
+        closed.append((end_time_2, end_time))
+
+    closed = IntervalSet((a, b) for a, b in closed if a is not None and b is not None)
+    if transition_is_window:
+        door_open = IntervalSet()
+    else:
+        door_open = safe_observing.clip(start_time_2 if has_transition else start_time) - closed
+    return DoorStates(door_open, closed)
@@ -0,0 +1,175 @@
+"""Everything the outputs need to know about one night."""
+
+from datetime import datetime
+from typing import Dict, List, NamedTuple
+
+from scheduling.ephemeris import adaptive_altaz, body_key, compute_positions, moon_illumination, time_grid
+from scheduling.events import EventSolver, NightEvents, night_events, night_series
+from scheduling.instrument import stage
+from scheduling.intervals import IntervalSet
+from scheduling.site import FRISCO_PEAK
+from scheduling.sources import Source, default_sources, source_altitudes, source_windows
+from scheduling.windows import POLICIES, SCHEDULERLILY, NightWindows, Policy, decide_windows
+
+NIGHT_HOURS = 27  # Sun/Moon grid, covers the whole night whatever the season
+SOURCE_HOURS = 24
+
+
+class Night(NamedTuple):
+    start_date: datetime
+    policy: Policy
+    times: List[datetime]  # shared by the Sun and Moon series
+    sun_altitudes: List[float]
+    moon_altitudes: List[float]
+    source_times: List[datetime]
+    source_altitudes: Dict[str, List[float]]  # keyed by source name
+    events: NightEvents
+    windows: NightWindows
+    illumination: int
+    sources: List[Source]
+    source_windows: Dict[str, IntervalSet]  # keyed by source name
+
+
+def compute_night(start_date, site=FRISCO_PEAK, policy=SCHEDULERLILY, interval_minutes=1, event_mode='solve',
+                  sources=None, cache=None, almanac=None, buffer=None, sampling='nodes', interval_seconds=None):
+    """Compute the night whose grid starts at ``start_date`` (naive UTC midnight).
+
+    ``sources`` is a list of catalog ``Source``s, by default the catalog
+    shipped with the package. ``interval_seconds`` samples the curves on a
+    sub-minute grid instead of every ``interval_minutes``. With an
+    ``EphemerisCache`` the altitude series and events are read from it when
+    present and stored when not. Events and Moon phase come from
+    ``almanac`` when it covers the night. An ``EphemerisBuffer`` spares
+    recomputing the Sun and Moon samples it already holds from earlier
+    nights.
+
+    ``sampling='adaptive'`` computes the Sun and Moon from coarse nodes and
+    spends exact ephem calls only next to the policy's thresholds and the
+    turning points (``ephemeris.adaptive_altaz``); those series depend on the
+    thresholds, so they bypass the cache and the buffer.
+    """
+    return compute_nights(start_date, site, [policy], interval_minutes, event_mode, sources, cache, almanac, buffer,
+                          sampling, interval_seconds)[policy.name]
+
+
+def compute_nights(start_date, site=FRISCO_PEAK, policies=tuple(POLICIES.values()), interval_minutes=1,
+                   event_mode='solve', sources=None, cache=None, almanac=None, buffer=None, sampling='nodes',
+                   interval_seconds=None):
+    """``compute_night`` for several policies from one ephemeris pass, keyed by policy name.
+
+    The grid, the Sun, Moon and source series and the Moon phase are
+    computed once and shared by every policy's ``Night``; events are
+    solved once per distinct threshold (``events.EventSolver``), and only
+    the window decision runs per policy. Solved events are bracketed on
+    ``night_events``' coarse grid, not the plotted one, so they are exactly
+    what ``compute_times`` and the almanac give, whatever the sampling.
+    """
+    if sources is None:
+        sources = default_sources()
+
+    times = time_grid(start_date, NIGHT_HOURS, interval_minutes, interval_seconds)
+    if sampling == 'adaptive':
+        sun_thresholds = {0} | {deg for policy in policies for deg in (policy.sunrise_crit_deg, policy.sunset_crit_deg)}
+        sun_altitudes = _adaptive_altitudes(site, times, 'sun', sorted(sun_thresholds))
+        moon_altitudes = _adaptive_altitudes(site, times, 'moon', sorted({0} | {p.moonset_deg for p in policies}))
+    else:
+        sun_altitudes = _altitudes(site, times, 'sun', cache, buffer)
+        moon_altitudes = _altitudes(site, times, 'moon', cache, buffer)
+    times = times.tolist()
+
+    source_grid = time_grid(start_date, SOURCE_HOURS, interval_minutes, interval_seconds)
+    source_times = source_grid.tolist()
+    with stage('ephemeris', body='sources', count=len(sources), samples=len(source_times)) as record:
+        if cache is None:
+            altitudes = source_altitudes(site, source_grid, sources)
+        else:
+            misses = cache.misses
+            altitudes = cache.source_altitudes(site, source_grid, sources)
+            record['cache_misses'] = cache.misses - misses
+        observing = source_windows(source_times, altitudes, sources)
+    altitudes = {source.name: row for source, row in zip(sources, altitudes.tolist())}
+
+    if event_mode == 'solve':
+        solver = EventSolver(site, *night_series(site, start_date, NIGHT_HOURS, buffer=buffer)[:3])
+    else:  # the scan is of the plotted grid
+        solver = EventSolver(site, times, sun_altitudes, moon_altitudes, event_mode)
+    illumination = None
+    nights = {}
+    for policy in policies:
+        def solve_events():
+            return solver.events(policy.sunrise_crit_deg, policy.sunset_crit_deg, policy.moonset_deg)
+
+        with stage('events', mode=event_mode, policy=policy.name) as record:
+            looked_up = _look_up(almanac, start_date, site, policy, event_mode)
+            if looked_up is not None:
+                events, illumination = looked_up
+                record['almanac'] = True
+            elif cache is None:
+                events = solve_events()
+            else:
+                misses = cache.misses
+                events = cache.events(site, start_date, policy, event_mode, solve_events, times)
+                record['cache'] = 'miss' if cache.misses > misses else 'hit'
+            if illumination is None:
+                illumination = moon_illumination(site, start_date)
+
+        with stage('window_decision', policy=policy.name):
+            windows = decide_windows(events, policy)
+        nights[policy.name] = Night(start_date, policy, times, sun_altitudes, moon_altitudes, source_times,
+                                    altitudes, events, windows, illumination, sources, observing)
+    return nights
+
+
+def _look_up(almanac, start_date, site, policy, event_mode):
+    if almanac is None:
+        return None
+    return almanac.lookup(start_date, site, policy, event_mode, NIGHT_HOURS)
+
+
+def _altitudes(site, times, body, cache=None, buffer=None):
+    def compute():
+        if buffer is not None:
+            return buffer.altaz(body, times)[0]
+        return compute_positions(site, times, (body,))[body_key(body)][0]
+
+    with stage('ephemeris', body=body_key(body), samples=len(times)) as record:
+        reused = buffer.samples_reused if buffer is not None else 0
+        if cache is None:
+            altitudes = compute()
+        else:
+            misses = cache.misses
+            altitudes = cache.altitudes(site, times, body, compute)
+            record['cache'] = 'miss' if cache.misses > misses else 'hit'
+        if buffer is not None:
+            record['buffer_reused'] = buffer.samples_reused - reused
+        return altitudes.tolist()
+
+
+def _adaptive_altitudes(site, times, body, thresholds):
+    with stage('ephemeris', body=body, samples=len(times), sampling='adaptive') as record:
+        altitudes, _, calls = adaptive_altaz(body, site, times, thresholds)
+        record['ephem_calls'] = calls
+        record['saved'] = len(times) - calls  # against one call per sample
+        return altitudes.tolist()
+
+
+def compute_times(start_date, site=FRISCO_PEAK, policy=SCHEDULERLILY, event_mode='solve', almanac=None,
+                  buffer=None):
+    """Events, window and Moon phase only, for callers that need times but no chart.
+
+    The altitude series of the returned ``Night`` are empty; events are
+    bracketed on a coarse grid instead of the plotted one, or looked up in
+    ``almanac`` when it covers the night (no ephemeris at all).
+    """
+    with stage('events', mode=event_mode) as record:
+        looked_up = _look_up(almanac, start_date, site, policy, event_mode)
+        if looked_up is not None:
+            events, illumination = looked_up
+            record['almanac'] = True
+        else:
+            events = night_events(site, start_date, NIGHT_HOURS, policy.sunrise_crit_deg, policy.sunset_crit_deg,
+                                  policy.moonset_deg, event_mode, buffer=buffer)
+            illumination = moon_illumination(site, start_date)
+    with stage('window_decision', policy=policy.name):
+        windows = decide_windows(events, policy)
+    return Night(start_date, policy, [], [], [], [], {}, events, windows, illumination, [], {})
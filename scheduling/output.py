@@ -0,0 +1,80 @@
+"""``eon_times.txt``, the file trinity.py reads the night's times from."""
+
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+
+from scheduling.masks import door_states
+
+BOLD = "\033[1m"
+RESET = "\033[0m"
+EON_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # whole seconds; the scripts' scanned times had no fraction either
+
+
+def _hm(t):
+    return t.strftime('%m-%d %H:%M') if t is not None else 'none'
+
+
+def log_times(night, logger=logging):
+    events, windows = night.events, night.windows
+    logger.info(f"Moonrise Time: {_hm(events.moonrise)}")
+    logger.info(f"Moonset Time: {_hm(events.moonset)}")
+    logger.info(f"Sunrise Time: {_hm(events.sunrise)}")
+    logger.info(f"Sunset Time: {_hm(events.sunset)}")
+    logger.info(f"{BOLD}Start Time: {_hm(windows.start_time)}{RESET}")
+    logger.info(f"{BOLD}End Time: {_hm(windows.end_time)}{RESET}")
+    if night.policy.variant == 'transition' and not (windows.start_time_2 is None and windows.end_time_2 is None):
+        logger.info(f"{BOLD}Start Time 2: {_hm(windows.start_time_2)}{RESET}")
+        logger.info(f"{BOLD}End Time 2: {_hm(windows.end_time_2)}{RESET}")
+    if night.times:  # door states need the altitude series
+        door = door_states(night)
+        logger.info(f"Door Open: {door.open.duration().total_seconds() / 3600:.2f} h in {len(door.open)} periods")
+        logger.info(f"Door Closed: {door.closed.duration().total_seconds() / 3600:.2f} h in {len(door.closed)} periods")
+
+
+@contextmanager
+def atomic_write(path, mode='w'):
+    """Write ``path`` through a temporary file renamed over it when the block succeeds.
+
+    Readers see the old file or the new one, never a partial one; a block
+    that raises leaves ``path`` untouched.
+    """
+    handle, temporary = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                         prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(handle, mode) as file:
+            yield file
+        os.chmod(temporary, 0o644)  # mkstemp's 0600 would hide it from the web server
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.remove(temporary)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _eon_time(t):
+    return 'None' if t is None else t.strftime(EON_TIME_FORMAT)
+
+
+def write_eon_times(night, path):
+    events, windows = night.events, night.windows
+    start_time, end_time = _eon_time(windows.start_time), _eon_time(windows.end_time)
+    with atomic_write(path) as file:
+        file.write(f"Moonrise Time: {_eon_time(events.moonrise)}\n")
+        file.write(f"Moonset Time: {_eon_time(events.moonset)}\n")
+        file.write(f"Sunrise Time: {_eon_time(events.sunrise)}\n")
+        file.write(f"Sunset Time: {_eon_time(events.sunset)}\n")
+        if night.policy.variant == 'transition' and not (windows.start_time_2 is None and windows.end_time_2 is None):
+            # schedulerlily.py's layout, which trinity.py relies on; the scripts wrote the bound
+            # method (``start_time.strftime``) here instead of the time
+            if night.start_date < windows.end_time:
+                file.write(f"Start Time: {start_time}\n")
+                file.write(f"End Time: {end_time}\n")
+            elif events.sunset_crit < windows.start_time_2 < events.sunrise_crit:
+                file.write(f"Start Time 2: {_eon_time(windows.start_time_2)}\n")
+                file.write(f"End Time 2: {_eon_time(windows.end_time_2)}\n")
+        file.write(f"Start Time: {start_time}\n")
+        file.write(f"End Time: {end_time}\n")
@@ -0,0 +1,132 @@
+"""Pushing the rendered schedule to the website.
+
+``publish_files`` is a coroutine: the site update script runs as an
+asyncio subprocess, so an event loop (the daemon's, say) keeps working
+while it uploads, and the nightly CLI just ``asyncio.run``s it. Each
+attempt is killed after ``timeout`` seconds; a failed or timed-out attempt
+is retried up to ``retries`` times, waiting ``backoff`` seconds, doubled
+per attempt and capped at ``MAX_BACKOFF_SECONDS``.
+
+The SHA-256 of every published file (the chart image, its PDF and
+eon_times.txt) is recorded in ``<directory>/published.json`` after a
+successful upload; when none of them has changed since, the script is not
+run at all. ``force=True`` publishes regardless.
+
+The command is a parameter, so a local stand-in script can replace
+``sudo ./update_site.exp``::
+
+    python -m scheduling --night 2026-10-19 --publish-command ./fake_update_site.sh --publish-timeout 5
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import signal
+import subprocess
+
+from scheduling.output import atomic_write
+
+PUBLISH_COMMAND = ("sudo", "./update_site.exp")
+PUBLISHED_FILE = 'published.json'
+PUBLISH_TIMEOUT = 300.0
+PUBLISH_RETRIES = 3
+BACKOFF_SECONDS = 10.0
+MAX_BACKOFF_SECONDS = 120.0
+_CHUNK = 2**20
+
+
+def fingerprint(directory, paths):
+    """``{path relative to directory: SHA-256}`` of ``paths``; files that don't exist are left out."""
+    digests = {}
+    for path in paths:
+        digest = hashlib.sha256()
+        try:
+            with open(path, 'rb') as file:
+                for chunk in iter(lambda: file.read(_CHUNK), b''):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            continue
+        digests[os.path.relpath(path, directory)] = digest.hexdigest()
+    return digests
+
+
+def _published(directory):
+    try:
+        with open(os.path.join(directory, PUBLISHED_FILE)) as file:
+            return json.load(file).get('files')
+    except (OSError, ValueError) as e:
+        if not isinstance(e, FileNotFoundError):
+            logging.warning("Ignoring unreadable %s: %s", PUBLISHED_FILE, e)
+        return None
+
+
+def _record_published(directory, digests):
+    try:
+        with atomic_write(os.path.join(directory, PUBLISHED_FILE)) as file:
+            json.dump({'files': digests}, file, indent=2, sort_keys=True)
+    except OSError as e:
+        logging.warning("Could not record the published files: %s", e)
+
+
+def _kill(process):
+    # The script's children (expect, scp, ...) hold its output pipe open, so take down its whole group
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except PermissionError:  # a sudo'd group; kill what we may
+        process.kill()
+    except ProcessLookupError:
+        pass
+
+
+async def run_command(command, directory, timeout):
+    """Run ``command`` in ``directory``; ``(returncode, output)``, or TimeoutError after killing it."""
+    process = await asyncio.create_subprocess_exec(*command, cwd=directory, stdout=subprocess.PIPE,
+                                                   stderr=subprocess.STDOUT, start_new_session=True)
+    try:
+        output, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        _kill(process)
+        await process.wait()
+        raise
+    return process.returncode, output.decode(errors='replace')
+
+
+async def publish_files(directory, paths, command=PUBLISH_COMMAND, timeout=PUBLISH_TIMEOUT, retries=PUBLISH_RETRIES,
+                        backoff=BACKOFF_SECONDS, force=False):
+    """Run the site update script from ``directory`` if any of ``paths`` changed since the last upload.
+
+    Returns 'unchanged', 'published' or 'failed'. Failures are logged,
+    never raised, so a website problem cannot lose the night's schedule
+    files.
+    """
+    digests = fingerprint(directory, paths)
+    if not force and digests == _published(directory):
+        logging.info("Schedule files unchanged since the last upload, not publishing")
+        return 'unchanged'
+    for attempt in range(retries + 1):
+        if attempt:
+            delay = min(backoff * 2 ** (attempt - 1), MAX_BACKOFF_SECONDS)
+            logging.info("Retrying the upload in %g s (attempt %d of %d)", delay, attempt + 1, retries + 1)
+            await asyncio.sleep(delay)
+        try:
+            returncode, output = await run_command(command, directory, timeout)
+        except asyncio.TimeoutError:
+            logging.error("Error: %s timed out after %g s", ' '.join(command), timeout)
+            continue
+        except OSError as e:
+            logging.error("An error occurred: %s", e)
+            continue
+        if returncode == 0:
+            logging.info("Output: %s", output)
+            _record_published(directory, digests)
+            return 'published'
+        logging.error("Error: %s exited with status %d", ' '.join(command), returncode)
+        logging.error("Program output (if available): %s", output)
+    return 'failed'
+
+
+def publish(directory, paths, **options):
+    """``publish_files`` run to completion, for callers without an event loop."""
+    return asyncio.run(publish_files(directory, paths, **options))
@@ -0,0 +1,398 @@
+"""Schedule chart rendering.
+
+``render(night)`` draws the chart of the night's policy: scheduler.py's chart
+for the 'moonset' variant, schedulerlily.py's door open/closed chart for the
+'transition' variant. ``save_outputs`` writes the image and the dated PDF the
+website picks up. ``render_comparison(nights)`` overlays several policies'
+windows on one chart of the shared Sun and Moon curves.
+
+Charts are built on their own ``Figure`` and ``Axes`` and saved to explicit
+paths (or ``encode_outputs``' in-memory bytes): nothing goes through pyplot's
+current figure or the working directory, so no backend needs selecting and
+a thread pool can render many nights at once. Each chart must stay on one
+thread. ``python -m scheduling.render`` checks that charts rendered on a
+thread pool are byte-identical to serially rendered ones::
+
+    python -m scheduling.render --nights 8 --workers 8
+
+A ``ChartTemplate`` keeps one chart's figure for night after night, drawing
+the parts every chart shares once; ``render`` draws on a new one.
+"""
+
+import argparse
+import io
+import itertools
+import os
+import sys
+import time as timer
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+
+import matplotlib
+from matplotlib.dates import DateFormatter, HourLocator
+from matplotlib.figure import Figure
+from matplotlib.patches import Patch
+
+from scheduling.instrument import stage
+from scheduling.masks import door_states, observing_window, safe
+
+SUN_COLOR = (1.0, 0.8, 0.6)
+MOON_COLOR = (0.7, 0.7, 0.7)
+STROKE_EFFICIENCY = 0.72  # share of the stacked edge strokes Agg draws; see layered_alpha
+PLOT_INTERVAL = timedelta(minutes=1)  # sub-minute grids only sharpen the window edges; curves are drawn per minute
+POLICY_COLORS = ('tab:blue', 'tab:red', 'tab:green', 'tab:purple', 'tab:orange', 'tab:brown')
+DEFAULT_WORKERS = 4
+HATCH = dict(facecolor='none', edgecolor='grey', hatch='xx', alpha=0.7, linewidth=0.0)
+
+_LEGEND_NAMES = {'TXS 0506': 'TXS 0506+056'}  # scheduler.py's legend spells the full name
+
+
+def layered_alpha(ax, alpha, sample_days, linewidth=None):
+    """Opacity of one span that matches the stack of per-sample spans it replaces.
+
+    ``color=`` spans also stroke their edges, so inside a run every point was
+    covered by the face plus the edge strokes of the samples around it:
+    ``2 * linewidth / sample width`` of them. Both sizes scale with dpi, so
+    the match holds for the PNG, the JPG and the PDF alike. Agg's 8-bit
+    compositing loses part of each faint stroke, how much depending on the
+    colour, alpha and dpi: fitting the mean colour inside 1-minute runs of
+    the chart's spans (grey at 0.05 and 0.1, the sources at 0.05) gives
+    0.69-0.85 of the nominal strokes. ``STROKE_EFFICIENCY`` keeps all of them
+    within 4 levels (of 255) of the per-sample spans at the production dpi;
+    tests/test_render.py checks this.
+    """
+    if linewidth is None:
+        linewidth = matplotlib.rcParams['patch.linewidth']
+    xmin, xmax = ax.get_xlim()
+    axes_points = ax.get_position().width * ax.figure.get_figwidth() * 72
+    sample_points = axes_points * sample_days / (xmax - xmin)
+    layers = 1 + STROKE_EFFICIENCY * 2 * linewidth / sample_points
+    return 1 - (1 - alpha) ** layers
+
+
+def _sample_days(times):
+    return max(times[1] - times[0], PLOT_INTERVAL).total_seconds() / 86400
+
+
+def _plotted(times, values):
+    """``times``/``values`` thinned to about one sample per ``PLOT_INTERVAL``."""
+    stride = max(1, round(PLOT_INTERVAL / (times[1] - times[0])))
+    return times[::stride], values[::stride]
+
+
+def _shade(ax, night, intervals, **style):
+    if 'color' in style:
+        style['alpha'] = layered_alpha(ax, style['alpha'], _sample_days(night.times), style.get('linewidth'))
+    for start, end in intervals:
+        ax.axvspan(start, end, **style)
+
+
+def _plot_altitudes(ax, night):
+    ax.plot(*_plotted(night.times, night.moon_altitudes), label='Moon Altitude', color=MOON_COLOR, marker='o',
+            markersize=3, linewidth=0.8, zorder=1)
+    ax.plot(*_plotted(night.times, night.sun_altitudes), label='Sun Altitude', color=SUN_COLOR, marker='o',
+            markersize=3, linewidth=0.8, zorder=1)
+
+
+def _label_axes(ax, night):
+    ax.set_title('Demonstrator Operation Schedule ' + night.start_date.strftime("%m-%d-%Y") + ' UTC', fontsize=14)
+    ax.figure.tight_layout()
+
+
+def _shade_sources(ax, night):
+    for source in night.sources:
+        observing = night.source_windows[source.name]
+        if observing:
+            # The scripts joined consecutive observing samples pairwise, so gaps are bridged
+            ax.axvspan(observing.start, observing.end, color=source.color,
+                       alpha=layered_alpha(ax, 0.05, _sample_days(night.source_times)))
+
+
+def _source_legend(night, names=None):
+    names = names or {}
+    return [Patch(color=source.color, alpha=0.5, label=f'{names.get(source.name, source.name)} Obs. Window')
+            for source in night.sources]
+
+
+def _render_moonset(night, ax):
+    # scheduler.py's chart
+    times = night.times
+    start_time, end_time = night.windows.start_time, night.windows.end_time
+    data_quality_start, illumination = night.windows.data_quality_start, night.illumination
+
+    fig = ax.figure
+    _plot_altitudes(ax, night)
+    _label_axes(ax, night)
+    ax.set_xlim(min(times), min(times) + timedelta(hours=24))
+    _shade_sources(ax, night)
+
+    if illumination >= 90:
+        legend_elements = _source_legend(night, _LEGEND_NAMES) + [
+            Patch(facecolor='darkslateblue', label=f'Data Qual. Extrigs Start Time: {data_quality_start.strftime("%H:%M")} UTC'),
+            Patch(facecolor='green', label=f'Obs. Extrigs Start Time: {start_time.strftime("%H:%M")} UTC'),
+            Patch(facecolor='red', label=f'Obs. Extrigs End Time: {end_time.strftime("%H:%M")} UTC'),
+            Patch(color='grey', alpha=0.5, label='Moon Position Relative'),
+            Patch(color='orange', alpha=0.5, label='Sun Position Relative'),
+            Patch(color='white', label=f'Moonphase: {illumination}%'),
+        ]
+        legend = ax.legend(fontsize=8, loc='lower right', handles=legend_elements)
+        legend.get_frame().set_facecolor('white')
+        legend.get_frame().set_alpha(1)
+        for text in legend.get_texts():
+            if 'Moonphase' in text.get_text():
+                text.set_color('red')
+    else:
+        ax.axvline(x=start_time, color='green', linestyle='--', linewidth=2, alpha=1)
+        ax.axvline(x=end_time, color='red', linestyle='--', linewidth=2, alpha=1)
+        ax.axvline(x=data_quality_start, color='darkslateblue', linestyle='--', linewidth=1, alpha=1)
+
+        _shade(ax, night, safe(night), color='grey', alpha=0.05)  # every safe sample, window or not
+
+        legend_elements = _source_legend(night, _LEGEND_NAMES) + [
+            Patch(facecolor='darkslateblue', label=f'Data Qual. Extrigs Start Time: {data_quality_start.strftime("%H:%M")} UTC'),
+            Patch(facecolor='green', label=f'Obs. Start Time: {start_time.strftime("%H:%M")} UTC'),
+            Patch(facecolor='red', label=f'Obs. End Time: {end_time.strftime("%H:%M")} UTC'),
+            Patch(color='grey', alpha=0.5, label='Moon Position Relative'),
+            Patch(color='orange', alpha=0.5, label='Sun Position Relative'),
+            Patch(color='white', label=f'Moonphase: {illumination}%'),
+        ]
+        legend = ax.legend(fontsize=8, loc='lower right', handles=legend_elements)
+        legend.get_frame().set_facecolor('white')
+        legend.get_frame().set_alpha(1)
+
+    return fig
+
+
+def _render_transition(night, ax):
+    # schedulerlily.py's chart: door open (shaded) and door closed (hatched) periods
+    times = night.times
+    start_time, end_time, start_time_2, end_time_2, data_quality_start, _ = night.windows
+    illumination = night.illumination
+    has_transition = not (start_time_2 is None and end_time_2 is None)
+    door = door_states(night)
+
+    fig = ax.figure
+    _plot_altitudes(ax, night)
+
+    ax.set_xlim(min(times), min(times) + timedelta(hours=24))
+    fig.patch.set_facecolor('white')
+    ax.set_facecolor('white')
+    _label_axes(ax, night)
+    _shade_sources(ax, night)
+
+    # Obs. start, obs. end and extrigs data quality start lines
+    ax.axvline(x=start_time, color='green', linestyle='--', linewidth=2, alpha=1)
+    ax.axvline(x=data_quality_start, color='darkslateblue', linestyle='--', linewidth=1, alpha=1)
+    ax.axvline(x=end_time, color='red', linestyle='--', linewidth=2, alpha=1)
+
+    # Pale lines for the transition
+    if has_transition:
+        ax.axvline(x=start_time_2, color='green', linestyle='--', linewidth=2, alpha=0.5)
+        if not (end_time == end_time_2) and (start_time == start_time_2):
+            ax.axvline(x=end_time_2, color='red', linestyle='--', linewidth=2, alpha=0.5)
+
+    # Entire obs. period, door open (darker after a transition) and door closed periods
+    _shade(ax, night, observing_window(night), color='grey', alpha=0.05)
+    _shade(ax, night, door.open, color='grey', alpha=0.1 if has_transition else 0.05)
+    _shade(ax, night, door.closed, **HATCH)
+
+    legend_elements = _source_legend(night) + [
+        Patch(facecolor='darkslateblue', label=f'Extrigs Start: {data_quality_start.strftime("%H:%M")} UTC'),
+        Patch(facecolor='green', label=f'Obs. Start: {start_time.strftime("%H:%M")} UTC'),
+        Patch(facecolor='red', label=f'Obs. End: {end_time.strftime("%H:%M")} UTC'),
+    ]
+    if has_transition:
+        legend_elements += [
+            Patch(facecolor='green', alpha=0.5, label=f'Transition: {start_time_2.strftime("%H:%M")} UTC'),
+            Patch(facecolor='red', alpha=0.5, label=f'Transition: {end_time_2.strftime("%H:%M")} UTC'),
+        ]
+    legend_elements += [
+        Patch(facecolor='grey', alpha=1, label='Door Open Obs'),
+        Patch(facecolor='white', alpha=.75, hatch='xx', label='Door Closed Obs'),
+        Patch(color='grey', alpha=0.5, label='Moon Position Relative'),
+        Patch(color='orange', alpha=0.5, label='Sun Position Relative'),
+        Patch(color='white', label=f'Moonphase: {illumination}%'),
+    ]
+    legend = ax.legend(fontsize=8, loc='lower right', handles=legend_elements)
+    legend.get_frame().set_facecolor('white')
+    legend.get_frame().set_alpha(0.8)
+    ax.add_artist(legend)
+
+    if illumination >= 90:
+        for text in legend.get_texts():
+            if 'Moonphase' in text.get_text():
+                text.set_color('red')
+
+    return fig
+
+
+_RENDERERS = {'moonset': _render_moonset, 'transition': _render_transition}
+
+
+class ChartTemplate:
+    """A chart's ``Figure`` and ``Axes``, set up once and redrawn night after night.
+
+    What every chart shares (axis labels, hour ticks, grid, horizon line) is
+    drawn once; ``render`` takes the previous chart's curves, spans, lines
+    and legends off before drawing the next, so a long-running process
+    keeps one figure instead of leaving one behind per night. The charts
+    are byte-identical to those of a new template. A template must only be
+    drawn on by one thread at a time.
+    """
+
+    def __init__(self):
+        self.figure = Figure()
+        self.axes = ax = self.figure.subplots()
+        self._subplot_params = {name: getattr(self.figure.subplotpars, name)
+                                for name in ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')}
+        self._horizon = ax.axhline(y=0, color='black', linestyle='--', linewidth=1.5, label='', zorder=5)
+        ax.set_xlabel('Time (UTC)', fontsize=10)
+        ax.set_ylabel('Elevation (degrees)', fontsize=10)
+        ax.xaxis.set_major_locator(HourLocator(interval=3))
+        ax.xaxis.set_major_formatter(DateFormatter('%H:%M'))
+        ax.xaxis.set_minor_locator(HourLocator(interval=1))
+        for label in ax.get_xticklabels():
+            label.set(rotation=45, ha='right')
+        ax.grid(True)
+
+    def clear(self):
+        """Back to the template: no curves, spans, night lines or legend, x limits and margins automatic."""
+        ax = self.axes
+        for artist in [line for line in ax.lines if line is not self._horizon] + list(ax.patches) + list(ax.artists):
+            artist.remove()
+        ax.legend_ = None
+        ax.relim()
+        ax.set_autoscalex_on(True)
+        self.figure.subplots_adjust(**self._subplot_params)
+
+    def render(self, night):
+        """Draw the night's schedule chart on the template; returns its figure."""
+        self.clear()
+        _RENDERERS[night.policy.variant](night, self.axes)
+        return self.figure
+
+
+def render(night):
+    """Draw the night's schedule chart on a new figure and return it."""
+    return ChartTemplate().render(night)
+
+
+def render_comparison(nights):
+    """One chart of the shared curves with every policy's window and door-open periods overlaid.
+
+    ``nights`` are ``Night``s of the same date and grid, one per policy
+    (``night.compute_nights``).
+    """
+    nights = list(nights)
+    first = nights[0]
+    chart = ChartTemplate()
+    fig, ax = chart.figure, chart.axes
+    _plot_altitudes(ax, first)
+    ax.set_xlim(min(first.times), min(first.times) + timedelta(hours=24))
+    _label_axes(ax, first)
+    ax.set_title('Policy Comparison ' + first.start_date.strftime("%m-%d-%Y") + ' UTC', fontsize=14)
+
+    legend_elements = []
+    for night, color in zip(nights, itertools.cycle(POLICY_COLORS)):
+        windows = night.windows
+        for start, end in door_states(night).open:
+            ax.axvspan(start, end, facecolor=color, alpha=0.15, linewidth=0)
+        for t, linestyle in ((windows.start_time, '--'), (windows.end_time, ':')):
+            if t is not None:
+                ax.axvline(x=t, color=color, linestyle=linestyle, linewidth=1.5)
+        span = ('none' if windows.start_time is None
+                else f'{windows.start_time.strftime("%H:%M")}-{windows.end_time.strftime("%H:%M")} UTC')
+        legend_elements.append(Patch(color=color, alpha=0.5, label=f'{night.policy.name}: {span}'))
+    legend_elements += [
+        Patch(color='grey', alpha=0.5, label='Moon Position Relative'),
+        Patch(color='orange', alpha=0.5, label='Sun Position Relative'),
+        Patch(color='white', label=f'Moonphase: {first.illumination}%'),
+    ]
+    legend = ax.legend(fontsize=8, loc='lower right', handles=legend_elements)
+    legend.get_frame().set_facecolor('white')
+    legend.get_frame().set_alpha(0.8)
+    return fig
+
+
+def output_paths(night, directory):
+    """Image and PDF paths the website expects for this night."""
+    image = 'schedule.jpg' if night.policy.variant == 'moonset' else 'schedule.png'
+    pdf = f"schedule_{night.start_date.strftime('%Y%m%d')}.pdf"
+    return os.path.join(directory, image), os.path.join(directory, 'schedule_pdf', pdf)
+
+
+def image_options(night):
+    """``savefig`` keywords of the night's chart image, beyond its path."""
+    if night.policy.variant == 'moonset':
+        return dict(format='jpg')
+    return dict(format='png', transparent=True, dpi=600)
+
+
+def _savefig_options(fig, night):
+    """``(format, savefig keywords)`` of the chart image, then of the PDF."""
+    options = image_options(night)
+    return ((options['format'], dict(options, facecolor=fig.get_facecolor())),
+            ('pdf', dict(format='pdf', metadata={'CreationDate': None})))  # same chart, same bytes
+
+
+def save_outputs(fig, night, directory):
+    """Write the chart image and dated PDF under ``directory``; returns their paths."""
+    paths = output_paths(night, directory)
+    for path, (format, options) in zip(paths, _savefig_options(fig, night)):
+        with stage('save', format=format):
+            fig.savefig(path, **options)
+    return paths
+
+
+def encode_outputs(fig, night):
+    """``{format: bytes}`` of the chart image and PDF ``save_outputs`` would write."""
+    encoded = {}
+    for format, options in _savefig_options(fig, night):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, **options)
+        encoded[format] = buffer.getvalue()
+    return encoded
+
+
+def _render_encoded(night):
+    return encode_outputs(render(night), night)
+
+
+def check_parallel(nights, workers=DEFAULT_WORKERS):
+    """Render ``nights`` serially, then on ``workers`` threads; the ``(night, format)``s whose bytes differ."""
+    nights = list(nights)
+    serial = [_render_encoded(night) for night in nights]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parallel = list(pool.map(_render_encoded, nights))
+    return [(night, format) for night, expected, encoded in zip(nights, serial, parallel)
+            for format in expected if encoded[format] != expected[format]]
+
+
+def main(argv=None):
+    from scheduling.bench import FIRST_NIGHT
+    from scheduling.night import compute_night
+    from scheduling.windows import POLICIES
+
+    parser = argparse.ArgumentParser(
+        description='Check that charts rendered on a thread pool match serially rendered ones byte for byte.')
+    parser.add_argument('--first-night', type=date.fromisoformat, default=FIRST_NIGHT,
+                        help=f'first night, YYYY-MM-DD (default: {FIRST_NIGHT})')
+    parser.add_argument('--nights', type=int, default=4, help='consecutive nights per policy (default: %(default)s)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help='rendering threads (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    nights = [compute_night(datetime.combine(args.first_night + timedelta(days=i), time()), policy=policy)
+              for policy in POLICIES.values() for i in range(args.nights)]
+    started = timer.perf_counter()
+    mismatches = check_parallel(nights, args.workers)
+    elapsed = timer.perf_counter() - started
+    for night, format in mismatches:
+        print(f"{night.start_date:%Y-%m-%d} {night.policy.name} {format}: parallel output differs", file=sys.stderr)
+    print(f"{len(nights)} charts, {len(mismatches)} mismatched outputs, {args.workers} workers, "
+          f"{elapsed:.1f} s serial and parallel")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
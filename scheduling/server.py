@@ -0,0 +1,284 @@
+"""Local HTTP/JSON query service for the schedule.
+
+    python -m scheduling.server --port 8765
+    curl 'localhost:8765/windows?date=2026-10-19&policy=scheduler'
+    curl 'localhost:8765/door?time=2026-10-19T08:00:00Z'
+    curl 'localhost:8765/sources?name=NGC%201068&start=2026-10-19&nights=30'
+
+Endpoints (all GET, all JSON; ``date`` defaults to today and ``time`` to
+now, UTC; ``policy`` to schedulerlily):
+
+- ``/``: the endpoints, policies and catalog sources.
+- ``/night?date=&policy=``: the night's full ``schedule.json`` document
+  (see scheduling.artifact).
+- ``/windows?date=&policy=``: its events, windows and Moon phase only.
+- ``/door?time=&policy=``: whether the door is ``open``, ``closed`` or
+  ``outside`` the observing period at ``time``, and since/until when.
+- ``/sources?name=&start=&nights=``: each source's (or the named one's)
+  observing windows on ``nights`` nights from ``start`` (default 1).
+
+A night is computed once for every policy (``night.compute_nights``, with
+the ephemeris cache and almanac of ``--directory``) and kept in an LRU of
+``--capacity`` nights, along with its documents, so only the first query
+of a night does ephemeris work (tens of ms) and later ones are lookups. The
+next ``--horizon`` nights are computed at startup. Clients are served on
+their own threads; concurrent queries of a night being computed wait for
+that computation instead of repeating it. Errors are ``{"error": ...}``
+with status 400 (bad parameters) or 404 (unknown endpoint or source).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from scheduling.windows import POLICIES, SCHEDULERLILY
+
+DEFAULT_PORT = 8765
+DEFAULT_CAPACITY = 400  # nights; a 1-minute night with the catalog is ~1 MB
+DEFAULT_HORIZON = 30
+MAX_NIGHTS = 366
+WINDOW_FIELDS = ('night', 'policy', 'events', 'windows', 'illumination')
+
+
+class QueryError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class NightStore:
+    """Computed nights (every policy at once) by date, least recently used evicted past ``capacity``."""
+
+    def __init__(self, site, cache=None, almanac=None, interval_minutes=1, capacity=DEFAULT_CAPACITY):
+        self.site = site
+        self.cache = cache
+        self.almanac = almanac
+        self.interval_minutes = interval_minutes
+        self.capacity = capacity
+        self.computed = 0
+        self._entries = OrderedDict()  # date -> {'nights': {policy: Night}, 'documents': {policy: dict}, 'doors': ...}
+        self._computing = {}  # date -> lock held while it is computed
+        self._lock = threading.Lock()
+
+    def _entry(self, night):
+        with self._lock:
+            entry = self._entries.get(night)
+            if entry is not None:
+                self._entries.move_to_end(night)
+                return entry
+            computing = self._computing.setdefault(night, threading.Lock())
+        with computing:
+            with self._lock:
+                entry = self._entries.get(night)
+            if entry is not None:  # computed while we waited
+                return entry
+            from scheduling.night import compute_nights
+
+            nights = compute_nights(datetime.combine(night, time()), self.site, tuple(POLICIES.values()),
+                                    self.interval_minutes, cache=self.cache, almanac=self.almanac)
+            entry = {'nights': nights, 'documents': {}, 'doors': {}}
+            with self._lock:
+                self._entries[night] = entry
+                self._computing.pop(night, None)
+                self.computed += 1
+                while len(self._entries) > self.capacity:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def night(self, night, policy):
+        """The ``Night`` of ``night`` (a date) under ``policy`` (a name)."""
+        return self._entry(night)['nights'][policy]
+
+    def _derived(self, night, kind, policy, build):
+        """``entry[kind][policy]``, built from the policy's ``Night`` the first time; every caller gets the same one."""
+        entry = self._entry(night)
+        with self._lock:
+            value = entry[kind].get(policy)
+        if value is None:
+            value = build(entry['nights'][policy])
+            with self._lock:
+                value = entry[kind].setdefault(policy, value)
+        return value
+
+    def document(self, night, policy):
+        """``artifact.schedule_document`` of the night, built once."""
+        from scheduling.artifact import schedule_document
+
+        return self._derived(night, 'documents', policy, lambda computed: schedule_document(computed, self.site))
+
+    def door(self, night, policy):
+        """``masks.door_states`` of the night, built once."""
+        from scheduling.masks import door_states
+
+        return self._derived(night, 'doors', policy, door_states)
+
+    def prefetch(self, first, nights):
+        for offset in range(nights):
+            self._entry(first + timedelta(days=offset))
+
+
+def _today():
+    return datetime.now(timezone.utc).date()
+
+
+def _parameter(query, name, parse, default):
+    values = query.get(name)
+    if not values:
+        return default
+    try:
+        return parse(values[0])
+    except ValueError:
+        raise QueryError(f"invalid {name}: {values[0]!r}") from None
+
+
+def _policy(query):
+    name = _parameter(query, 'policy', str, SCHEDULERLILY.name)
+    if name not in POLICIES:
+        raise QueryError(f"unknown policy {name!r}; one of {', '.join(sorted(POLICIES))}")
+    return name
+
+
+def _utc(text):
+    t = datetime.fromisoformat(text)
+    return t if t.tzinfo is None else t.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def query_windows(store, query):
+    document = store.document(_parameter(query, 'date', date.fromisoformat, None) or _today(), _policy(query))
+    return {field: document[field] for field in WINDOW_FIELDS}
+
+
+def query_night(store, query):
+    return store.document(_parameter(query, 'date', date.fromisoformat, None) or _today(), _policy(query))
+
+
+def query_door(store, query):
+    from scheduling.artifact import json_time
+
+    t = _parameter(query, 'time', _utc, None) or datetime.now(timezone.utc).replace(tzinfo=None)
+    policy = _policy(query)
+    night = t.date()  # the night whose grid (UTC midnight + 27 h) holds the observing period around t
+    door = store.door(night, policy)
+    answer = {'time': json_time(t), 'night': night.isoformat(), 'policy': policy, 'state': 'outside', 'since': None,
+              'until': None}
+    for state, intervals in (('open', door.open), ('closed', door.closed)):
+        for start, end in intervals:
+            if start <= t < end:
+                answer.update(state=state, since=json_time(start), until=json_time(end))
+    return answer
+
+
+def query_sources(store, query):
+    from scheduling.artifact import json_periods
+
+    first = _parameter(query, 'start', date.fromisoformat, None) or _today()
+    count = _parameter(query, 'nights', int, 1)
+    if not 1 <= count <= MAX_NIGHTS:
+        raise QueryError(f"nights must be 1 to {MAX_NIGHTS}")
+    name = _parameter(query, 'name', str, None)
+    catalog = store.night(first, SCHEDULERLILY.name).sources
+    sources = [source for source in catalog if name is None or source.name == name]
+    if not sources:
+        raise QueryError(f"unknown source {name!r}", status=404)
+    nights = [store.night(first + timedelta(days=offset), SCHEDULERLILY.name) for offset in range(count)]
+    return {'sources': [dict(source._asdict(), nights=[
+        {'night': night.start_date.date().isoformat(), 'windows': json_periods(night.source_windows[source.name])}
+        for night in nights]) for source in sources]}
+
+
+def query_index(store, query):
+    return {'endpoints': sorted(ENDPOINTS), 'policies': sorted(POLICIES),
+            'sources': [source.name for source in store.night(_today(), SCHEDULERLILY.name).sources]}
+
+
+ENDPOINTS = {'/': query_index, '/night': query_night, '/windows': query_windows, '/door': query_door,
+             '/sources': query_sources}
+
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = 'trinity-schedule'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        endpoint = ENDPOINTS.get(url.path.rstrip('/') or '/')
+        try:
+            if endpoint is None:
+                raise QueryError(f"no endpoint {url.path}; one of {', '.join(sorted(ENDPOINTS))}", status=404)
+            status, body = 200, endpoint(self.server.store, parse_qs(url.query))
+        except QueryError as e:
+            status, body = e.status, {'error': str(e)}
+        except Exception as e:
+            logging.exception("Query %s failed", self.path)
+            status, body = 500, {'error': str(e)}
+        encoded = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+
+class Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # socketserver's 5 drops connections from a burst of clients
+
+    def __init__(self, store, host='127.0.0.1', port=DEFAULT_PORT):
+        super().__init__((host, port), Handler)
+        self.store = store
+
+
+def main(argv=None):
+    from scheduling.cli import ALMANAC_FILE, CACHE_DIRECTORY, DEFAULT_DIRECTORY
+
+    parser = argparse.ArgumentParser(description='Answer schedule queries over local HTTP/JSON.')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='port to listen on (default: %(default)s)')
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY,
+                        help='scheduling directory whose ephemeris cache and almanac are used')
+    parser.add_argument('--no-cache', action='store_true', help='do not use the ephemeris cache')
+    parser.add_argument('--interval-minutes', type=int, default=1, help='sampling interval of the nights')
+    parser.add_argument('--capacity', type=int, default=DEFAULT_CAPACITY, help='nights kept in memory')
+    parser.add_argument('--horizon', type=int, default=DEFAULT_HORIZON,
+                        help='nights from today computed at startup (default: %(default)s)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log every request')
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    for name in ('matplotlib', 'PIL'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    from scheduling.site import FRISCO_PEAK
+
+    cache = almanac = None
+    if not args.no_cache:
+        from scheduling.cache import EphemerisCache
+        cache = EphemerisCache(os.path.join(args.directory, CACHE_DIRECTORY))
+    almanac_path = os.path.join(args.directory, ALMANAC_FILE)
+    if os.path.exists(almanac_path):
+        from scheduling.almanac import Almanac
+        almanac = Almanac(almanac_path)
+    store = NightStore(FRISCO_PEAK, cache, almanac, args.interval_minutes, max(args.capacity, args.horizon))
+    server = Server(store, args.host, args.port)
+    threading.Thread(target=store.prefetch, args=(_today(), args.horizon), daemon=True).start()
+    logging.info("Serving schedule queries on http://%s:%d/", *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,12 @@
+"""Observatory site definitions."""
+
+from typing import NamedTuple
+
+
+class Site(NamedTuple):
+    latitude: float  # degrees, north positive
+    longitude: float  # degrees, east positive
+    elevation: float  # metres
+
+
+FRISCO_PEAK = Site(latitude=38.5202, longitude=-113.2883, elevation=3048)
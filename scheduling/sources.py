@@ -0,0 +1,155 @@
+"""Astrophysical sources of interest and their Earth-skimming observing windows.
+
+Sources are listed in a catalog CSV (``catalog.csv`` next to this module by
+default) with columns ``name, ra, dec, epoch, color, band_low_deg,
+band_high_deg``: RA in hours and Dec in degrees as ephem accepts them
+('02:42:40.7' or decimal), and the altitude band in which the source is
+observed while it sets below the horizon.
+
+``source_altitudes`` computes every source in one vectorized pass (ephem
+once per source and night, see ``ephemeris.fixed_altaz``) and
+``source_windows`` turns the altitudes into each source's observing windows:
+
+    python -m scheduling.sources --night 2026-10-19
+    python -m scheduling.sources --night 2026-10-19 --check  # error against per-sample ephem
+"""
+
+import argparse
+import csv
+import math
+import os
+import sys
+from datetime import date, datetime, time
+from typing import NamedTuple
+
+import ephem
+import numpy as np
+
+from scheduling.ephemeris import FIXED_TOLERANCE, compare_fixed_with_ephem, fixed_altaz, time_grid
+from scheduling.intervals import IntervalSet
+from scheduling.site import FRISCO_PEAK
+
+BAND_LOW_DEG = -10
+BAND_HIGH_DEG = 0
+CATALOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'catalog.csv')
+
+
+class Source(NamedTuple):
+    name: str
+    ra: str  # hours
+    dec: str  # degrees
+    epoch: str = '2000'
+    color: str = 'grey'
+    band_low_deg: float = BAND_LOW_DEG
+    band_high_deg: float = BAND_HIGH_DEG
+
+    def body(self):
+        """The source as an ephem FixedBody."""
+        body = ephem.FixedBody()
+        body.name = self.name
+        body._ra = self.ra
+        body._dec = self.dec
+        body._epoch = self.epoch
+        return body
+
+
+def load_catalog(path=CATALOG_PATH):
+    """Sources listed in a catalog CSV, in file order; ValueError, naming the line, for a bad entry."""
+    with open(path, newline='') as file:
+        rows = list(csv.DictReader(file))
+    sources = []
+    for line, row in enumerate(rows, start=2):
+        try:
+            sources.append(Source(
+                name=row['name'].strip(),
+                ra=row['ra'].strip(),
+                dec=row['dec'].strip(),
+                epoch=(row.get('epoch') or '2000').strip(),
+                color=(row.get('color') or 'grey').strip(),
+                band_low_deg=float(row.get('band_low_deg') or BAND_LOW_DEG),
+                band_high_deg=float(row.get('band_high_deg') or BAND_HIGH_DEG),
+            ))
+            if not all(sources[-1][:3]):
+                raise ValueError("name, ra and dec are required")
+            body = sources[-1].body()  # let ephem reject bad coordinates here rather than mid-run
+            if not (0 <= body._ra < 2 * math.pi and abs(body._dec) <= math.pi / 2):
+                raise ValueError(f"coordinates out of range: ra {sources[-1].ra}, dec {sources[-1].dec}")
+        except (KeyError, AttributeError, ValueError) as e:
+            raise ValueError(f"{path}:{line}: bad catalog entry: {e}") from None
+    return sources
+
+
+def default_sources():
+    return load_catalog()
+
+
+def source_altitudes(site, times, sources):
+    """Altitudes (degrees) of all ``sources`` over ``times``, shape ``(len(sources), len(times))``."""
+    altitudes, _ = fixed_altaz([source.body() for source in sources], site, times)
+    return altitudes
+
+
+def observing_flags(altitudes, low=BAND_LOW_DEG, high=BAND_HIGH_DEG):
+    """Which samples the source spends descending through the band (low, high) degrees.
+
+    ``altitudes`` may hold one source per row; the result has one sample
+    less along the last axis.
+    """
+    altitudes = np.asarray(altitudes, dtype=float)
+    now, later = altitudes[..., :-1], altitudes[..., 1:]
+    in_band = ((high > now) & (now > low)) | ((high > later) & (later > low))
+    return in_band & (now > later)
+
+
+def source_windows(times, altitudes, sources):
+    """Each source's observing windows as an ``IntervalSet``, keyed by name.
+
+    ``altitudes`` is the ``source_altitudes`` array for the same ``sources``.
+    """
+    times = list(times)
+    low = np.array([[source.band_low_deg] for source in sources])
+    high = np.array([[source.band_high_deg] for source in sources])
+    flags = observing_flags(altitudes, low, high)
+    return {source.name: IntervalSet.from_flags(times, row) for source, row in zip(sources, flags)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print every catalog source's observing windows for one night.")
+    parser.add_argument('--night', type=date.fromisoformat, required=True, help='UTC date of the night, YYYY-MM-DD')
+    parser.add_argument('--catalog', default=CATALOG_PATH, help='source catalog CSV')
+    parser.add_argument('--hours', type=int, default=24, help='length of the grid from 00:00 UTC')
+    resolution = parser.add_mutually_exclusive_group()
+    resolution.add_argument('--interval-minutes', type=int, default=1)
+    resolution.add_argument('--interval-seconds', type=float, default=None, help='sub-minute sampling interval')
+    parser.add_argument('--check', action='store_true',
+                        help='report the altitude/azimuth error against per-sample ephem instead of the windows')
+    args = parser.parse_args(argv)
+
+    sources = load_catalog(args.catalog)
+    times = time_grid(datetime.combine(args.night, time()), args.hours, args.interval_minutes,
+                      args.interval_seconds).tolist()
+    if args.check:
+        return _check(times, sources)
+    windows = source_windows(times, source_altitudes(FRISCO_PEAK, times, sources), sources)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(('name', 'start', 'end'))
+    for name, intervals in windows.items():
+        for start, end in intervals:
+            writer.writerow((name, start.isoformat(), end.isoformat()))
+    return 0
+
+
+def _check(times, sources):
+    errors = compare_fixed_with_ephem(FRISCO_PEAK, times, [source.body() for source in sources])
+    writer = csv.writer(sys.stdout)
+    writer.writerow(('name', 'altitude_error_deg', 'azimuth_error_deg'))
+    for name, (altitude_error, azimuth_error) in errors.items():
+        writer.writerow((name, f'{altitude_error:.2e}', f'{azimuth_error:.2e}'))
+    worst = max((altitude_error for altitude_error, _ in errors.values()), default=0.0)
+    print(f"Largest altitude error {worst:.2e} degrees (bound {FIXED_TOLERANCE:g})", file=sys.stderr)
+    return 0 if worst <= FIXED_TOLERANCE else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
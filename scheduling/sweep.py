@@ -0,0 +1,254 @@
+"""Threshold sweeps: observing time over a date range for a grid of parameters.
+
+    python -m scheduling.sweep 2026-11-01 2027-04-30 --sunrise-crit -18 -15 -12 --moonset -3 -1 0 -o sweep.csv
+
+Every combination of the policy variant, the Sun crit thresholds, the
+moonset threshold, the minimum window, the data-quality lead and the source
+band is evaluated on every night, and one row per combination reports the
+totals: door open and closed hours (as ``masks.door_states`` counts them),
+window hours, nights too short and source observing hours.
+
+Each night is computed once, whatever the size of the grid: the Sun, Moon
+and source series (through an ``EphemerisCache`` when one is given), the
+events for each distinct threshold (``events.EventSolver``, bracketed on
+``events.night_series`` as in ``night.compute_nights``) and the safe
+samples for each distinct (moonset, sunset crit) pair. The combinations
+are then evaluated for all nights at once with
+``windows.decide_windows_arrays`` and prefix sums of the safe samples, so
+the number of combinations barely matters.
+"""
+
+import argparse
+import csv
+import itertools
+import sys
+import time as timer
+from datetime import date, datetime, time
+
+import numpy as np
+
+from scheduling.batch import night_range
+from scheduling.ephemeris import body_key, compute_positions, time_grid
+from scheduling.events import EventSolver, night_series
+from scheduling.night import NIGHT_HOURS, SOURCE_HOURS
+from scheduling.site import FRISCO_PEAK
+from scheduling.sources import BAND_HIGH_DEG, BAND_LOW_DEG, default_sources, observing_flags, source_altitudes
+from scheduling.windows import SCHEDULER, SCHEDULERLILY, Policy, decide_windows_arrays
+
+PARAMETERS = ('variant', 'sunrise_crit_deg', 'sunset_crit_deg', 'moonset_deg', 'min_window_minutes',
+              'data_quality_lead_minutes', 'band_low_deg', 'band_high_deg')
+TOTALS = ('nights', 'door_open_hours', 'door_closed_hours', 'window_hours', 'too_short_nights', 'source_hours')
+DEFAULT_GRID = {
+    'variant': ['transition', 'moonset'],
+    'sunrise_crit_deg': sorted({SCHEDULER.sunrise_crit_deg, SCHEDULERLILY.sunrise_crit_deg}),
+    'sunset_crit_deg': [SCHEDULERLILY.sunset_crit_deg],
+    'moonset_deg': [SCHEDULERLILY.moonset_deg],
+    'min_window_minutes': [SCHEDULERLILY.min_window_minutes],
+    'data_quality_lead_minutes': [SCHEDULERLILY.data_quality_lead_minutes],
+    'band_low_deg': [BAND_LOW_DEG],
+    'band_high_deg': [BAND_HIGH_DEG],
+}
+CHUNK_NIGHTS = 366  # nights whose per-sample data is held at once
+
+_MS_PER_HOUR = 3600000
+
+
+def parameter_sets(grid):
+    """Every combination of ``grid`` (parameter name -> values; missing names take ``DEFAULT_GRID``'s)."""
+    grid = dict(DEFAULT_GRID, **grid)
+    return [dict(zip(PARAMETERS, values)) for values in itertools.product(*(grid[name] for name in PARAMETERS))]
+
+
+def _positive_ms(delta):
+    ms = delta.astype('timedelta64[ms]').astype('int64')
+    return np.where(np.isnat(delta) | (ms < 0), 0, ms)
+
+
+class _Chunk:
+    """Per-night data of consecutive nights, computed once for every parameter set."""
+
+    def __init__(self, nights, site, sets, sources, cache, interval_minutes):
+        triples = sorted({(p['sunrise_crit_deg'], p['sunset_crit_deg'], p['moonset_deg']) for p in sets})
+        pairs = sorted({(p['moonset_deg'], p['sunset_crit_deg']) for p in sets})
+        bands = sorted({(p['band_low_deg'], p['band_high_deg']) for p in sets})
+
+        self.starts = np.array([np.datetime64(datetime.combine(night, time()), 'ms') for night in nights])
+        self.events = {triple: {} for triple in triples}
+        self.safe = {pair: [] for pair in pairs}
+        self.source_ms = dict.fromkeys(bands, 0)
+        rows = {triple: [] for triple in triples}
+        # Every night's grid has the same sample offsets from its start
+        grid = time_grid(self.starts[0].astype(datetime), NIGHT_HOURS, interval_minutes)
+        self.offsets = (grid - grid[0]).astype('int64')
+        durations = np.diff(self.offsets)
+        for start in self.starts:
+            times = start + self.offsets.astype('timedelta64[ms]')
+            sun, moon = (self._altitudes(site, times, body, cache) for body in ('sun', 'moon'))
+
+            # Bracketed on the same series as night.compute_nights, so the events are the nightly run's
+            solver = EventSolver(site, *night_series(site, start.astype(datetime), NIGHT_HOURS)[:3])
+            for triple in triples:
+                rows[triple].append(solver.events(*triple))
+
+            # masks.unsafe: the Moon descending above the moonset threshold or the Sun above the sunset crit
+            descending = (moon < np.roll(moon, 1))[:-1]
+            for moonset_deg, sunset_crit_deg in pairs:
+                unsafe = (descending & (moon[:-1] > moonset_deg)) | (sun[:-1] > sunset_crit_deg)
+                self.safe[moonset_deg, sunset_crit_deg].append(np.where(unsafe, 0, durations))
+
+            source_times = time_grid(start.astype(datetime), SOURCE_HOURS, interval_minutes)
+            source_durations = np.diff(source_times).astype('int64')
+            altitudes = (cache.source_altitudes(site, source_times, sources) if cache is not None
+                         else source_altitudes(site, source_times, sources))
+            for low, high in bands:
+                self.source_ms[low, high] += int((observing_flags(altitudes, low, high) * source_durations).sum())
+
+        for triple, events in rows.items():
+            for name in events[0]._fields[:-1]:
+                self.events[triple][name] = np.array(
+                    [np.datetime64('NaT') if getattr(e, name) is None else getattr(e, name) for e in events],
+                    dtype='datetime64[ms]')
+        # suffix[i, k]: safe milliseconds of night i from sample k to the end of the grid
+        self.safe = {pair: np.stack(safe) for pair, safe in self.safe.items()}
+        self.suffix = {pair: np.concatenate((np.cumsum(safe[:, ::-1], axis=1)[:, ::-1],
+                                             np.zeros((len(safe), 1), dtype=safe.dtype)), axis=1)
+                       for pair, safe in self.safe.items()}
+
+    @staticmethod
+    def _altitudes(site, times, body, cache):
+        if cache is not None:
+            return np.asarray(cache.altitudes(site, times, body))
+        return compute_positions(site, times, (body,))[body_key(body)][0]
+
+    def safe_after(self, pair, cuts):
+        """Safe milliseconds of each night from ``cuts`` (NaT: the whole grid) to the end of the grid."""
+        safe, suffix = self.safe[pair], self.suffix[pair]
+        rows = np.arange(len(safe))
+        relative = np.where(np.isnat(cuts), np.iinfo('int64').min, (cuts - self.starts).astype('int64'))
+        k = np.searchsorted(self.offsets, relative, side='right') - 1
+        inside = (k >= 0) & (k < safe.shape[1])
+        k_inside = np.clip(k, 0, safe.shape[1] - 1)
+        partial = np.where(safe[rows, k_inside] > 0, self.offsets[np.minimum(k_inside + 1, len(self.offsets) - 1)]
+                           - relative, 0)
+        return np.where(k < 0, suffix[:, 0], np.where(inside, suffix[rows, k_inside + 1] + partial, 0))
+
+    def safe_between(self, pair, starts, ends):
+        """Safe milliseconds of each night from ``starts`` to ``ends`` (0 where either is NaT)."""
+        between = self.safe_after(pair, starts) - self.safe_after(pair, ends)
+        return np.where(np.isnat(starts) | np.isnat(ends) | (ends <= starts), 0, between)
+
+    def totals(self, parameters):
+        """``TOTALS`` of these nights for one parameter set (hours as milliseconds)."""
+        policy = Policy('sweep', parameters['variant'], parameters['sunrise_crit_deg'], parameters['sunset_crit_deg'],
+                        parameters['moonset_deg'], parameters['min_window_minutes'],
+                        parameters['data_quality_lead_minutes'])
+        windows = decide_windows_arrays(self.events[policy.sunrise_crit_deg, policy.sunset_crit_deg,
+                                                    policy.moonset_deg], policy)
+        start, end, start_2, end_2, data_quality_start, too_short = windows
+        pair = (policy.moonset_deg, policy.sunset_crit_deg)
+
+        if policy.variant == 'moonset':
+            door_open, door_closed = self.safe_between(pair, start, end), np.zeros(len(start), dtype='int64')
+        else:
+            # masks.door_states, night for night: safe from the door opening to the end time, less the
+            # closed period after the transition when the transition starts the window
+            has_transition = ~(np.isnat(start_2) & np.isnat(end_2))
+            transition_is_window = has_transition & (start == start_2) & (end == end_2)
+            closes_early = has_transition & (start_2 == start) & ~np.isnat(end_2)
+            door_closed = (_positive_ms(start - data_quality_start)
+                           + np.where(has_transition & ~transition_is_window, _positive_ms(start_2 - start), 0)
+                           + np.where(closes_early, _positive_ms(end - end_2), 0))
+            opens = np.where(np.isnat(start_2), start, np.maximum(start, start_2))
+            closes = np.where(closes_early, np.minimum(end, end_2), end)
+            door_open = np.where(transition_is_window, 0, self.safe_between(pair, opens, closes))
+        return {
+            'nights': len(start),
+            'door_open_hours': int(door_open.sum()),
+            'door_closed_hours': int(door_closed.sum()),
+            'window_hours': int(_positive_ms(end - start).sum()),
+            'too_short_nights': int(too_short.sum()),
+            'source_hours': self.source_ms[parameters['band_low_deg'], parameters['band_high_deg']],
+        }
+
+
+def sweep(first_night, last_night, grid=None, site=FRISCO_PEAK, sources=None, cache=None, interval_minutes=1,
+          chunk_nights=CHUNK_NIGHTS):
+    """One dict per parameter set of ``grid`` with its ``PARAMETERS`` and ``TOTALS`` over the nights.
+
+    ``grid`` maps parameter names to lists of values (see ``DEFAULT_GRID``).
+    With an ``EphemerisCache`` the Sun, Moon and source series are read
+    from it, so sweeping the same range again skips the ephemeris.
+    """
+    sets = parameter_sets(grid or {})
+    if sources is None:
+        sources = default_sources()
+    rows = [dict(parameters, **dict.fromkeys(TOTALS, 0)) for parameters in sets]
+    nights = night_range(first_night, last_night)
+    for first in range(0, len(nights), chunk_nights):
+        chunk = _Chunk(nights[first:first + chunk_nights], site, sets, sources, cache, interval_minutes)
+        for row, parameters in zip(rows, sets):
+            for name, value in chunk.totals(parameters).items():
+                row[name] += value
+    for row in rows:
+        for name in TOTALS:
+            if name.endswith('_hours'):
+                row[name] = round(row[name] / _MS_PER_HOUR, 2)
+    return rows
+
+
+def write_table(rows, file):
+    writer = csv.DictWriter(file, fieldnames=PARAMETERS + TOTALS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Total observing time over a date range for a grid of thresholds.')
+    parser.add_argument('first_night', type=date.fromisoformat, help='first night, YYYY-MM-DD')
+    parser.add_argument('last_night', type=date.fromisoformat, help='last night (inclusive), YYYY-MM-DD')
+    parser.add_argument('--variant', nargs='+', choices=('transition', 'moonset'), default=DEFAULT_GRID['variant'])
+    parser.add_argument('--sunrise-crit', nargs='+', type=float, default=DEFAULT_GRID['sunrise_crit_deg'],
+                        help='Sun crit degrees at sunrise')
+    parser.add_argument('--sunset-crit', nargs='+', type=float, default=DEFAULT_GRID['sunset_crit_deg'],
+                        help='Sun crit degrees at sunset')
+    parser.add_argument('--moonset', nargs='+', type=float, default=DEFAULT_GRID['moonset_deg'],
+                        help='moonset threshold degrees')
+    parser.add_argument('--min-window', nargs='+', type=float, default=DEFAULT_GRID['min_window_minutes'],
+                        help='shortest useful window, minutes')
+    parser.add_argument('--lead', nargs='+', type=float, default=DEFAULT_GRID['data_quality_lead_minutes'],
+                        help='data-quality lead before the start, minutes')
+    parser.add_argument('--band-low', nargs='+', type=float, default=DEFAULT_GRID['band_low_deg'],
+                        help='lower edge of the source band, degrees')
+    parser.add_argument('--band-high', nargs='+', type=float, default=DEFAULT_GRID['band_high_deg'],
+                        help='upper edge of the source band, degrees')
+    parser.add_argument('--interval-minutes', type=int, default=1)
+    parser.add_argument('--cache', metavar='DIRECTORY', help='ephemeris cache directory (see scheduling.cache)')
+    parser.add_argument('-o', '--output', help='CSV file to write (default: stdout)')
+    args = parser.parse_args(argv)
+
+    if args.last_night < args.first_night:
+        parser.error('last_night is before first_night')
+    grid = {'variant': args.variant, 'sunrise_crit_deg': args.sunrise_crit, 'sunset_crit_deg': args.sunset_crit,
+            'moonset_deg': args.moonset, 'min_window_minutes': args.min_window,
+            'data_quality_lead_minutes': args.lead, 'band_low_deg': args.band_low, 'band_high_deg': args.band_high}
+    cache = None
+    if args.cache:
+        from scheduling.cache import EphemerisCache
+        cache = EphemerisCache(args.cache)
+
+    started = timer.perf_counter()
+    rows = sweep(args.first_night, args.last_night, grid, cache=cache, interval_minutes=args.interval_minutes)
+    elapsed = timer.perf_counter() - started
+
+    if args.output:
+        with open(args.output, 'w', newline='') as file:
+            write_table(rows, file)
+    else:
+        write_table(rows, sys.stdout)
+    print(f"Swept {len(rows)} parameter sets over {rows[0]['nights'] if rows else 0} nights in {elapsed:.1f} s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
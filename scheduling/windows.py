@@ -0,0 +1,238 @@
+"""Observation window decision.
+
+The two scripts share their ephemeris and differ in how a night's events are
+turned into a window:
+
+* ``scheduler.py`` ('moonset' variant, Sun crit at -18 degrees on both sides)
+  starts at moonset when the Moon sets during the dark period and ends at the
+  Moon's culmination if that comes later; the second window replaces the
+  first when it exists.
+* ``schedulerlily.py`` ('transition' variant, sunrise crit at -15 degrees)
+  always starts at the sunset crit and reports the door transition window in
+  ``start_time_2``/``end_time_2`` alongside the full window.
+
+``decide_windows`` decides one night. ``decide_windows_arrays`` runs the
+same decision over arrays of nights at once (``datetime64`` event times,
+NaT where an event doesn't happen), so studies over years of nights or
+many thresholds don't loop in Python::
+
+    events = stack_events(list_of_night_events)  # or Almanac.event_arrays(policy)
+    windows = decide_windows_arrays(events, policy)
+    windows.too_short.sum()
+"""
+
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+
+
+class Policy(NamedTuple):
+    name: str
+    variant: str  # 'moonset' (scheduler.py) or 'transition' (schedulerlily.py)
+    sunrise_crit_deg: float
+    sunset_crit_deg: float = -18
+    moonset_deg: float = -3
+    min_window_minutes: float = 95
+    data_quality_lead_minutes: float = 32
+
+
+SCHEDULER = Policy('scheduler', 'moonset', sunrise_crit_deg=-18)
+SCHEDULERLILY = Policy('schedulerlily', 'transition', sunrise_crit_deg=-15)
+POLICIES = {policy.name: policy for policy in (SCHEDULER, SCHEDULERLILY)}
+
+
+class NightWindows(NamedTuple):
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+    start_time_2: Optional[datetime]
+    end_time_2: Optional[datetime]
+    data_quality_start: Optional[datetime]
+    too_short: bool  # the scripts' "Observation window too short."
+
+
+def _between(low, t, high):
+    return t is not None and low is not None and high is not None and low < t < high
+
+
+def _moonset_variant(events, policy):
+    sunset_crit, sunrise_crit = events.sunset_crit, events.sunrise_crit
+    moonset, moon_max = events.moonset, events.moon_max
+    start_time_2 = end_time_2 = None
+    too_short = False
+
+    if not _between(sunset_crit, moonset, sunrise_crit):  # if sun doesn't set before moon
+        start_time = sunset_crit
+    else:
+        start_time = moonset
+
+    if not _between(sunset_crit, moon_max, sunrise_crit):  # moon peak not during the dark period
+        end_time = sunrise_crit
+    elif start_time > moon_max:
+        end_time = sunrise_crit
+    else:
+        end_time = moon_max
+
+    if start_time == sunset_crit and end_time == moon_max:
+        if _between(sunset_crit, moonset, sunrise_crit):
+            start_time_2 = moonset
+            end_time_2 = sunrise_crit
+            too_short = (end_time_2 - start_time_2) < timedelta(minutes=policy.min_window_minutes)
+
+    if start_time_2 and end_time_2:
+        start_time, end_time = start_time_2, end_time_2
+
+    return start_time, end_time, start_time_2, end_time_2, too_short
+
+
+def _transition_variant(events, policy):
+    sunset_crit, sunrise_crit = events.sunset_crit, events.sunrise_crit
+    moonset, moon_max = events.moonset, events.moon_max
+    min_window = timedelta(minutes=policy.min_window_minutes)
+    start_time_2 = end_time_2 = None
+    too_short = False
+
+    start_time = sunset_crit
+
+    if not _between(sunset_crit, moon_max, sunrise_crit):
+        end_time = sunrise_crit
+    elif start_time > moon_max:
+        end_time = sunrise_crit
+    else:
+        end_time = moon_max
+
+    if start_time == sunset_crit and end_time == moon_max:
+        if _between(sunset_crit, moonset, sunrise_crit):
+            # Door opens at moonset, runs to the sunrise crit
+            start_time_2 = moonset
+            end_time = sunrise_crit
+            end_time_2 = moon_max
+            too_short = (end_time_2 - start_time_2) < min_window
+        elif moonset is not None and sunrise_crit is not None and moonset > sunrise_crit:
+            # Door open until the Moon peaks, closed from then to the sunrise crit
+            start_time_2 = sunset_crit
+            end_time_2 = moon_max
+            end_time = sunrise_crit
+            too_short = (end_time_2 - start_time) < min_window
+    elif start_time == sunset_crit and end_time == sunrise_crit:
+        if _between(sunset_crit, moonset, sunrise_crit):
+            start_time_2 = moonset
+            end_time_2 = sunrise_crit
+            too_short = (end_time - start_time_2) < min_window
+
+    return start_time, end_time, start_time_2, end_time_2, too_short
+
+
+_VARIANTS = {'moonset': _moonset_variant, 'transition': _transition_variant}
+
+
+def decide_windows(events, policy=SCHEDULERLILY):
+    """Observation window for one night from its ``NightEvents``."""
+    try:
+        variant = _VARIANTS[policy.variant]
+    except KeyError:
+        raise ValueError(f"Unknown policy variant {policy.variant!r}; expected one of {tuple(_VARIANTS)}") from None
+    start_time, end_time, start_time_2, end_time_2, too_short = variant(events, policy)
+    data_quality_start = None
+    if start_time is not None:
+        data_quality_start = start_time - timedelta(minutes=policy.data_quality_lead_minutes)
+    return NightWindows(start_time, end_time, start_time_2, end_time_2, data_quality_start, too_short)
+
+
+# NumPy is only imported by the array functions, so the CLI can import this module at startup
+
+def _moonset_variant_arrays(np, events, policy):
+    sunset_crit, sunrise_crit = events['sunset_crit'], events['sunrise_crit']
+    moonset, moon_max = events['moonset'], events['moon_max']
+    moonset_dark = (sunset_crit < moonset) & (moonset < sunrise_crit)
+    moon_max_dark = (sunset_crit < moon_max) & (moon_max < sunrise_crit)
+
+    start_time = np.where(moonset_dark, moonset, sunset_crit)
+    end_time = np.where(~moon_max_dark | (start_time > moon_max), sunrise_crit, moon_max)
+
+    second = (start_time == sunset_crit) & (end_time == moon_max) & moonset_dark
+    nat = np.full_like(start_time, np.datetime64('NaT'))
+    start_time_2 = np.where(second, moonset, nat)
+    end_time_2 = np.where(second, sunrise_crit, nat)
+    too_short = second & (end_time_2 - start_time_2 < np.timedelta64(int(policy.min_window_minutes * 60000), 'ms'))
+
+    start_time = np.where(second, start_time_2, start_time)
+    end_time = np.where(second, end_time_2, end_time)
+    return start_time, end_time, start_time_2, end_time_2, too_short
+
+
+def _transition_variant_arrays(np, events, policy):
+    sunset_crit, sunrise_crit = events['sunset_crit'], events['sunrise_crit']
+    moonset, moon_max = events['moonset'], events['moon_max']
+    min_window = np.timedelta64(int(policy.min_window_minutes * 60000), 'ms')
+    moonset_dark = (sunset_crit < moonset) & (moonset < sunrise_crit)
+    moon_max_dark = (sunset_crit < moon_max) & (moon_max < sunrise_crit)
+    nat = np.full_like(sunset_crit, np.datetime64('NaT'))
+
+    start_time = sunset_crit
+    end_time = np.where(~moon_max_dark | (start_time > moon_max), sunrise_crit, moon_max)
+
+    until_moon_max = (start_time == sunset_crit) & (end_time == moon_max)
+    # Door opens at moonset, runs to the sunrise crit
+    opens = until_moon_max & moonset_dark
+    # Door open until the Moon peaks, closed from then to the sunrise crit
+    closes = until_moon_max & ~moonset_dark & (moonset > sunrise_crit)
+    # Whole dark period, door opens at moonset
+    late = (start_time == sunset_crit) & (end_time == sunrise_crit) & moonset_dark & ~until_moon_max
+
+    start_time_2 = np.where(opens | late, moonset, np.where(closes, sunset_crit, nat))
+    end_time_2 = np.where(opens | closes, moon_max, np.where(late, sunrise_crit, nat))
+    too_short = ((opens & (end_time_2 - start_time_2 < min_window))
+                 | (closes & (end_time_2 - start_time < min_window))
+                 | (late & (end_time - start_time_2 < min_window)))
+    end_time = np.where(opens | closes, sunrise_crit, end_time)
+    return start_time, end_time, start_time_2, end_time_2, too_short
+
+
+_ARRAY_VARIANTS = {'moonset': _moonset_variant_arrays, 'transition': _transition_variant_arrays}
+
+
+def decide_windows_arrays(events, policy=SCHEDULERLILY):
+    """``decide_windows`` for many nights at once.
+
+    ``events`` maps event names (``sunset_crit``, ``sunrise_crit``,
+    ``moonset``, ``moon_max``; others are ignored) to equal-length
+    ``datetime64`` arrays with NaT for events that don't happen: a dict, a
+    structured array or a ``NightEvents`` of arrays. Returns a
+    ``NightWindows`` of ``datetime64[ms]`` arrays (NaT for None) and a
+    boolean ``too_short`` array, night for night what ``decide_windows``
+    returns.
+    """
+    import numpy as np
+
+    try:
+        variant = _ARRAY_VARIANTS[policy.variant]
+    except KeyError:
+        raise ValueError(f"Unknown policy variant {policy.variant!r}; "
+                         f"expected one of {tuple(_ARRAY_VARIANTS)}") from None
+    if hasattr(events, '_asdict'):
+        events = events._asdict()
+    events = {name: np.asarray(events[name], dtype='datetime64[ms]')
+              for name in ('sunset_crit', 'sunrise_crit', 'moonset', 'moon_max')}
+    start_time, end_time, start_time_2, end_time_2, too_short = variant(np, events, policy)
+    data_quality_start = start_time - np.timedelta64(int(policy.data_quality_lead_minutes * 60000), 'ms')
+    return NightWindows(start_time, end_time, start_time_2, end_time_2, data_quality_start, too_short)
+
+
+def stack_events(nights):
+    """Per-night ``NightEvents`` (or other named tuples of datetimes) as a dict of ``datetime64[ms]`` arrays."""
+    import numpy as np
+
+    if not nights:
+        return {}
+    return {name: np.array([np.datetime64('NaT') if value is None else value for value in values],
+                           dtype='datetime64[ms]')
+            for name, values in zip(nights[0]._fields, zip(*nights)) if name != 'evaluations'}
+
+
+def unstack_windows(windows):
+    """``decide_windows_arrays``' result as a list of per-night ``NightWindows`` (None for NaT)."""
+    import numpy as np
+
+    def value(t):
+        return None if np.isnat(t) else t.astype(datetime)
+
+    return [NightWindows(*(value(t) for t in row[:-1]), bool(row[-1])) for row in zip(*windows)]
@@ -0,0 +1,61 @@
+import json
+from datetime import date, datetime, time
+
+import pytest
+
+from scheduling.alerts import band_crossings, main, next_windows, observing_windows
+from scheduling.almanac import build
+from scheduling.artifact import json_periods
+from scheduling.masks import observing_window
+from scheduling.night import compute_night
+from scheduling.sources import Source, default_sources
+
+NGC_1068 = Source('NGC 1068', '02:42:40.7091669408', '-00:00:47.859690204')
+CIRCUMPOLAR = Source('Polaris', '02:31:49', '89:15:51')
+
+
+def crossings(night):
+    """The night's band crossings of NGC 1068 by the full computation: its source windows in the observing window."""
+    computed = compute_night(datetime.combine(night, time()), sources=default_sources())
+    return computed.source_windows[NGC_1068.name] & observing_window(computed), computed.windows
+
+
+@pytest.mark.parametrize('night, clipped', [(date(2026, 11, 16), True), (date(2026, 11, 24), False)])
+def test_band_crossing_on_a_known_night(night, clipped):
+    expected, windows = crossings(night)
+    window, = observing_windows(night, 1)
+    (source, found), = band_crossings([NGC_1068, CIRCUMPOLAR], [(night, window)])
+    assert source is NGC_1068
+    assert list(found) == list(expected) and len(found) == 1
+    # On the 16th NGC 1068 is still setting when the window closes; on the 24th it is below the band by then
+    assert (found.end == windows.end_time) == clipped
+
+
+def test_next_windows_from_an_alert_in_progress():
+    after = datetime(2026, 11, 24, 12, 30)
+    found = next_windows([NGC_1068, CIRCUMPOLAR], after, count=3)
+    assert found[CIRCUMPOLAR.name] == []
+    first, *later = found[NGC_1068.name]
+    expected, _ = crossings(after.date())
+    assert first == (after, expected.end)
+    for (start, end), night in zip(later, (date(2026, 11, 25), date(2026, 11, 26))):
+        assert [(start, end)] == list(crossings(night)[0])
+
+
+def test_alert_names_must_be_unique():
+    with pytest.raises(ValueError):
+        next_windows([NGC_1068, NGC_1068._replace(ra='05:09:25.96')], datetime(2026, 11, 24))
+
+
+def test_cli_alert_file_with_almanac(tmp_path, capsys):
+    almanac = str(tmp_path / 'almanac.bin')
+    build(almanac, date(2026, 11, 22), date(2026, 11, 28), workers=1)
+    path = tmp_path / 'alerts.csv'
+    path.write_text('name,ra,dec\nNGC 1068,02:42:40.7091669408,-00:00:47.859690204\nPolaris,02:31:49,89:15:51\n')
+    assert main(['--alerts', str(path), '--time', '2026-11-24T12:30:00+00:00', '-n', '2', '--max-nights', '4',
+                 '--json', '--almanac', almanac]) == 0
+    found = json.loads(capsys.readouterr().out)
+    # The almanac's windows are the live ones
+    live = next_windows([NGC_1068, CIRCUMPOLAR], datetime(2026, 11, 24, 12, 30), count=2, max_nights=4)
+    assert found == {name: json_periods(windows) for name, windows in live.items()}
+    assert len(found['NGC 1068']) == 2 and found['Polaris'] == []
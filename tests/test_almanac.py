@@ -0,0 +1,34 @@
+from datetime import date, datetime, time
+
+import pytest
+
+from scheduling.almanac import Almanac, build
+from scheduling.ephemeris import EphemerisBuffer
+from scheduling.night import NIGHT_HOURS, compute_night, compute_times
+from scheduling.site import FRISCO_PEAK
+from scheduling.windows import POLICIES
+
+FIRST_NIGHT, LAST_NIGHT = date(2026, 10, 18), date(2026, 10, 20)
+
+
+@pytest.fixture(scope='module')
+def almanac(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('almanac') / 'almanac.bin')
+    build(path, FIRST_NIGHT, LAST_NIGHT, workers=1)
+    return Almanac(path)
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+@pytest.mark.parametrize('options', [dict(interval_minutes=1), dict(interval_minutes=15), dict(interval_seconds=30),
+                                     dict(sampling='adaptive'), dict(buffer=True)], ids=str)
+def test_lookup_is_live_computation(almanac, policy, options):
+    policy = POLICIES[policy]
+    if options.get('buffer'):
+        options = dict(buffer=EphemerisBuffer(FRISCO_PEAK))
+    for night in (FIRST_NIGHT, LAST_NIGHT):
+        start_date = datetime.combine(night, time())
+        looked_up, illumination = almanac.lookup(start_date, FRISCO_PEAK, policy, hours=NIGHT_HOURS)
+        live = compute_night(start_date, FRISCO_PEAK, policy, **options)
+        assert live.events._replace(evaluations=0) == looked_up
+        assert live.illumination == illumination
+        assert compute_times(start_date, FRISCO_PEAK, policy).events._replace(evaluations=0) == looked_up
@@ -0,0 +1,36 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from scheduling.artifact import load_schedule, write_schedule
+from scheduling.intervals import IntervalSet
+from scheduling.masks import door_states
+from scheduling.night import compute_nights
+from scheduling.site import FRISCO_PEAK
+from scheduling.windows import POLICIES
+
+
+@pytest.fixture(scope='module', params=[datetime(2026, 10, 19), datetime(2026, 10, 27)], ids=lambda d: f'{d:%m-%d}')
+def nights(request):
+    return compute_nights(request.param, interval_minutes=5)
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_door_periods_inside_window(nights, policy, tmp_path):
+    path = str(tmp_path / 'schedule.json')
+    write_schedule(nights[policy], path, FRISCO_PEAK)
+    schedule = load_schedule(path)
+    window = IntervalSet([(schedule.windows.start_time, schedule.windows.end_time)])
+    assert not schedule.door.open - window
+    assert not schedule.door.open & schedule.door.closed
+    assert schedule.door.open.end <= schedule.windows.end_time
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_door_round_trip(nights, policy, tmp_path):
+    path = str(tmp_path / 'schedule.json')
+    write_schedule(nights[policy], path, FRISCO_PEAK)
+    with open(path) as file:
+        assert json.load(file)['door'] is not None
+    assert load_schedule(path).door == door_states(nights[policy])
@@ -0,0 +1,57 @@
+import csv
+import io
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from scheduling.batch import COLUMNS, main, night_range, plan_night, plan_nights, write_table
+from scheduling.windows import SCHEDULER
+
+FIRST_NIGHT = date(2026, 12, 26)  # through New Year
+
+
+def test_night_range_is_inclusive():
+    assert night_range(FIRST_NIGHT, FIRST_NIGHT) == [FIRST_NIGHT]
+    nights = night_range(FIRST_NIGHT, date(2027, 1, 4))
+    assert len(nights) == 10 and nights[-1] == date(2027, 1, 4)
+    assert night_range(date(2027, 1, 4), FIRST_NIGHT) == []
+
+
+@pytest.mark.parametrize('nights, workers', [(3, 2), (21, 2), (21, 3)])
+def test_pool_matches_serial(nights, workers):
+    # 21 nights over 2 workers go out in chunks of 2 and over 3 in chunks of 1; each chunk carries its own
+    # buffer, so every row must still be what planning the night on its own gives
+    last_night = FIRST_NIGHT + timedelta(days=nights - 1)
+    pooled = plan_nights(FIRST_NIGHT, last_night, policy=SCHEDULER, workers=workers)
+    assert [row['night'] for row in pooled] == night_range(FIRST_NIGHT, last_night)
+    assert pooled == plan_nights(FIRST_NIGHT, last_night, policy=SCHEDULER, workers=1)
+    assert pooled == [plan_night(night, policy=SCHEDULER) for night in night_range(FIRST_NIGHT, last_night)]
+
+
+def test_table(tmp_path):
+    path = tmp_path / 'nights.csv'
+    main([FIRST_NIGHT.isoformat(), '2027-01-04', '-j', '1', '-o', str(path)])
+    with open(path, newline='') as file:
+        table = list(csv.DictReader(file))
+    assert list(table[0]) == list(COLUMNS)
+    nights = night_range(FIRST_NIGHT, date(2027, 1, 4))
+    assert [row['night'] for row in table] == [night.isoformat() for night in nights]
+    for row, planned in zip(table, plan_nights(nights[0], nights[-1], workers=1)):
+        for column in COLUMNS:
+            value = planned[column]
+            expected = '' if value is None else value.isoformat() if isinstance(value, (date, datetime)) else str(value)
+            assert row[column] == expected, column
+
+
+def test_table_leaves_missing_times_empty():
+    row = dict.fromkeys(COLUMNS, None)
+    row.update(night=FIRST_NIGHT, too_short=True, illumination=42)
+    file = io.StringIO()
+    write_table([row], file)
+    header, line = file.getvalue().splitlines()
+    assert line == f"{FIRST_NIGHT.isoformat()}{',' * (len(COLUMNS) - 3)},True,42"
+
+
+def test_reversed_range_is_an_error():
+    with pytest.raises(SystemExit):
+        main(['2027-01-04', FIRST_NIGHT.isoformat()])
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+import pytest
+
+from scheduling.cache import EphemerisCache, events_key
+from scheduling.night import compute_night
+from scheduling.site import FRISCO_PEAK
+from scheduling.windows import SCHEDULERLILY
+
+NIGHT = datetime(2026, 10, 19)
+
+
+def _event_hits(cache, **options):
+    """Events of the night computed through ``cache``, and whether they were a cache hit."""
+    hits = cache.hits
+    night = compute_night(NIGHT, policy=SCHEDULERLILY, cache=cache, **options)
+    # The series and source keys have the grid, so only the events can hit on a new grid
+    return night.events, cache.hits > hits
+
+
+def test_solved_events_shared_across_intervals(tmp_path):
+    cache = EphemerisCache(str(tmp_path))
+    events, hit = _event_hits(cache, interval_minutes=15)
+    assert not hit
+    for options in ({'interval_minutes': 5}, {'interval_seconds': 30}):
+        cached, hit = _event_hits(cache, **options)
+        assert hit
+        assert cached == events == compute_night(NIGHT, policy=SCHEDULERLILY, **options).events
+
+
+def test_scanned_events_keyed_by_grid(tmp_path):
+    cache = EphemerisCache(str(tmp_path))
+    coarse, _ = _event_hits(cache, interval_minutes=15, event_mode='scan')
+    fine, hit = _event_hits(cache, interval_minutes=5, event_mode='scan')
+    assert not hit
+    assert fine != coarse
+    assert _event_hits(cache, interval_minutes=5, event_mode='scan') == (fine, True)
+
+
+@pytest.mark.parametrize('field, value', [('night', datetime(2026, 10, 20)), ('mode', 'scan'),
+                                          ('policy', SCHEDULERLILY._replace(moonset_deg=-1))])
+def test_events_key_fields(field, value):
+    arguments = {'night': NIGHT, 'policy': SCHEDULERLILY, 'mode': 'solve'}
+    key = events_key(FRISCO_PEAK, arguments['night'], arguments['policy'], arguments['mode'], [NIGHT])
+    arguments[field] = value
+    assert events_key(FRISCO_PEAK, arguments['night'], arguments['policy'], arguments['mode'], [NIGHT]) != key
@@ -0,0 +1,53 @@
+import json
+import logging
+from datetime import datetime, time, timedelta
+
+import pytest
+
+from scheduling import daemon
+
+
+def test_main_logs_to_scheduler_log(monkeypatch, tmp_path):
+    monkeypatch.setattr(daemon.asyncio, 'run', lambda coroutine: coroutine.close())
+    # No root handlers, as in a fresh process (pytest's capture handler is attached by now)
+    monkeypatch.setattr(logging.root, 'handlers', [])
+    # A missing --almanac is warned about while the resources are opened, before the daemon runs
+    missing = tmp_path / 'missing.bin'
+    try:
+        assert daemon.main(['--', '--directory', str(tmp_path), '--almanac', str(missing), '--no-publish']) == 0
+        assert all(isinstance(handler, logging.FileHandler) for handler in logging.root.handlers)
+    finally:
+        for handler in logging.root.handlers:
+            handler.close()
+    log = (tmp_path / 'scheduler.log').read_text()
+    assert 'Scheduler daemon started' in log
+    assert f'Almanac {missing} not found' in log
+
+
+def test_invalid_config_keeps_previous(tmp_path):
+    config = tmp_path / 'scheduler.json'
+    config.write_text(json.dumps({'directory': str(tmp_path), 'no-publish': True, 'no-cache': True}))
+    scheduler = daemon.Daemon(config=str(config))
+    assert scheduler.load()
+    args = scheduler.args
+    config.write_text('{"policy": ')
+    assert not scheduler.load()
+    config.write_text(json.dumps({'policy': 'nonexistent'}))
+    assert not scheduler.load()
+    assert scheduler.args is args
+
+
+def test_config_argv():
+    assert daemon.config_argv({'policy': 'scheduler', 'no-publish': True, 'no_render': False,
+                               'interval-seconds': 10, 'publish-command': ['./stub.sh', '-v']}) == \
+        ['--policy', 'scheduler', '--no-publish', '--interval-seconds', '10', '--publish-command', './stub.sh', '-v']
+
+
+@pytest.mark.parametrize('now, every, expected', [
+    (datetime(2026, 10, 19, 11, 0), 24, datetime(2026, 10, 19, 12, 0)),
+    (datetime(2026, 10, 19, 12, 0), 24, datetime(2026, 10, 20, 12, 0)),
+    (datetime(2026, 10, 19, 5, 0), 6, datetime(2026, 10, 19, 6, 0)),
+    (datetime(2026, 10, 19, 23, 0), 6, datetime(2026, 10, 20, 0, 0)),
+])
+def test_next_run(now, every, expected):
+    assert daemon.next_run(now, time(12), timedelta(hours=every)) == expected
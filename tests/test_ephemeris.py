@@ -0,0 +1,146 @@
+import math
+from datetime import datetime, timedelta
+
+import ephem
+import numpy as np
+import pytest
+
+from scheduling.ephemeris import (ALTITUDE_TOLERANCE, FIXED_TOLERANCE, EphemerisBuffer, adaptive_altaz, body_altaz,
+                                  compare_fixed_with_ephem, compare_with_ephem, compute_positions, ephem_days,
+                                  fixed_altaz, make_observer, refine_mask, resolve_body, time_grid)
+from scheduling.night import compute_night
+from scheduling.site import FRISCO_PEAK
+from scheduling.sources import default_sources
+
+# Solstices, equinoxes, a New Year's night and one from the schedule
+NIGHTS = [datetime(2026, 3, 20), datetime(2026, 6, 21), datetime(2026, 10, 19), datetime(2026, 12, 21),
+          datetime(2027, 12, 31)]
+# What compare_with_ephem measured on these nights; well inside ALTITUDE_TOLERANCE, so any loss of
+# interpolation accuracy (node spacing, Lagrange order, refraction) shows here first
+MEASURED_DEG = {'sun': 5e-5, 'moon': 1.7e-4}
+
+
+@pytest.mark.parametrize('night', NIGHTS, ids=lambda night: f'{night:%Y-%m-%d}')
+def test_engine_matches_ephem(night):
+    errors = compare_with_ephem(FRISCO_PEAK, time_grid(night, 27, 5))
+    for body, (altitude_error, azimuth_error) in errors.items():
+        assert altitude_error < ALTITUDE_TOLERANCE and azimuth_error < ALTITUDE_TOLERANCE
+        assert altitude_error <= MEASURED_DEG[body], body
+
+
+def test_buffer_computes_only_unseen_samples(tmp_path):
+    buffer = EphemerisBuffer(FRISCO_PEAK)
+    tonight, tomorrow = time_grid(NIGHTS[2], 27, 1), time_grid(NIGHTS[2] + timedelta(days=1), 27, 1)
+    overlap = len(np.intersect1d(tonight, tomorrow))
+    assert overlap == 3 * 60
+    for body in EphemerisBuffer.BODIES:
+        altitudes, _ = buffer.altaz(body, tonight)
+        np.testing.assert_allclose(altitudes, body_altaz(body, FRISCO_PEAK, tonight)[0], rtol=0, atol=1e-9)
+    assert (buffer.samples_computed, buffer.samples_reused) == (2 * len(tonight), 0)
+
+    # The next night's run, from the saved buffer: only the 24 new hours are computed. The 3 reused
+    # ones were interpolated between tonight's nodes, so they differ from a fresh run by ~1e-7 degrees
+    path = str(tmp_path / 'buffer.npz')
+    buffer.save(path)
+    buffer = EphemerisBuffer.load(path, FRISCO_PEAK)
+    for body in EphemerisBuffer.BODIES:
+        altitudes, _ = buffer.altaz(body, tomorrow)
+        np.testing.assert_allclose(altitudes, body_altaz(body, FRISCO_PEAK, tomorrow)[0], rtol=0, atol=1e-6)
+    assert (buffer.samples_computed, buffer.samples_reused) == (2 * (len(tomorrow) - overlap), 2 * overlap)
+
+    calls = buffer.ephem_calls
+    buffer.altaz('moon', tomorrow[::7])
+    assert buffer.ephem_calls == calls and buffer.samples_computed == 2 * (len(tomorrow) - overlap)
+    # Saved for another site: nothing to reuse
+    elsewhere = EphemerisBuffer.load(path, FRISCO_PEAK._replace(elevation=0))
+    elsewhere.altaz('sun', tomorrow)
+    assert (elsewhere.samples_computed, elsewhere.samples_reused) == (len(tomorrow), 0)
+
+
+def _ephem_altitudes(body, times):
+    observer, target = make_observer(FRISCO_PEAK), resolve_body(body)
+    altitudes = []
+    for day in ephem_days(times):
+        observer.date = day
+        target.compute(observer)
+        altitudes.append(math.degrees(target.alt))
+    return np.array(altitudes)
+
+
+@pytest.mark.parametrize('night', NIGHTS[::2], ids=lambda night: f'{night:%Y-%m-%d}')
+def test_adaptive_sampling(night):
+    times = time_grid(night, 27, 1)
+    # COARSE_NODE_MINUTES' comment: the Sun within 1e-4 and the Moon within 0.015 degrees
+    for body, thresholds, bound in (('sun', (-18, -12, 0), 1e-4), ('moon', (-3, 0), 0.015)):
+        altitudes, _, calls = adaptive_altaz(body, FRISCO_PEAK, times, thresholds)
+        errors = np.abs(altitudes - _ephem_altitudes(body, times))
+        assert errors.max() <= bound, body
+        # Next to a threshold or the culmination the samples are ephem's own
+        assert errors[refine_mask(altitudes, thresholds)].max() < 1e-9, body
+        assert calls < len(times) / 10
+
+
+@pytest.mark.parametrize('seconds, per_hour', [(1, 3600), (0.5, 7200), (7, 515), (0.001, 3600000)])
+def test_sub_second_grid(seconds, per_hour):
+    times = time_grid(NIGHTS[2], 1, interval_seconds=seconds)
+    assert len(times) == per_hour
+    assert times[1] - times[0] == np.timedelta64(round(seconds * 1000), 'ms')
+    # Like the minute loops, every hour restarts on the hour
+    assert time_grid(NIGHTS[2], 3, interval_seconds=seconds)[per_hour] == np.datetime64(NIGHTS[2] + timedelta(hours=1))
+
+
+def test_one_second_night():
+    times = time_grid(NIGHTS[2], 27, interval_seconds=1)
+    assert len(times) == 97200
+    minutes = time_grid(NIGHTS[2], 27, 1)
+    positions, per_minute = compute_positions(FRISCO_PEAK, times), compute_positions(FRISCO_PEAK, minutes)
+    for body, (altitudes, azimuths) in positions.items():
+        # Every minute of the 1-second grid is the 1-minute grid's sample
+        np.testing.assert_allclose(altitudes[::60], per_minute[body][0], rtol=0, atol=1e-9)
+        reference = _ephem_altitudes(body, times[::997])
+        assert np.abs(altitudes[::997] - reference).max() < ALTITUDE_TOLERANCE
+
+
+def test_sub_second_grid_rejects_zero_step():
+    with pytest.raises(ValueError):
+        time_grid(NIGHTS[2], 27, interval_seconds=0.0004)
+
+
+def test_sub_minute_night_keeps_the_events():
+    night = compute_night(NIGHTS[2], interval_seconds=10)
+    assert len(night.times) == 27 * 360
+    assert night.events == compute_night(NIGHTS[2]).events
+
+
+def _fixed_body(name, ra, dec):
+    body = ephem.FixedBody()
+    body.name, body._ra, body._dec, body._epoch = name, ephem.hours(ra), ephem.degrees(dec), ephem.J2000
+    return body
+
+
+# The catalog, plus a circumpolar, a low southern and a near-zenith source
+FIXED_BODIES = [source.body() for source in default_sources()] + [
+    _fixed_body('Polaris', '02:31:49', '89:15:51'), _fixed_body('south', '18:00:00', '-45:00:00'),
+    _fixed_body('zenith', '12:00:00', '38:31:00')]
+
+
+@pytest.mark.parametrize('night', NIGHTS, ids=lambda night: f'{night:%Y-%m-%d}')
+def test_fixed_sources_match_ephem(night):
+    errors = compare_fixed_with_ephem(FRISCO_PEAK, time_grid(night, 27, 5), FIXED_BODIES)
+    # Altitudes only: next to the zenith the azimuth is ill-conditioned
+    for name, (altitude_error, _) in errors.items():
+        assert altitude_error <= FIXED_TOLERANCE, name
+        assert altitude_error <= 1.6e-4, name  # the largest error measured; FIXED_TOLERANCE leaves headroom
+
+
+def test_fixed_setting_through_band():
+    times = time_grid(NIGHTS[2], 27, 1)
+    altitudes, _ = fixed_altaz(FIXED_BODIES, FRISCO_PEAK, times)
+    setting, _ = fixed_altaz(FIXED_BODIES, FRISCO_PEAK, times, setting_through=(-10, 0))
+    computed = ~np.isnan(setting)
+    np.testing.assert_array_equal(setting[computed], altitudes[computed])
+    # Every sample of a source setting through the band is computed, and little else
+    in_band = (altitudes >= -10) & (altitudes <= 0)
+    in_band[:, 1:] &= np.diff(altitudes) < 0
+    assert computed[in_band].all()
+    assert computed.sum() < altitudes.size / 4
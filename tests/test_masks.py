@@ -0,0 +1,31 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from scheduling.masks import door_states, observing_window
+from scheduling.night import compute_nights
+
+# A month of nights covers every Moon phase, so both transition shapes and the moonless nights
+NIGHTS = [date(2026, 10, 1) + timedelta(days=offset) for offset in range(0, 30, 3)] + [date(2026, 10, 27)]
+
+
+@pytest.fixture(scope='module', params=NIGHTS, ids=str)
+def nights(request):
+    return compute_nights(datetime.combine(request.param, time()), interval_minutes=5)
+
+
+def test_door_open_inside_observing_window(nights):
+    for night in nights.values():
+        assert not door_states(night).open - observing_window(night)
+
+
+def test_door_open_and_closed_disjoint(nights):
+    for night in nights.values():
+        door = door_states(night)
+        assert not door.open & door.closed
+
+
+def test_door_open_excludes_next_evening():
+    nights = compute_nights(datetime(2026, 10, 19), interval_minutes=5)
+    for night in nights.values():
+        assert door_states(night).open.end <= night.windows.end_time < datetime(2026, 10, 20)
@@ -0,0 +1,55 @@
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from scheduling.night import compute_night
+from scheduling.output import write_eon_times
+from scheduling.publish import fingerprint
+from scheduling.windows import POLICIES
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_eon_times_lines_are_times(policy, tmp_path):
+    night = compute_night(datetime(2026, 10, 1), policy=POLICIES[policy], interval_minutes=15)
+    path = str(tmp_path / 'eon_times.txt')
+    write_eon_times(night, path)
+    with open(path) as file:
+        lines = file.read().splitlines()
+    for line in lines:
+        _, _, value = line.partition(': ')
+        datetime.fromisoformat(value)
+    assert f"Start Time: {night.windows.start_time:%Y-%m-%d %H:%M:%S}" in lines
+
+
+def test_unchanged_eon_times_fingerprint(tmp_path):
+    night = compute_night(datetime(2026, 10, 1), interval_minutes=15)
+    path = str(tmp_path / 'eon_times.txt')
+    write_eon_times(night, path)
+    first = fingerprint(str(tmp_path), [path])
+    write_eon_times(night, path)
+    assert fingerprint(str(tmp_path), [path]) == first
+
+
+# trinity.py's parsing: a name, then a whole-second time (or None), one per line, in this order
+LINE = re.compile(r'(Moonrise|Moonset|Sunrise|Sunset|Start|End) Time( 2)?: (\d{4}-\d\d-\d\d \d\d:\d\d:\d\d|None)')
+ORDER = ['Moonrise', 'Moonset', 'Sunrise', 'Sunset']
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_eon_times_line_format(policy, tmp_path):
+    path = str(tmp_path / 'eon_times.txt')
+    for offset in range(0, 30, 5):
+        night = compute_night(datetime(2026, 10, 1) + timedelta(days=offset), policy=POLICIES[policy],
+                              interval_minutes=15)
+        write_eon_times(night, path)
+        with open(path) as file:
+            text = file.read()
+        assert text.endswith('\n')
+        names = []
+        for line in text.splitlines():
+            match = LINE.fullmatch(line)
+            assert match, line
+            names.append(match.group(1))
+        assert names[:4] == ORDER and names[-2:] == ['Start', 'End']
+        assert f"Moonrise Time: {night.events.moonrise:%Y-%m-%d %H:%M:%S}" in text.splitlines()
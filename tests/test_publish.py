@@ -0,0 +1,76 @@
+import json
+import os
+import time as timer
+
+import pytest
+
+from scheduling.publish import PUBLISHED_FILE, fingerprint, publish
+
+COMMAND = ('./update_site.exp',)
+
+
+@pytest.fixture
+def directory(tmp_path):
+    (tmp_path / 'eon_times.txt').write_text("Start Time: 2026-10-19 01:02:03\n")
+    (tmp_path / 'schedule.png').write_bytes(b'chart')
+    return tmp_path
+
+
+def stub(directory, body):
+    """A stand-in update_site.exp that records each run in runs.txt, then runs ``body``."""
+    script = directory / 'update_site.exp'
+    script.write_text(f"#!/bin/sh\necho run >> runs.txt\n{body}\n")
+    os.chmod(script, 0o755)
+
+
+def runs(directory):
+    path = directory / 'runs.txt'
+    return len(path.read_text().splitlines()) if path.exists() else 0
+
+
+def paths(directory):
+    return [str(directory / 'eon_times.txt'), str(directory / 'schedule.png')]
+
+
+def test_published_then_unchanged(directory):
+    stub(directory, "echo uploaded")
+    assert publish(str(directory), paths(directory), command=COMMAND) == 'published'
+    with open(directory / PUBLISHED_FILE) as file:
+        assert json.load(file)['files'] == fingerprint(str(directory), paths(directory))
+    assert publish(str(directory), paths(directory), command=COMMAND) == 'unchanged'
+    assert runs(directory) == 1
+    assert publish(str(directory), paths(directory), command=COMMAND, force=True) == 'published'
+    (directory / 'schedule.png').write_bytes(b'new chart')
+    assert publish(str(directory), paths(directory), command=COMMAND) == 'published'
+    assert runs(directory) == 3
+
+
+def test_nonzero_exit_is_retried(directory):
+    stub(directory, "echo denied; exit 3")
+    assert publish(str(directory), paths(directory), command=COMMAND, retries=2, backoff=0) == 'failed'
+    assert runs(directory) == 3
+    assert not (directory / PUBLISHED_FILE).exists()
+    # Nothing was recorded, so the next run tries again
+    stub(directory, "echo uploaded")
+    assert publish(str(directory), paths(directory), command=COMMAND) == 'published'
+
+
+def test_retry_after_failure(directory):
+    # Fails the first time only
+    stub(directory, '[ "$(wc -l < runs.txt)" -gt 1 ] || exit 1')
+    assert publish(str(directory), paths(directory), command=COMMAND, retries=1, backoff=0) == 'published'
+    assert runs(directory) == 2
+
+
+def test_timeout_kills_the_script_and_its_children(directory):
+    # The background sleep holds the output pipe open after its parent is gone
+    stub(directory, "sleep 30 &\nsleep 30")
+    started = timer.monotonic()
+    assert publish(str(directory), paths(directory), command=COMMAND, timeout=0.5, retries=1, backoff=0) == 'failed'
+    assert timer.monotonic() - started < 10
+    assert runs(directory) == 2
+    assert not (directory / PUBLISHED_FILE).exists()
+
+
+def test_missing_command(directory):
+    assert publish(str(directory), paths(directory), command=('./no_such_script',), retries=0) == 'failed'
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import to_rgb
+from matplotlib.dates import date2num, num2date
+
+from scheduling.masks import observing_window, safe
+from scheduling.night import compute_night
+from scheduling.render import ChartTemplate, _sample_days, encode_outputs, image_options, layered_alpha, render
+from scheduling.windows import POLICIES, SCHEDULER
+
+
+@pytest.fixture(scope='module')
+def nights():
+    # Alternate the variants so every chart is drawn over the other variant's
+    return [compute_night(datetime(2026, 10, 17) + timedelta(days=offset), policy=policy, interval_minutes=15)
+            for offset in range(0, 12, 3) for policy in POLICIES.values()]
+
+
+def test_template_matches_new_figure(nights):
+    chart = ChartTemplate()
+    for night in nights:
+        assert encode_outputs(chart.render(night), night) == encode_outputs(render(night), night)
+
+
+def test_template_keeps_one_figure(nights):
+    chart = ChartTemplate()
+    for night in nights:
+        assert chart.render(night) is chart.figure
+    assert len(chart.axes.lines) == len(render(nights[-1]).axes[0].lines)
+
+
+def test_moonset_chart_shades_every_safe_sample():
+    # scheduler.py shaded the safe samples of the whole axis, not just the observation window
+    night = compute_night(datetime(2026, 10, 19), policy=SCHEDULER, interval_minutes=15)
+    assert safe(night) - observing_window(night)
+    ax = render(night).axes[0]
+    shaded = [(num2date(patch.get_x()).replace(tzinfo=None),
+               num2date(patch.get_x() + patch.get_width()).replace(tzinfo=None))
+              for patch in ax.patches if tuple(patch.get_facecolor()[:3]) == to_rgb('grey')]
+    assert [(start.replace(microsecond=0), end.replace(microsecond=0)) for start, end in shaded] == \
+        [(start.replace(microsecond=0), end.replace(microsecond=0)) for start, end in safe(night)]
+
+
+def _run_color(night, dpi, draw):
+    """Mean RGB inside a 5-hour run drawn by ``draw(ax, samples)`` on the production chart's bare axes, at ``dpi``."""
+    fig = ChartTemplate().render(night)
+    ax = fig.axes[0]
+    for artist in ax.patches + ax.lines:
+        artist.remove()
+    ax.get_legend().remove()
+    ax.grid(False)
+    samples = night.times[120:421]
+    draw(ax, samples)
+    if dpi:
+        fig.set_dpi(dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    pixels = np.asarray(canvas.buffer_rgba())[..., :3].astype(float)
+    (left, bottom), (right, top) = ax.transData.transform([(date2num(samples[30]), ax.get_ylim()[0]),
+                                                          (date2num(samples[-30]), ax.get_ylim()[1])])
+    height = pixels.shape[0]
+    return pixels[round(height - top) + 2:round(height - bottom) - 2, round(left):round(right)].mean(axis=(0, 1))
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+@pytest.mark.parametrize('color, alpha', [('grey', 0.05), ('grey', 0.1), ('blue', 0.05), ('purple', 0.05)])
+def test_merged_span_matches_per_sample_spans(policy, color, alpha):
+    # The scripts drew one color= span per 1-minute sample; see layered_alpha for the tolerance
+    night = compute_night(datetime(2026, 10, 19), policy=POLICIES[policy], interval_minutes=1)
+    dpi = image_options(night).get('dpi')  # None: the figure's, as savefig uses
+
+    def per_sample(ax, samples):
+        for start, end in zip(samples, samples[1:]):
+            ax.axvspan(start, end, color=color, alpha=alpha)
+
+    def merged(ax, samples):
+        ax.axvspan(samples[0], samples[-1], color=color, alpha=layered_alpha(ax, alpha, _sample_days(samples)))
+
+    expected = _run_color(night, dpi, per_sample)
+    assert _run_color(night, dpi, merged) == pytest.approx(expected, abs=4)
@@ -0,0 +1,31 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import pytest
+
+from scheduling.night import compute_night
+from scheduling.render import check_parallel, encode_outputs, render
+from scheduling.windows import POLICIES
+
+
+@pytest.fixture(scope='module')
+def nights():
+    return [compute_night(datetime(2026, 10, 17) + timedelta(days=offset), policy=policy, interval_minutes=15)
+            for offset in range(0, 16, 2) for policy in POLICIES.values()]
+
+
+def _encoded(night):
+    return encode_outputs(render(night), night)
+
+
+def test_threaded_rendering_is_byte_identical(nights):
+    serial = [_encoded(night) for night in nights]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        threaded = list(pool.map(_encoded, nights))
+    for night, expected, encoded in zip(nights, serial, threaded):
+        assert set(encoded) in ({'png', 'pdf'}, {'jpg', 'pdf'})
+        assert encoded == expected, f"{night.start_date:%Y-%m-%d} {night.policy.name}"
+
+
+def test_check_parallel(nights):
+    assert check_parallel(nights[:4], workers=4) == []
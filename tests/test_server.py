@@ -0,0 +1,126 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time, timedelta
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+import pytest
+
+from scheduling.artifact import json_time, schedule_document
+from scheduling.masks import door_states
+from scheduling.night import compute_nights
+from scheduling.server import ENDPOINTS, NightStore, Server
+from scheduling.site import FRISCO_PEAK
+from scheduling.sources import default_sources
+from scheduling.windows import POLICIES
+
+NIGHT = date(2026, 10, 19)
+INTERVAL_MINUTES = 15
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = Server(NightStore(FRISCO_PEAK, interval_minutes=INTERVAL_MINUTES), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server, path, **query):
+    """``(status, JSON body)`` of a GET of ``path?query``."""
+    url = f"http://{server.server_address[0]}:{server.server_address[1]}{path}?{urlencode(query)}"
+    try:
+        with urlopen(url, timeout=30) as response:
+            return response.status, json.load(response)
+    except HTTPError as e:
+        return e.code, json.load(e)
+
+
+@pytest.fixture(scope='module')
+def nights():
+    return compute_nights(datetime.combine(NIGHT, time()), FRISCO_PEAK, interval_minutes=INTERVAL_MINUTES)
+
+
+def test_index(server):
+    status, body = get(server, '/')
+    assert status == 200
+    assert body == {'endpoints': sorted(ENDPOINTS), 'policies': sorted(POLICIES),
+                    'sources': [source.name for source in default_sources()]}
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_night_is_the_schedule_document(server, nights, policy):
+    status, body = get(server, '/night', date=NIGHT.isoformat(), policy=policy)
+    assert status == 200
+    expected = json.loads(json.dumps(schedule_document(nights[policy], FRISCO_PEAK)))
+    assert body.pop('created') and expected.pop('created')  # when each was built
+    assert body == expected
+    status, windows = get(server, '/windows', date=NIGHT.isoformat(), policy=policy)
+    assert windows == {field: body[field] for field in windows}
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_door_either_side_of_the_edges(server, nights, policy):
+    door = door_states(nights[policy])
+    states = [(state, start, end) for state, intervals in (('open', door.open), ('closed', door.closed))
+              for start, end in intervals]
+    assert states
+    step = timedelta(milliseconds=1)
+    for state, start, end in states:
+        for t, expected in ((start, state), (end - step, state)):
+            status, body = get(server, '/door', time=t.isoformat(), policy=policy)
+            assert status == 200
+            assert (body['state'], body['since'], body['until']) == (expected, json_time(start), json_time(end))
+        for t in (start - step, end):
+            status, body = get(server, '/door', time=t.isoformat(), policy=policy)
+            assert body['state'] != state or (body['since'], body['until']) != (json_time(start), json_time(end))
+    first, last = min(start for _, start, _ in states), max(end for _, _, end in states)
+    for t in (first - step, last):
+        if t.date() == NIGHT:
+            assert get(server, '/door', time=t.isoformat(), policy=policy)[1]['state'] == 'outside'
+
+
+@pytest.mark.parametrize('path, query, status', [
+    ('/nowhere', {}, 404),
+    ('/night', {'date': '2026-13-01'}, 400),
+    ('/night', {'date': NIGHT.isoformat(), 'policy': 'nobody'}, 400),
+    ('/door', {'time': 'tonight'}, 400),
+    ('/sources', {'name': 'Crab', 'start': NIGHT.isoformat()}, 404),
+    ('/sources', {'start': NIGHT.isoformat(), 'nights': '0'}, 400),
+])
+def test_errors(server, path, query, status):
+    code, body = get(server, path, **query)
+    assert code == status
+    assert set(body) == {'error'}
+
+
+def test_prefetch_and_eviction():
+    store = NightStore(FRISCO_PEAK, interval_minutes=INTERVAL_MINUTES, capacity=3)
+    store.prefetch(NIGHT, 3)
+    assert store.computed == 3
+    night = store.night(NIGHT + timedelta(days=2), 'scheduler')
+    assert store.computed == 3
+    store.night(NIGHT, 'scheduler')  # most recently used from now on
+    store.night(NIGHT + timedelta(days=3), 'scheduler')  # evicts NIGHT + 1
+    assert store.computed == 4
+    store.night(NIGHT, 'scheduler')
+    assert store.computed == 4
+    assert store.night(NIGHT + timedelta(days=2), 'scheduler') is night
+    store.night(NIGHT + timedelta(days=1), 'scheduler')
+    assert store.computed == 5
+
+
+def test_concurrent_queries_compute_once():
+    store = NightStore(FRISCO_PEAK, interval_minutes=INTERVAL_MINUTES)
+    queries = [(NIGHT + timedelta(days=i % 2), policy) for i in range(16) for policy in sorted(POLICIES)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        documents = list(pool.map(lambda query: store.document(*query), queries))
+        doors = list(pool.map(lambda query: store.door(*query), queries))
+    assert store.computed == 2
+    for query, document, door in zip(queries, documents, doors):
+        assert document is store.document(*query)
+        assert door is store.door(*query)
@@ -0,0 +1,54 @@
+import re
+
+import pytest
+
+from scheduling.sources import BAND_HIGH_DEG, BAND_LOW_DEG, CATALOG_PATH, Source, load_catalog
+
+HEADER = 'name,ra,dec,epoch,color,band_low_deg,band_high_deg\n'
+GOOD = 'NGC 1068,02:42:40.7,-00:00:47.9,2000,blue,-10,0\n'
+
+
+def write(tmp_path, text):
+    path = tmp_path / 'catalog.csv'
+    path.write_text(text)
+    return str(path)
+
+
+def test_shipped_catalog():
+    sources = load_catalog(CATALOG_PATH)
+    assert [source.name for source in sources] == ['NGC 1068', 'TXS 0506']
+    assert all(source.band_low_deg < source.band_high_deg for source in sources)
+
+
+def test_optional_columns_default(tmp_path):
+    path = write(tmp_path, 'name,ra,dec,epoch,color\n  Crab , 5.5755 , 22.0145 ,,\n')
+    assert load_catalog(path) == [Source('Crab', '5.5755', '22.0145', '2000', 'grey', BAND_LOW_DEG, BAND_HIGH_DEG)]
+
+
+@pytest.mark.parametrize('row, reason', [
+    ('Crab,garbage,22.0,2000,red,-10,0', 'garbage'),
+    ('Crab,05:34:31.9,22:x,2000,red,-10,0', "'x'"),
+    ('Crab,05:34:31.9,22.0,last year,red,-10,0', 'last year'),
+    ('Crab,05:34:31.9,22.0,2000,red,low,0', "'low'"),
+    ('Crab,05:34:31.9,22.0,2000,red,-10,high', "'high'"),
+    ('Crab,,22.0,2000,red,-10,0', 'required'),
+    (',05:34:31.9,22.0,2000,red,-10,0', 'required'),
+    ('Crab,05:34:31.9', ''),  # a short row: no dec at all
+    ('Crab,25:00:00,22.0,2000,red,-10,0', 'out of range'),
+    ('Crab,05:34:31.9,-95,2000,red,-10,0', 'out of range'),
+])
+def test_bad_entry_names_its_line(tmp_path, row, reason):
+    path = write(tmp_path, HEADER + GOOD + GOOD + row + '\n' + GOOD)
+    with pytest.raises(ValueError, match=re.escape(f'{path}:4: bad catalog entry: ') + '.*' + re.escape(reason)):
+        load_catalog(path)
+
+
+def test_missing_column(tmp_path):
+    path = write(tmp_path, 'name,ra\nCrab,05:34:31.9\n')
+    with pytest.raises(ValueError, match=re.escape(f"{path}:2: bad catalog entry: 'dec'")):
+        load_catalog(path)
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_catalog(str(tmp_path / 'nowhere.csv'))
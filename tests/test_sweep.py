@@ -0,0 +1,43 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from scheduling.batch import night_range
+from scheduling.masks import door_states
+from scheduling.night import compute_nights
+from scheduling.sweep import sweep
+from scheduling.windows import POLICIES
+
+FIRST_NIGHT, LAST_NIGHT = date(2026, 10, 15), date(2026, 10, 28)
+
+
+@pytest.fixture(scope='module')
+def rows():
+    return sweep(FIRST_NIGHT, LAST_NIGHT, {'sunrise_crit_deg': [-18, -15, -12]}, interval_minutes=5)
+
+
+def test_door_open_within_window_hours(rows):
+    for row in rows:
+        assert row['door_open_hours'] <= row['window_hours']
+
+
+def test_door_open_follows_sunrise_crit(rows):
+    for variant in ('transition', 'moonset'):
+        hours = [row['door_open_hours'] for row in rows if row['variant'] == variant]
+        assert len(set(hours)) > 1
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_door_hours_match_masks(rows, policy):
+    policy = POLICIES[policy]
+    row, = (row for row in rows if row['variant'] == policy.variant
+            and row['sunrise_crit_deg'] == policy.sunrise_crit_deg)
+    door_open = door_closed = timedelta()
+    for night in night_range(FIRST_NIGHT, LAST_NIGHT):
+        door = door_states(compute_nights(datetime.combine(night, time()), policies=(policy,),
+                                          interval_minutes=5)[policy.name])
+        door_open += door.open.duration()
+        door_closed += door.closed.duration()
+    # The sweep solves the nightly run's events, so its totals round exactly like the masks'
+    assert row['door_open_hours'] == round(door_open / timedelta(hours=1), 2)
+    assert row['door_closed_hours'] == round(door_closed / timedelta(hours=1), 2)
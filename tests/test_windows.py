@@ -0,0 +1,33 @@
+import itertools
+from datetime import datetime, timedelta
+
+import pytest
+
+from scheduling.events import NightEvents
+from scheduling.windows import POLICIES, decide_windows, decide_windows_arrays, stack_events, unstack_windows
+
+SUNSET_CRIT = datetime(2026, 10, 19, 1, 30)
+TIMES = (None, SUNSET_CRIT - timedelta(hours=2), SUNSET_CRIT + timedelta(hours=3), SUNSET_CRIT + timedelta(hours=12))
+
+
+def _events(sunrise_crit, moonset, moon_max):
+    return NightEvents(sunrise=None, sunset=None, sunrise_crit=sunrise_crit, sunset_crit=SUNSET_CRIT, moonrise=None,
+                       moonset=moonset, moon_max=moon_max)
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_missing_sunrise_crit(policy):
+    # No sunrise crit crossing on the grid, and the Moon never peaks in it
+    events = _events(None, SUNSET_CRIT + timedelta(hours=3), None)
+    windows = decide_windows(events, POLICIES[policy])
+    assert windows.start_time == SUNSET_CRIT
+    assert windows.end_time is None
+    assert windows.start_time_2 is None and windows.end_time_2 is None
+
+
+@pytest.mark.parametrize('policy', sorted(POLICIES))
+def test_scalar_matches_arrays_with_missing_events(policy):
+    policy = POLICIES[policy]
+    nights = [_events(*times) for times in itertools.product(TIMES, repeat=3)]
+    assert [decide_windows(events, policy) for events in nights] == \
+        unstack_windows(decide_windows_arrays(stack_events(nights), policy))